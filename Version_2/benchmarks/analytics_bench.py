@@ -0,0 +1,148 @@
+"""
+Schedule analytics benchmark on a year of synthetic events.
+
+Seeds FakeCalendarService with a year of meetings (recurring standups plus a random mix of
+one-off meetings, with overlaps, all-day events and declined invites) and compares:
+
+1. What the LLM would otherwise read: the raw list_events output for the year, in characters.
+2. The schedule_analytics tool's table, in characters.
+3. Computing the weekly table with plain Python loops (interval merging per day) vs
+   core/analytics.py (numpy), on the same loaded columns; both must agree.
+
+    python benchmarks/analytics_bench.py --per-day 8 --repeat 5
+"""
+import json
+import time
+import random
+import argparse
+import datetime
+
+from common import percentile
+from fakes import FakeCalendarService
+from e2e_bench import offline_backend
+
+from core import analytics, tools
+from core.event_store import LOCAL_TZ
+
+
+def seed(service: FakeCalendarService, first: datetime.date, days: int, per_day: int, seed: int = 7):
+    rng = random.Random(seed)
+
+    def at(day, minutes):
+        return (datetime.datetime.combine(day, datetime.time(), tzinfo=LOCAL_TZ)
+                + datetime.timedelta(minutes=minutes)).isoformat()
+
+    service.add_event("Standup", at(first, 9 * 60 + 30), at(first, 9 * 60 + 45),
+                      recurrence=["RRULE:FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR"])
+    for offset in range(days):
+        day = first + datetime.timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        for _ in range(rng.randint(per_day // 2, per_day + per_day // 2)):
+            start = rng.randrange(8 * 60, 19 * 60, 15)
+            length = rng.choice([15, 30, 30, 45, 60, 60, 90])
+            attendees = [{"email": f"p{i}@example.com"} for i in range(rng.randint(0, 8))]
+            if attendees and rng.random() < 0.05:
+                attendees.append({"email": "me@example.com", "self": True, "responseStatus": "declined"})
+            service.add_event(f"Meeting {offset}-{start}", at(day, start), at(day, start + length), attendees=attendees)
+        if rng.random() < 0.03:
+            event = service.add_event("Out of office", day.isoformat(), (day + datetime.timedelta(days=1)).isoformat())
+            event["start"], event["end"] = {"date": day.isoformat()}, {"date": (day + datetime.timedelta(days=1)).isoformat()}
+
+
+def weekly_loops(columns: analytics.EventColumns, time_min: str, time_max: str, work=(9, 18)) -> list:
+    """The weekly table's events/hours/busy/fragmentation columns, computed event by event."""
+    lo, hi = (datetime.datetime.fromisoformat(t).timestamp() for t in (time_min, time_max))
+    per_day = {}
+    for start, end in zip(columns.start.tolist(), columns.end.tolist()):
+        start, end = max(start, lo), min(end, hi)
+        if end <= start:
+            continue
+        day = datetime.datetime.fromtimestamp(start, LOCAL_TZ).date()
+        per_day.setdefault(day, []).append((start, end))
+    weeks = {}
+    day = datetime.datetime.fromtimestamp(lo, LOCAL_TZ).date()
+    while datetime.datetime.combine(day, datetime.time(), tzinfo=LOCAL_TZ).timestamp() < hi:
+        intervals = sorted(per_day.get(day, []))
+        midnight = datetime.datetime.combine(day, datetime.time(), tzinfo=LOCAL_TZ).timestamp()
+        # Busy minutes of the day: merge overlapping intervals, including ones spilling in from earlier days
+        spans = sorted(iv for d in (day - datetime.timedelta(days=1), day) for iv in per_day.get(d, []))
+        merged = []
+        for start, end in spans:
+            start, end = max(start, midnight), min(end, midnight + 86400)
+            if end <= start:
+                continue
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        busy = sum(end - start for start, end in merged) / 60
+        free = short = longest = 0
+        if day.weekday() < 5:
+            cursor, close = midnight + work[0] * 3600, midnight + work[1] * 3600
+            for start, end in merged + [[close, close]]:
+                gap = (min(start, close) - cursor) / 60
+                if gap > 0:
+                    free += gap
+                    short += gap if gap < analytics.FOCUS_BLOCK_MINUTES else 0
+                    longest = max(longest, gap)
+                cursor = max(cursor, end)
+        week = f"week of {day - datetime.timedelta(days=day.weekday())}"
+        row = weeks.setdefault(week, [0, 0.0, 0.0, 0.0, 0.0, 0])
+        row[0] += len(intervals)
+        row[1] += sum(end - start for start, end in intervals) / 60
+        row[2] += busy
+        row[3] += free
+        row[4] += short
+        row[5] = max(row[5], longest)
+        day += datetime.timedelta(days=1)
+    return [[week, n, round(minutes / 60, 1), round(busy / 60, 1), round(short / free, 2) if free else None, int(longest)]
+            for week, (n, minutes, busy, free, short, longest) in sorted(weeks.items())]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=364)
+    parser.add_argument("--per-day", type=int, default=8, help="average one-off meetings per working day")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    first = datetime.date.today() - datetime.timedelta(days=datetime.date.today().weekday() + args.days)
+    start = datetime.datetime.combine(first, datetime.time(), tzinfo=LOCAL_TZ)
+    window = {"time_min": start.isoformat(), "time_max": (start + datetime.timedelta(days=args.days)).isoformat()}
+    service = FakeCalendarService()
+    seed(service, first, args.days, args.per_day)
+
+    with offline_backend(service):
+        raw = tools.list_events.invoke(dict(window, expand_recurring=True))
+        t0 = time.perf_counter()
+        table = tools.schedule_analytics.invoke(dict(window, group_by="week", heatmap=True))
+        tool_seconds = time.perf_counter() - t0   # includes fetching the year from the fake backend
+
+    load_times, loop_times, numpy_times = [], [], []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        columns = analytics.EventColumns(raw)
+        load_times.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        expected = weekly_loops(columns, **window)
+        loop_times.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        result = analytics.aggregate(columns, group_by="week", **window)
+        numpy_times.append(time.perf_counter() - t0)
+    got = [[r[0], r[1], r[2], r[3], r[6], r[7]] for r in result["rows"]]
+    assert got == expected, "numpy and loop results differ"
+
+    print(f"{len(raw)} events over {args.days} days ({result['totals']['events']} timed, skipped {result['skipped']})")
+    print(f"  raw list_events output:  {len(json.dumps(raw)) / 1000:>8.1f}k chars")
+    print(f"  schedule_analytics:      {len(json.dumps(table)) / 1000:>8.1f}k chars "
+          f"({len(table['rows'])} weekly rows + heatmap), tool call {tool_seconds * 1000:.0f} ms")
+    print(f"  load into columns:       {percentile(load_times, 50) * 1000:>8.1f} ms")
+    print(f"  weekly table, loops:     {percentile(loop_times, 50) * 1000:>8.1f} ms")
+    print(f"  weekly table, numpy:     {percentile(numpy_times, 50) * 1000:>8.1f} ms "
+          f"(x{percentile(loop_times, 50) / percentile(numpy_times, 50):.1f})")
+    print(f"  busiest day {table['totals']['busiest_day']}, fragmentation {table['totals']['fragmentation']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Calendar request executor under faults and contention.
+
+1. Fault tolerance: tool calls against a FakeCalendarService that fails a share of requests
+   with 403 rateLimitExceeded / 429 / 503, with and without retries.
+2. Priority lanes: interactive reads issued while bulk writes saturate the token bucket,
+   with lanes and with everything in one lane.
+
+    python benchmarks/calendar_faults_bench.py --fault-rate 0.3 --qps 20
+"""
+import time
+import argparse
+import datetime
+import threading
+from unittest import mock
+
+from common import percentile
+from fakes import FakeCalendarService
+from e2e_bench import offline_backend, seed_calendar
+
+from core import event_store, metering
+from core.calendar_client import BULK, INTERACTIVE, CalendarRequestExecutor
+from core.tools import list_events
+
+
+def fault_tolerance(fault_rate: float, calls: int, max_retries: int) -> dict:
+    day = datetime.date.today()
+    service = FakeCalendarService(fault_rate=fault_rate, seed=7)
+    seed_calendar(service, day)
+    executor = CalendarRequestExecutor(rate=0, max_retries=max_retries, backoff_base=0.005, backoff_cap=0.05)
+    failures = 0
+    retries_before = metering.totals()["calendar_retries"]
+    # Keep every call going to the API instead of the event store
+    with offline_backend(service, executor), mock.patch.object(event_store, "EVENT_CACHE_TTL", 0):
+        for _ in range(calls):
+            result = list_events.invoke({"time_min": f"{day}T00:00:00+05:30", "time_max": f"{day}T23:59:59+05:30"})
+            failures += bool(result and "error" in result[0])
+    return {"tool_failures": failures, "faults_injected": service.faults_injected,
+            "retries": int(metering.totals()["calendar_retries"] - retries_before)}
+
+
+def lane_contention(qps: float, bulk_writes: int, reads: int, use_lanes: bool) -> dict:
+    service = FakeCalendarService()
+    executor = CalendarRequestExecutor(rate=qps, burst=1)
+    read_lane = INTERACTIVE if use_lanes else BULK
+    waits = []
+
+    def bulk_writer(i):
+        body = {"summary": f"Imported {i}", "start": {"dateTime": "2025-01-01T10:00:00Z"},
+                "end": {"dateTime": "2025-01-01T11:00:00Z"}}
+        executor.execute(service.events().insert(calendarId="primary", body=body), BULK)
+
+    def reader():
+        t0 = time.perf_counter()
+        executor.execute(service.events().list(calendarId="primary"), read_lane)
+        waits.append(time.perf_counter() - t0)
+
+    writers = [threading.Thread(target=bulk_writer, args=(i,)) for i in range(bulk_writes)]
+    for t in writers:
+        t.start()
+    time.sleep(0.05)  # let the bulk backlog queue up first
+    readers = []
+    for _ in range(reads):
+        t = threading.Thread(target=reader)
+        t.start()
+        readers.append(t)
+        time.sleep(1.0 / qps)
+    for t in writers + readers:
+        t.join()
+    return {"p50_s": percentile(waits, 50), "p95_s": percentile(waits, 95)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fault-rate", type=float, default=0.3)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--qps", type=float, default=20)
+    parser.add_argument("--bulk-writes", type=int, default=100)
+    parser.add_argument("--reads", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"Fault tolerance ({args.calls} list_events calls, {args.fault_rate:.0%} injected faults)")
+    for label, retries in (("no retries", 0), ("with retries", 5)):
+        r = fault_tolerance(args.fault_rate, args.calls, retries)
+        print(f"  {label:<14} tool failures={r['tool_failures']:<5} faults={r['faults_injected']:<5} retries={r['retries']}")
+
+    print(f"\nInteractive read latency while {args.bulk_writes} bulk writes drain at {args.qps:g} req/s")
+    for label, use_lanes in (("single lane", False), ("priority lanes", True)):
+        r = lane_contention(args.qps, args.bulk_writes, args.reads, use_lanes)
+        print(f"  {label:<14} p50={r['p50_s']:.3f}s p95={r['p95_s']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
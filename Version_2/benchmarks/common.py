@@ -0,0 +1,32 @@
+"""Helpers shared by the benchmark scripts."""
+import os
+import sys
+import math
+import subprocess
+import tarfile
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+VERSION_DIR = os.path.join(REPO_DIR, "Version_2")
+
+# Make `core` importable when a benchmark is run as a script
+if VERSION_DIR not in sys.path:
+    sys.path.insert(0, VERSION_DIR)
+
+
+def extract_revision(ref: str, dest: str) -> str:
+    """Unpack Version_2 at git `ref` into `dest` and return the tree path."""
+    archive = os.path.join(dest, "tree.tar")
+    with open(archive, "wb") as fp:
+        subprocess.run(["git", "archive", ref, "Version_2"], cwd=REPO_DIR, stdout=fp, check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(dest)
+    return os.path.join(dest, "Version_2")
+
+
+def percentile(samples, pct: float) -> float:
+    """Nearest-rank percentile of `samples` (pct in 0..100)."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
@@ -0,0 +1,121 @@
+"""
+Conflict detection benchmark for the interval index behind the event store.
+
+1. Index vs linear scan: overlap queries against N events (timed, all-day and multi-day),
+   checked against a brute-force scan for correctness.
+2. Bulk rescheduling: M proposed slots checked one `check_availability` call each versus a
+   single `find_conflicts` call, on a FakeCalendarService with per-call latency.
+
+    python benchmarks/conflict_index_bench.py --events 20000 --candidates 500 --api-latency 0.05
+"""
+import time
+import random
+import argparse
+import datetime
+from unittest import mock
+
+from fakes import FakeCalendarService
+from e2e_bench import offline_backend
+
+from core import event_store
+from core.interval_index import IntervalIndex
+from core.tools import check_availability, find_conflicts
+
+IST = event_store.LOCAL_TZ
+
+
+def random_events(count: int, days: int, rng: random.Random) -> list:
+    """Mostly short meetings, with some all-day and multi-day events mixed in."""
+    base = datetime.date.today()
+    events = []
+    for i in range(count):
+        day = base + datetime.timedelta(days=rng.randrange(days))
+        kind = rng.random()
+        if kind < 0.05:
+            span = rng.choice((1, 1, 2, 5))
+            start, end = {"date": day.isoformat()}, {"date": (day + datetime.timedelta(days=span)).isoformat()}
+        else:
+            t0 = datetime.datetime.combine(day, datetime.time(8), tzinfo=IST) + datetime.timedelta(minutes=rng.randrange(0, 600, 15))
+            start = {"dateTime": t0.isoformat()}
+            end = {"dateTime": (t0 + datetime.timedelta(minutes=rng.choice((15, 30, 60, 90)))).isoformat()}
+        events.append({"id": f"e{i}", "summary": f"Event {i}", "start": start, "end": end})
+    return events
+
+
+def random_slots(count: int, days: int, rng: random.Random) -> list:
+    base = datetime.date.today()
+    slots = []
+    for _ in range(count):
+        day = base + datetime.timedelta(days=rng.randrange(days))
+        t0 = datetime.datetime.combine(day, datetime.time(9), tzinfo=IST) + datetime.timedelta(minutes=rng.randrange(0, 480, 30))
+        slots.append({"start": t0.isoformat(), "end": (t0 + datetime.timedelta(minutes=30)).isoformat()})
+    return slots
+
+
+def index_vs_scan(events: list, slots: list) -> dict:
+    bounds = {e["id"]: event_store.event_bounds(e) for e in events}
+    candidates = [(event_store.parse_time(s["start"]).timestamp(), event_store.parse_time(s["end"]).timestamp())
+                  for s in slots]
+
+    t0 = time.perf_counter()
+    index = IntervalIndex(seed=1)
+    for event_id, (start, end) in bounds.items():
+        index.add(event_id, start, end)
+    build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    indexed = index.conflicts(candidates)
+    query = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    scanned = [[k for k, (s, e) in bounds.items() if s < hi and e > lo] for lo, hi in candidates]
+    scan = time.perf_counter() - t0
+
+    assert [sorted(a) for a in indexed] == [sorted(b) for b in scanned], "index disagrees with linear scan"
+    return {"build_s": build, "index_s": query, "scan_s": scan, "hits": sum(map(len, indexed))}
+
+
+def bulk_reschedule(events: list, slots: list, api_latency: float) -> dict:
+    results = {}
+    for label in ("check_availability x M", "find_conflicts x 1"):
+        service = FakeCalendarService(latency=api_latency)
+        for e in events:
+            service.calendars["primary"][e["id"]] = dict(e)
+        with offline_backend(service):
+            t0 = time.perf_counter()
+            if label.startswith("check"):
+                # Disable the store so every call is the per-slot API query this replaces
+                with mock.patch.object(event_store, "EVENT_CACHE_TTL", 0):
+                    busy = sum(not check_availability.invoke({"start_time": s["start"], "end_time": s["end"]})
+                               for s in slots)
+            else:
+                busy = sum(not r["free"] for r in find_conflicts.invoke({"slots": slots}))
+            results[label] = {"seconds": time.perf_counter() - t0, "api_calls": sum(service.calls.values()), "busy": busy}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--candidates", type=int, default=500)
+    parser.add_argument("--api-latency", type=float, default=0.05, help="seconds per fake Calendar call")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    events = random_events(args.events, args.days, rng)
+    slots = random_slots(args.candidates, args.days, rng)
+
+    r = index_vs_scan(events, slots)
+    print(f"{args.candidates} overlap queries over {args.events} events ({r['hits']} hits)")
+    print(f"  index build    {r['build_s'] * 1000:9.1f} ms")
+    print(f"  index queries  {r['index_s'] * 1000:9.1f} ms")
+    print(f"  linear scan    {r['scan_s'] * 1000:9.1f} ms")
+
+    print(f"\nBulk rescheduling check of {args.candidates} slots, {args.api_latency * 1000:g} ms per API call")
+    for label, r in bulk_reschedule(events, slots, args.api_latency).items():
+        print(f"  {label:<24} {r['seconds']:7.2f} s  api_calls={r['api_calls']:<5} busy={r['busy']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Offline end-to-end benchmark of agent turns.
+
+Drives the real LangGraph from core/agent.py with a ScriptedChatModel and a FakeCalendarService
+(see benchmarks/fakes.py), so no Google, Hugging Face or DeepSeek account is needed. Each
+scenario is run repeatedly and per-stage latencies (chatbot node, tools node, whole turn) are
+reported as p50/p95/p99. Results are written as JSON; pass --compare to diff against a
+previous run.
+
+    python benchmarks/e2e_bench.py --iterations 50 --llm-latency 0.2 --api-latency 0.05
+    python benchmarks/e2e_bench.py --compare benchmarks/results/e2e-20250101-120000.json
+"""
+import os
+import json
+import time
+import argparse
+import datetime
+import tempfile
+import contextlib
+from unittest import mock
+
+from common import VERSION_DIR, percentile
+from fakes import FakeCalendarService, ScriptedChatModel, tool_call
+
+from langchain_core.messages import HumanMessage
+
+import core.tools as calendar_tools
+from core import calendar_client, event_store, idempotency, read_cache, response_cache
+from core.agent import build_agent
+
+RESULTS_DIR = os.path.join(VERSION_DIR, "benchmarks", "results")
+PERCENTILES = (50, 95, 99)
+
+
+def build_scenarios(day: datetime.date) -> dict:
+    """Representative turns as (user prompt, scripted AI steps)."""
+    d = day.isoformat()
+    return {
+        "book": (
+            f"Book a design review on {d} from 3 to 4 PM.",
+            [
+                [tool_call("check_availability", start_time=f"{d}T15:00:00+05:30", end_time=f"{d}T16:00:00+05:30")],
+                [tool_call("create_event", summary="Design review", start_time=f"{d}T15:00:00+05:30",
+                           end_time=f"{d}T16:00:00+05:30")],
+                "Your design review is booked for 3 PM to 4 PM.",
+            ],
+        ),
+        "retry_create": (
+            f"Set up the town hall on {d} from 9 AM to 12 PM UTC.",
+            [
+                # The pattern from the shipped logs: a naive-time attempt, then the same event with "Z"
+                [tool_call("create_event", summary="TOwnHall meeting", start_time=f"{d}T09:00:00", end_time=f"{d}T12:00:00")],
+                [tool_call("create_event", summary="Townhall Meeting", start_time=f"{d}T09:00:00Z", end_time=f"{d}T12:00:00Z")],
+                "The town hall is on your calendar from 9 AM to 12 PM UTC.",
+            ],
+        ),
+        "reschedule": (
+            f"Move my standup on {d} to 11 AM.",
+            [
+                [tool_call("list_events", time_min=f"{d}T00:00:00+05:30", time_max=f"{d}T23:59:59+05:30")],
+                [tool_call("update_event", event_id="standup", start_time=f"{d}T11:00:00+05:30",
+                           end_time=f"{d}T11:15:00+05:30")],
+                "Done, your standup now starts at 11 AM.",
+            ],
+        ),
+        "reschedule_by_description": (
+            f"Move my standup on {d} to 11 AM.",
+            [
+                [tool_call("reschedule_by_description", description="standup", new_start_time=f"{d}T11:00:00+05:30",
+                           date_hint=d)],
+                "Done, your standup now starts at 11 AM.",
+            ],
+        ),
+        "find_slots": (
+            f"When am I free on {d}?",
+            [
+                [tool_call("find_available_slots", date_str=d)],
+                "You are free from 9 to 10 AM, 12 to 2 PM and after 5 PM.",
+            ],
+        ),
+        "review_day": (
+            f"What's on my calendar on {d} during work hours, and where are the gaps?",
+            [
+                [tool_call("list_events", time_min=f"{d}T09:00:00+05:30", time_max=f"{d}T18:00:00+05:30")],
+                [tool_call("find_available_slots", date_str=d)],
+                [tool_call("check_availability", start_time=f"{d}T09:00:00+05:30", end_time=f"{d}T18:00:00+05:30")],
+                "You have three meetings; you are free 9-10 AM, 12-1 PM, 2-4 PM and after 5 PM.",
+            ],
+        ),
+        "daily_briefing": (
+            f"Please give me a smart summary of my day for {d}.",
+            [
+                [tool_call("list_events", time_min=f"{d}T00:00:00+05:30", time_max=f"{d}T23:59:59+05:30"),
+                 tool_call("get_daily_schedule", date_str=d)],
+                "You have a standup at 10, lunch at 1 and a planning session at 4.",
+            ],
+        ),
+    }
+
+
+def seed_calendar(service: FakeCalendarService, day: datetime.date):
+    d = day.isoformat()
+    service.add_event("Standup", f"{d}T10:00:00+05:30", f"{d}T10:15:00+05:30", id="standup")
+    service.add_event("Lunch", f"{d}T13:00:00+05:30", f"{d}T14:00:00+05:30")
+    service.add_event("Planning", f"{d}T16:00:00+05:30", f"{d}T17:00:00+05:30")
+
+
+@contextlib.contextmanager
+def offline_backend(service: FakeCalendarService, executor: calendar_client.CalendarRequestExecutor = None):
+    """
+    Route every Calendar call to `service` and keep action logs out of the repo.
+    The client-side rate limiter is off unless `executor` is given, so the fake's latency is what gets measured.
+    Each backend starts with an empty event store, recent-writes table and response cache.
+    """
+    executor = executor or calendar_client.CalendarRequestExecutor(rate=0)
+    with tempfile.TemporaryDirectory() as log_dir, \
+            mock.patch.object(idempotency, "recent_writes", idempotency.RecentWrites()), \
+            mock.patch.object(response_cache, "cache", response_cache.ResponseCache()), \
+            mock.patch.object(calendar_tools, "get_calendar_service", lambda: service), \
+            mock.patch.object(calendar_tools, "LOG_DIR", log_dir), \
+            mock.patch.object(calendar_client, "_default_executor", executor), \
+            mock.patch.object(event_store, "_stores", {}):
+        yield
+
+
+def run_turn(executor, prompt: str) -> dict:
+    """Stream one turn through the graph and time each node update."""
+    timings = {"chatbot": [], "tools": []}
+    start = last = time.perf_counter()
+    with read_cache.read_scope() as reads:
+        for update in executor.stream({"messages": [HumanMessage(content=prompt)]}, stream_mode="updates"):
+            now = time.perf_counter()
+            for node in update:
+                timings.setdefault(node, []).append(now - last)
+            last = now
+    timings["turn"] = [time.perf_counter() - start]
+    timings["reads_deduplicated"] = reads.saved
+    return timings
+
+
+def summarize(samples: dict) -> dict:
+    return {
+        stage: {f"p{p}": percentile(values, p) for p in PERCENTILES} | {"count": len(values)}
+        for stage, values in samples.items() if values
+    }
+
+
+def run_benchmark(iterations: int, llm_latency: float, api_latency: float) -> dict:
+    day = datetime.date.today() + datetime.timedelta(days=1)
+    results = {}
+    for name, (prompt, script) in build_scenarios(day).items():
+        service = FakeCalendarService(latency=api_latency)
+        seed_calendar(service, day)
+        executor = build_agent(llm=ScriptedChatModel(script=script, latency=llm_latency))
+        samples = {}
+        deduplicated = 0
+        with offline_backend(service):
+            for _ in range(iterations):
+                timings = run_turn(executor, prompt)
+                deduplicated += timings.pop("reads_deduplicated")
+                for stage, values in timings.items():
+                    samples.setdefault(stage, []).extend(values)
+        results[name] = summarize(samples)
+        results[name]["api_calls"] = service.calls
+        results[name]["reads_deduplicated"] = deduplicated
+        results[name]["events_in_calendar"] = len(service.live_events())
+    return results
+
+
+def print_report(results: dict, baseline: dict = None):
+    print(f"{'scenario':<28}{'stage':<10}" + "".join(f"{'p' + str(p) + ' (ms)':>12}" for p in PERCENTILES)
+          + ("   Δp50 vs baseline" if baseline else ""))
+    for scenario, stages in results["scenarios"].items():
+        for stage in ("chatbot", "tools", "turn"):
+            if stage not in stages:
+                continue
+            row = stages[stage]
+            line = f"{scenario:<28}{stage:<10}" + "".join(f"{row[f'p{p}'] * 1000:>12.1f}" for p in PERCENTILES)
+            before = (baseline or {}).get("scenarios", {}).get(scenario, {}).get(stage)
+            if before and before["p50"]:
+                line += f"   {(row['p50'] - before['p50']) / before['p50'] * 100:+.1f}%"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per scripted LLM call")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="seconds per fake Calendar call")
+    parser.add_argument("--output", help="JSON results path (default: benchmarks/results/e2e-<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    args = parser.parse_args()
+
+    results = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "config": {"iterations": args.iterations, "llm_latency": args.llm_latency, "api_latency": args.api_latency},
+        "scenarios": run_benchmark(args.iterations, args.llm_latency, args.api_latency),
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)
+    print_report(results, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"e2e-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as fp:
+        json.dump(results, fp, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,460 @@
+"""
+Local stand-ins for the external services the agent talks to.
+
+FakeCalendarService mimics the slice of the googleapiclient Calendar v3 resource used by
+core/tools.py (chained `service.events().list(...).execute()` calls) against an in-memory
+store with configurable per-call latency. Recurring events are stored once and expanded
+into instances for singleEvents listings, as the real API does. ScriptedChatModel is a
+LangChain chat model that replays predetermined tool calls, so the real LangGraph can be
+driven without an LLM.
+FakeChatServer is a local OpenAI-compatible chat completions endpoint with configurable
+latency, stalls and failures, for exercising real HTTP model clients such as the router's.
+"""
+import json
+import time
+import random
+import uuid
+import datetime
+import itertools
+import threading
+from urllib.parse import urlencode
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+import httplib2
+from googleapiclient.errors import HttpError
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+import common  # noqa: F401  (puts Version_2 on sys.path)
+from core import recurrence
+
+
+def _parse(value: str) -> datetime.datetime:
+    """Parse an RFC 3339 dateTime or an all-day date into an aware datetime."""
+    if "T" not in value:
+        return datetime.datetime.fromisoformat(value).replace(tzinfo=datetime.timezone.utc)
+    parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=datetime.timezone.utc)
+
+
+def _event_bounds(event: Dict):
+    start = event["start"].get("dateTime") or event["start"].get("date")
+    end = event["end"].get("dateTime") or event["end"].get("date")
+    return _parse(start), _parse(end)
+
+
+# Fields that describe the series rather than one occurrence
+SERIES_FIELDS = ("recurrence",)
+
+
+def _when(moment: datetime.datetime, template: Dict, all_day: bool) -> Dict:
+    if all_day:
+        return {"date": moment.date().isoformat()}
+    value = {"dateTime": moment.isoformat()}
+    if template.get("timeZone"):
+        value["timeZone"] = template["timeZone"]
+    return value
+
+
+def instance_id(series_id: str, original: datetime.datetime, all_day: bool) -> str:
+    """Instance ID the Calendar API uses: the series ID plus the original start (UTC, or the date)."""
+    stamp = original.strftime("%Y%m%d") if all_day else \
+        original.astimezone(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return f"{series_id}_{stamp}"
+
+
+def expand(master: Dict, time_min: str, time_max: str) -> List[Dict]:
+    """Instances of a recurring event in a window, shaped like an events.list(singleEvents=True) listing."""
+    all_day = recurrence.is_all_day(master)
+    length = recurrence.duration(master)
+    instances = []
+    for start in recurrence.occurrences(master, time_min, time_max):
+        instance = {k: v for k, v in master.items() if k not in SERIES_FIELDS}
+        instance.update(id=instance_id(master["id"], start, all_day), recurringEventId=master["id"],
+                        start=_when(start, master["start"], all_day), end=_when(start + length, master["end"], all_day),
+                        originalStartTime=_when(start, master["start"], all_day))
+        instances.append(instance)
+    return instances
+
+
+def http_error(status: int, reason: str = "", message: str = "") -> HttpError:
+    """Build a googleapiclient HttpError like the ones the real client raises."""
+    body = {"error": {"code": status, "message": message or reason,
+                      "errors": [{"reason": reason, "message": message or reason}]}}
+    return HttpError(httplib2.Response({"status": status}), json.dumps(body).encode())
+
+
+HTTP_METHODS = {"list": "GET", "get": "GET", "instances": "GET", "insert": "POST", "import": "POST",
+                "update": "PUT", "patch": "PATCH", "delete": "DELETE"}
+
+
+class FakeRequest:
+    """
+    Deferred call returned by every resource method; runs on `execute()`.
+    Like googleapiclient's HttpRequest it exposes `method` and a `uri` built from the call's parameters.
+    """
+
+    def __init__(self, backend: "FakeCalendarService", operation: str, handler: Callable[[], Any], params: Dict = None):
+        self.backend = backend
+        self.operation = operation
+        self.handler = handler
+        self.method = HTTP_METHODS[operation.rsplit(".", 1)[1]]
+        # The body travels in the request payload, not the URI
+        query = sorted((k, json.dumps(v, sort_keys=True)) for k, v in (params or {}).items()
+                       if v is not None and k != "body")
+        self.uri = f"fake://calendar/v3/{operation}?{urlencode(query)}"
+
+    def execute(self, num_retries: int = 0):
+        return self.backend._execute(self)
+
+
+class _Events:
+    def __init__(self, backend: "FakeCalendarService"):
+        self.backend = backend
+
+    def list(self, calendarId: str, timeMin: Optional[str] = None, timeMax: Optional[str] = None,
+             singleEvents: bool = False, orderBy: Optional[str] = None, pageToken: Optional[str] = None,
+             maxResults: int = 250, **_):
+        def handler():
+            lo = _parse(timeMin) if timeMin else None
+            hi = _parse(timeMax) if timeMax else None
+            calendar = self.backend._calendar(calendarId)
+            matched = []
+            for event in calendar.values():
+                # Deleted events stay behind as cancelled; only cancelled occurrences are listed
+                if event.get("status") == "cancelled" and not event.get("recurringEventId"):
+                    continue
+                if event.get("recurrence"):
+                    if singleEvents:
+                        # Occurrences that were modified or cancelled are stored as their own events
+                        matched.extend(i for i in self.backend._occurrences(event, lo, hi) if i["id"] not in calendar)
+                    elif hi is None or _event_bounds(event)[0] < hi:
+                        matched.append(event)
+                    continue
+                if event.get("status") == "cancelled" and singleEvents:
+                    continue
+                start, end = _event_bounds(event)
+                if (hi is None or start < hi) and (lo is None or end > lo):
+                    matched.append(event)
+            matched.sort(key=lambda e: _event_bounds(e)[0])
+            offset = int(pageToken or 0)
+            page = matched[offset:offset + maxResults]
+            result = {"kind": "calendar#events", "items": [dict(e) for e in page]}
+            if offset + maxResults < len(matched):
+                result["nextPageToken"] = str(offset + maxResults)
+            return result
+        return FakeRequest(self.backend, "events.list", handler, dict(
+            calendarId=calendarId, timeMin=timeMin, timeMax=timeMax, singleEvents=singleEvents,
+            orderBy=orderBy, pageToken=pageToken, maxResults=maxResults))
+
+    def get(self, calendarId: str, eventId: str, **_):
+        def handler():
+            event = self.backend._event(calendarId, eventId)
+            if event is None:
+                raise http_error(404, "notFound", "Not Found")
+            return dict(event)
+        return FakeRequest(self.backend, "events.get", handler, dict(calendarId=calendarId, eventId=eventId))
+
+    def insert(self, calendarId: str, body: Dict, **_):
+        def handler():
+            event = dict(body)
+            event.setdefault("id", uuid.uuid4().hex)
+            if event["id"] in self.backend._calendar(calendarId):
+                raise http_error(409, "duplicate", "The requested identifier already exists.")
+            event["etag"] = f'"{next(self.backend._etags)}"'
+            event["status"] = "confirmed"
+            self.backend._calendar(calendarId)[event["id"]] = event
+            return dict(event)
+        return FakeRequest(self.backend, "events.insert", handler, dict(calendarId=calendarId, body=body))
+
+    def import_(self, calendarId: str, body: Dict, **_):
+        def handler():
+            # Like the real API, importing an iCalUID that is already there updates that event
+            key = (calendarId, body["iCalUID"], json.dumps(body.get("originalStartTime"), sort_keys=True))
+            event_id = self.backend._imported.get(key) or uuid.uuid4().hex
+            self.backend._imported[key] = event_id
+            event = dict(body, id=event_id, etag=f'"{next(self.backend._etags)}"')
+            event.setdefault("status", "confirmed")
+            self.backend._calendar(calendarId)[event_id] = event
+            return dict(event)
+        return FakeRequest(self.backend, "events.import", handler, dict(calendarId=calendarId, body=body))
+
+    def update(self, calendarId: str, eventId: str, body: Dict, **_):
+        def handler():
+            current = self.backend._event(calendarId, eventId)
+            if current is None:
+                raise http_error(404, "notFound", "Not Found")
+            event = dict(body, id=eventId, etag=f'"{next(self.backend._etags)}"')
+            if current.get("recurringEventId"):
+                # Editing one occurrence turns it into an exception of its series
+                event.update(recurringEventId=current["recurringEventId"], originalStartTime=current["originalStartTime"])
+                event.pop("recurrence", None)
+            self.backend._calendar(calendarId)[eventId] = event
+            return dict(event)
+        return FakeRequest(self.backend, "events.update", handler, dict(calendarId=calendarId, eventId=eventId, body=body))
+
+    def delete(self, calendarId: str, eventId: str, **_):
+        def handler():
+            events = self.backend._calendar(calendarId)
+            current = self.backend._event(calendarId, eventId)
+            if current is None or current.get("status") == "cancelled":
+                raise http_error(410, "deleted", "Resource has been deleted")
+            if current.get("recurringEventId"):
+                # A deleted occurrence stays behind as a cancelled exception
+                events[eventId] = dict(current, status="cancelled")
+                return ""
+            # Like the real API, the ID stays taken by the cancelled event
+            events[eventId] = dict(current, status="cancelled")
+            for key in [k for k, e in events.items() if e.get("recurringEventId") == eventId]:
+                del events[key]
+            return ""
+        return FakeRequest(self.backend, "events.delete", handler, dict(calendarId=calendarId, eventId=eventId))
+
+
+class FakeBatchRequest:
+    """Stand-in for BatchHttpRequest: one round-trip, per-request callbacks and faults."""
+
+    def __init__(self, backend: "FakeCalendarService", callback: Optional[Callable] = None):
+        self.backend = backend
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request: FakeRequest, callback: Optional[Callable] = None, request_id: Optional[str] = None):
+        self.requests.append((request_id or str(len(self.requests)), request, callback or self.callback))
+
+    def execute(self):
+        return self.backend._execute_batch(self)
+
+
+class _CalendarList:
+    def __init__(self, backend: "FakeCalendarService"):
+        self.backend = backend
+
+    def list(self, **_):
+        def handler():
+            return {"items": [{"id": cid, "summary": cid, "accessRole": "owner"} for cid in self.backend.calendars]}
+        return FakeRequest(self.backend, "calendarList.list", handler)
+
+
+class FakeCalendarService:
+    """
+    In-memory Calendar v3 backend.
+    Args:
+        latency: Seconds slept on every `execute()` to model network round-trips
+        fault_rate: Probability that a call fails with one of `faults` instead of running
+        faults: (status, reason) pairs to inject, e.g. (403, "rateLimitExceeded")
+        seed: Seed for fault injection, for reproducible runs
+    """
+
+    DEFAULT_FAULTS = ((403, "rateLimitExceeded"), (429, "rateLimitExceeded"), (503, "backendError"))
+
+    def __init__(self, latency: float = 0.0, fault_rate: float = 0.0, faults=DEFAULT_FAULTS, seed: int = 0):
+        self.latency = latency
+        self.fault_rate = fault_rate
+        self.faults = faults
+        self.faults_injected = 0
+        self._rng = random.Random(seed)
+        self.calendars: Dict[str, Dict[str, Dict]] = {"primary": {}}
+        self._imported: Dict[tuple, str] = {}
+        self.calls: Dict[str, int] = {}
+        self._etags = itertools.count(1)
+        self._lock = threading.Lock()
+
+    # googleapiclient resource accessors
+    def events(self):
+        return _Events(self)
+
+    def calendarList(self):
+        return _CalendarList(self)
+
+    def new_batch_http_request(self, callback: Optional[Callable] = None):
+        return FakeBatchRequest(self, callback)
+
+    def _calendar(self, calendar_id: str) -> Dict[str, Dict]:
+        return self.calendars.setdefault(calendar_id, {})
+
+    def _occurrences(self, master: Dict, lo: Optional[datetime.datetime], hi: Optional[datetime.datetime]) -> List[Dict]:
+        lo = lo or _event_bounds(master)[0]
+        hi = hi or lo + datetime.timedelta(days=3650)
+        return expand(master, lo.isoformat(), hi.isoformat())
+
+    def _event(self, calendar_id: str, event_id: str) -> Optional[Dict]:
+        """A stored event, or an occurrence of a recurring event derived from its instance ID."""
+        calendar = self._calendar(calendar_id)
+        if event_id in calendar:
+            return calendar[event_id]
+        series_id, _, stamp = event_id.rpartition("_")
+        master = calendar.get(series_id)
+        if not master or not master.get("recurrence") or master.get("status") == "cancelled":
+            return None
+        fmt = "%Y%m%dT%H%M%SZ" if "T" in stamp else "%Y%m%d"
+        try:
+            at = datetime.datetime.strptime(stamp, fmt).replace(tzinfo=datetime.timezone.utc)
+        except ValueError:
+            return None
+        around = self._occurrences(master, at - datetime.timedelta(days=1), at + datetime.timedelta(days=2))
+        return next((i for i in around if i["id"] == event_id), None)
+
+    def _execute(self, request: FakeRequest):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls[request.operation] = self.calls.get(request.operation, 0) + 1
+            if self.fault_rate and self._rng.random() < self.fault_rate:
+                self.faults_injected += 1
+                status, reason = self._rng.choice(self.faults)
+                raise http_error(status, reason, f"Injected fault: {reason}")
+            return request.handler()
+
+    def _execute_batch(self, batch: FakeBatchRequest):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls["batch"] = self.calls.get("batch", 0) + 1
+        for request_id, request, callback in batch.requests:
+            with self._lock:
+                self.calls[request.operation] = self.calls.get(request.operation, 0) + 1
+                response, exception = None, None
+                try:
+                    if self.fault_rate and self._rng.random() < self.fault_rate:
+                        self.faults_injected += 1
+                        status, reason = self._rng.choice(self.faults)
+                        raise http_error(status, reason, f"Injected fault: {reason}")
+                    response = request.handler()
+                except HttpError as e:
+                    exception = e
+            if callback:
+                callback(request_id, response, exception)
+
+    def live_events(self, calendar_id: str = "primary") -> List[Dict]:
+        """Stored events of a calendar that have not been deleted."""
+        return [e for e in self._calendar(calendar_id).values() if e.get("status") != "cancelled"]
+
+    def add_event(self, summary: str, start: str, end: str, calendar_id: str = "primary", **extra) -> Dict:
+        """Seed an event directly, bypassing latency and call counting."""
+        event = {"id": uuid.uuid4().hex, "summary": summary, "etag": f'"{next(self._etags)}"',
+                 "status": "confirmed", "start": {"dateTime": start}, "end": {"dateTime": end}}
+        event.update(extra)
+        self._calendar(calendar_id)[event["id"]] = event
+        return event
+
+
+def tool_call(name: str, **args) -> Dict:
+    """Shorthand for one tool call in a scripted AI turn."""
+    return {"name": name, "args": args, "id": f"call_{uuid.uuid4().hex[:12]}", "type": "tool_call"}
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model that replays a fixed script of AI turns.
+
+    Each script step is either a list of tool calls or the final reply text. The step is
+    chosen from the number of AI messages since the last human message, so one instance
+    can serve concurrent conversations.
+    """
+
+    script: List[Any]
+    latency: float = 0.0
+    usage: Dict[str, int] = {"input_tokens": 900, "output_tokens": 60}
+    tools_bound: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(update={"tools_bound": True})
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        turns = 0
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            if isinstance(message, AIMessage):
+                turns += 1
+        step = self.script[min(turns, len(self.script) - 1)]
+        if not self.tools_bound and not isinstance(step, str):
+            # Called without tools (e.g. a budget-limited final answer): reply with the script's last text
+            step = next((s for s in reversed(self.script) if isinstance(s, str)), "")
+        usage = dict(self.usage, total_tokens=sum(self.usage.values()))
+        if isinstance(step, str):
+            message = AIMessage(content=step, usage_metadata=usage)
+        else:
+            message = AIMessage(content="", tool_calls=[dict(c, id=f"call_{uuid.uuid4().hex[:12]}") for c in step],
+                                usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class FakeChatServer:
+    """
+    OpenAI-compatible `/v1/chat/completions` endpoint on localhost.
+    Args:
+        name: Model name reported in responses
+        latency: Seconds per completion
+        stall_rate: Fraction of requests that take `stall` seconds instead
+        stall: Seconds a stalled request takes
+        error_rate: Fraction of requests answered with HTTP 503
+        seed: Random seed for stalls and errors
+    """
+
+    def __init__(self, name: str, latency: float = 0.0, stall_rate: float = 0.0, stall: float = 5.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        self.name = name
+        self.latency = latency
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with server.lock:
+                    server.requests += 1
+                    fail = server.random.random() < server.error_rate
+                    stalled = server.random.random() < server.stall_rate
+                time.sleep(server.stall if stalled else server.latency)
+                if fail:
+                    self._reply(503, {"error": {"message": "model overloaded", "type": "server_error"}})
+                    return
+                self._reply(200, {
+                    "id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion", "created": int(time.time()),
+                    "model": server.name,
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": f"Answer from {server.name}."}}],
+                    "usage": {"prompt_tokens": 900, "completion_tokens": 20, "total_tokens": 920},
+                })
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass   # the client gave up (e.g. a hedged request that lost)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,165 @@
+"""
+Connection pooling benchmark against local TLS stand-in servers.
+
+Starts three HTTPS servers (LLM, Whisper, TTS) with a self-signed certificate. Each new
+connection costs `--handshake` seconds on the server side, standing in for the TCP + TLS
+round-trips to a remote host. A turn makes 1 STT, 2 LLM and 1 TTS request. Compared:
+
+1. A new connection per request: what gTTS does, and what httpx's default clients amount
+   to once turns are more than 5 s apart (their keep-alive expiry).
+2. The shared pools from core/http_pool.py.
+3. The shared pools, pre-connected at startup.
+
+    python benchmarks/http_pool_bench.py --turns 20 --handshake 0.15 --server-time 0.02
+"""
+import os
+import ssl
+import json
+import time
+import ipaddress
+import argparse
+import datetime
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common import percentile
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from core import http_pool
+
+SERVICES = ("hf", "llm", "tts")
+TURN = ("hf", "llm", "llm", "tts")
+
+
+def self_signed(directory: str) -> tuple:
+    """(cert path, key path) for 127.0.0.1."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1)).not_valid_after(now + datetime.timedelta(days=1))
+            .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]),
+                           critical=False)
+            .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+            .sign(key, hashes.SHA256()))
+    cert_path, key_path = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as fp:
+        fp.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as fp:
+        fp.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                   serialization.NoEncryption()))
+    return cert_path, key_path
+
+
+class StandInServer(ThreadingHTTPServer):
+    """HTTPS keep-alive server; every new connection pays `handshake` seconds first."""
+    daemon_threads = True
+
+    def __init__(self, context: ssl.SSLContext, handshake: float, server_time: float):
+        self.handshake = handshake
+        self.server_time = server_time
+        self.connections = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _answer(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                time.sleep(server.server_time)
+                body = json.dumps({"text": "ok"}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            do_GET = do_POST = do_HEAD = _answer
+
+            def log_message(self, format, *args):
+                pass
+
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.socket = context.wrap_socket(self.socket, server_side=True, do_handshake_on_connect=False)
+
+    def finish_request(self, request, client_address):
+        self.connections += 1
+        time.sleep(self.handshake)
+        try:
+            request.do_handshake()
+        except (ssl.SSLError, OSError):
+            return
+        super().finish_request(request, client_address)
+
+    @property
+    def url(self) -> str:
+        return f"https://127.0.0.1:{self.server_address[1]}/"
+
+
+def run_turns(servers: dict, turns: int, think: float, pooled: bool, warm: bool, cafile: str) -> dict:
+    http_pool.close()
+    http_pool._stats.clear()
+    clients = {}
+    if pooled:
+        for name in SERVICES:
+            clients[name] = http_pool._clients[name] = http_pool.build_client(name, verify=cafile)
+        if warm:
+            http_pool.preconnect({name: [servers[name].url] for name in SERVICES}, wait=True)
+    before = {name: s.connections for name, s in servers.items()}
+    first_byte = []
+    for _ in range(turns):
+        total = 0.0
+        for name in TURN:
+            client = clients[name] if pooled else http_pool.build_client(name, verify=cafile)
+            t0 = time.perf_counter()
+            with client.stream("POST", servers[name].url, content=b'{"inputs": "..."}') as response:
+                total += time.perf_counter() - t0   # headers received
+                response.read()
+            if not pooled:
+                client.close()
+        first_byte.append(total)
+        time.sleep(think)
+    requests = turns * len(TURN)
+    connections = sum(s.connections - before[name] for name, s in servers.items())
+    http_pool.close()
+    return {"first": first_byte[0], "p50": percentile(first_byte, 50), "p95": percentile(first_byte, 95),
+            "connections": connections, "reuse_rate": 1 - connections / requests}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--handshake", type=float, default=0.15, help="seconds a new connection costs")
+    parser.add_argument("--server-time", type=float, default=0.02, help="seconds to first byte on a warm connection")
+    parser.add_argument("--think", type=float, default=0.1, help="seconds between turns")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = self_signed(tmp)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        servers = {name: StandInServer(context, args.handshake, args.server_time) for name in SERVICES}
+        for server in servers.values():
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        print(f"{args.turns} turns of {len(TURN)} requests; new connection {args.handshake * 1000:g} ms, "
+              f"warm request {args.server_time * 1000:g} ms")
+        print(f"  {'':<26}{'first byte per turn: 1st turn':>30}{'p50':>9}{'p95':>9}{'connections':>13}{'reuse':>8}")
+        for label, pooled, warm in (("connection per request", False, False), ("shared pools", True, False),
+                                    ("shared pools + preconnect", True, True)):
+            r = run_turns(servers, args.turns, args.think, pooled, warm, cert)
+            print(f"  {label:<26}{r['first'] * 1000:>27.0f} ms{r['p50'] * 1000:>6.0f} ms{r['p95'] * 1000:>6.0f} ms"
+                  f"{r['connections']:>13}{r['reuse_rate']:>8.0%}")
+        for server in servers.values():
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Streaming ICS import/export benchmark.
+
+Generates an iCalendar file with N events (timed, TZID, all-day, recurring, folded text,
+alarms and a share of repeated UIDs), imports it into a FakeCalendarService in batches,
+imports it again to check idempotency, and exports it back, reporting time, API
+round-trips and peak Python memory (tracemalloc) of parsing and exporting.
+
+    python benchmarks/ics_bench.py --events 50000 --api-latency 0.02
+"""
+import os
+import time
+import random
+import argparse
+import datetime
+import tempfile
+import tracemalloc
+
+from fakes import FakeCalendarService
+from e2e_bench import offline_backend
+
+from core import ics
+
+
+def write_sample(path: str, count: int, duplicate_rate: float, rng: random.Random):
+    """Write the sample file line by line so generating it does not skew the memory numbers."""
+    base = datetime.datetime(2025, 1, 6, 9, 0)
+    with open(path, "w", newline="") as fp:
+        fp.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//bench//EN\r\n")
+        for i in range(count):
+            uid = rng.randrange(i) if i and rng.random() < duplicate_rate else i
+            start = base + datetime.timedelta(hours=rng.randrange(24 * 365))
+            lines = ["BEGIN:VEVENT", f"UID:event-{uid}@bench", "DTSTAMP:20250101T000000Z"]
+            kind = uid % 10
+            if kind == 0:
+                lines += [f"DTSTART;VALUE=DATE:{start:%Y%m%d}", f"DTEND;VALUE=DATE:{start + datetime.timedelta(days=2):%Y%m%d}"]
+            elif kind == 1:
+                lines += [f"DTSTART;TZID=America/New_York:{start:%Y%m%dT%H%M%S}", "DURATION:PT45M",
+                          "RRULE:FREQ=WEEKLY;COUNT=10"]
+            else:
+                lines += [f"DTSTART:{start:%Y%m%dT%H%M%SZ}", f"DTEND:{start + datetime.timedelta(minutes=30):%Y%m%dT%H%M%SZ}"]
+            lines += [f"SUMMARY:Meeting {uid}\\, room {uid % 7}",
+                      f"DESCRIPTION:{'Agenda item; ' * 12}\\nNotes for {uid}",
+                      "BEGIN:VALARM", "TRIGGER:-PT10M", "ACTION:DISPLAY", "END:VALARM", "END:VEVENT"]
+            fp.writelines(ics.fold(line) for line in lines)
+        fp.write("END:VCALENDAR\r\n")
+
+
+def measure(fn, trace_memory: bool = False):
+    """Run `fn` and return (result, seconds, peak traced bytes); tracing slows Python down, so it is opt-in."""
+    if trace_memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+    if trace_memory:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--duplicate-rate", type=float, default=0.02)
+    parser.add_argument("--batch-size", type=int, default=ics.BATCH_SIZE)
+    parser.add_argument("--api-latency", type=float, default=0.0, help="seconds per fake Calendar round-trip")
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        source, target = os.path.join(tmp, "source.ics"), os.path.join(tmp, "export.ics")
+        write_sample(source, args.events, args.duplicate_rate, rng)
+        print(f"Sample file: {args.events} VEVENTs, {os.path.getsize(source) / 1e6:.1f} MB")
+
+        def parse_only():
+            with open(source) as fp:
+                return sum(1 for vevent in ics.iter_vevents(fp) if ics.vevent_to_event(vevent))
+
+        parsed, elapsed, _ = measure(parse_only)
+        _, _, peak = measure(parse_only, trace_memory=True)
+        print(f"  {'parse+map':<10} {elapsed:6.2f} s  peak={peak / 1e6:5.2f} MB  events={parsed}")
+
+        service = FakeCalendarService(latency=args.api_latency)
+        with offline_backend(service):
+            def run_import():
+                with open(source) as fp:
+                    return ics.import_events(service, fp, batch_size=args.batch_size)
+
+            for label in ("import", "re-import"):
+                before = dict(service.calls)
+                stats, elapsed, _ = measure(run_import)
+                round_trips = service.calls.get("batch", 0) - before.get("batch", 0)
+                print(f"  {label:<10} {elapsed:6.2f} s  imported={stats['imported']} "
+                      f"duplicates={stats['duplicates']} failed={stats['failed']} round-trips={round_trips} "
+                      f"(vs {stats['parsed']} single inserts)  calendar size={len(service.calendars['primary'])}")
+
+            def run_export():
+                with open(target, "w", newline="") as fp:
+                    return ics.export_events(service, fp)
+
+            count, elapsed, _ = measure(run_export)
+            _, _, peak = measure(run_export, trace_memory=True)
+            pages = service.calls.get("events.list", 0) // 2
+            print(f"  {'export':<10} {elapsed:6.2f} s  peak={peak / 1e6:5.2f} MB  events={count} pages={pages} "
+                  f"file={os.path.getsize(target) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Load test for the backend service (service/server.py) against local stand-ins.
+
+Starts the service in-process with a ScriptedChatModel and a FakeCalendarService, then
+drives it with concurrent HTTP clients at several worker-pool sizes and reports turns/s.
+With I/O-bound stand-ins, throughput should grow roughly linearly until workers match
+the client concurrency.
+
+    python benchmarks/load_test.py --workers 1 2 4 8 --clients 16 --turns 4 --llm-latency 0.2
+"""
+import time
+import socket
+import argparse
+import datetime
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import uvicorn
+from cryptography.fernet import Fernet
+
+from fakes import FakeCalendarService, ScriptedChatModel
+from e2e_bench import build_scenarios, offline_backend, seed_calendar
+
+from core.agent import build_agent
+from service.server import create_app
+from service.store import SessionStore
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app) -> tuple:
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+ADMIN_TOKEN = "load-test-admin"
+
+
+def client_session(base_url: str, user: str, prompt: str, turns: int) -> list:
+    latencies = []
+    registered = httpx.post(f"{base_url}/v1/users", json={"user_id": user},
+                            headers={"Authorization": f"Bearer {ADMIN_TOKEN}"})
+    registered.raise_for_status()
+    headers = {"Authorization": f"Bearer {registered.json()['token']}"}
+    with httpx.Client(base_url=base_url, headers=headers, timeout=300) as http:
+        http.put("/v1/users/me/credentials", json={
+            "client_id": "load-test", "client_secret": "load-test", "refresh_token": "load-test",
+        }).raise_for_status()
+        session_id = http.post("/v1/sessions", json={}).json()["session_id"]
+        for _ in range(turns):
+            t0 = time.perf_counter()
+            http.post(f"/v1/sessions/{session_id}/messages", json={"text": prompt}).raise_for_status()
+            latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def run_load(workers: int, clients: int, turns: int, llm_latency: float, api_latency: float) -> dict:
+    day = datetime.date.today() + datetime.timedelta(days=1)
+    prompt, script = build_scenarios(day)["find_slots"]
+    service = FakeCalendarService(latency=api_latency)
+    seed_calendar(service, day)
+    executor = build_agent(llm=ScriptedChatModel(script=script, latency=llm_latency))
+
+    with tempfile.TemporaryDirectory() as tmp, offline_backend(service):
+        store = SessionStore(f"{tmp}/sessions.db", secret_key=Fernet.generate_key())
+        app = create_app(store=store, executor=executor, workers=workers, admin_token=ADMIN_TOKEN)
+        server, thread, base_url = start_server(app)
+        try:
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=clients) as pool:
+                results = list(pool.map(lambda i: client_session(base_url, f"user{i}", prompt, turns), range(clients)))
+            elapsed = time.perf_counter() - t0
+        finally:
+            server.should_exit = True
+            thread.join()
+
+    latencies = sorted(l for r in results for l in r)
+    return {
+        "workers": workers,
+        "turns": len(latencies),
+        "elapsed_s": elapsed,
+        "throughput": len(latencies) / elapsed,
+        "p50_s": latencies[len(latencies) // 2],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--turns", type=int, default=4, help="turns per client session")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--api-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8}{'turns':>8}{'turns/s':>10}{'p50 (s)':>10}{'speedup':>10}")
+    base = None
+    for workers in args.workers:
+        r = run_load(workers, args.clients, args.turns, args.llm_latency, args.api_latency)
+        base = base or r["throughput"]
+        print(f"{r['workers']:>8}{r['turns']:>8}{r['throughput']:>10.2f}{r['p50_s']:>10.3f}{r['throughput'] / base:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Multi-calendar fan-out benchmark.
+
+Seeds a FakeCalendarService with N calendars and times `list_events(calendar_ids=["all"])`
+with calendars fetched one after another versus concurrently. It also times the k-way heap
+merge of the per-calendar results against concatenating and re-sorting them.
+
+    python benchmarks/multi_calendar_bench.py --calendars 10 --events 200 --api-latency 0.05
+"""
+import time
+import heapq
+import random
+import argparse
+import datetime
+from unittest import mock
+
+from common import percentile
+from fakes import FakeCalendarService
+from e2e_bench import offline_backend
+
+import core.tools as calendar_tools
+from core import event_store
+from core.tools import list_events
+
+
+def seed(service: FakeCalendarService, calendars: int, events: int, day: datetime.date, rng: random.Random):
+    for c in range(calendars):
+        calendar_id = f"team-{c}@group.calendar.google.com"
+        for _ in range(events):
+            start = datetime.datetime.combine(day, datetime.time(8), tzinfo=datetime.timezone.utc) \
+                + datetime.timedelta(minutes=rng.randrange(0, 12 * 60, 5))
+            end = start + datetime.timedelta(minutes=rng.choice((15, 30, 60)))
+            service.add_event(f"Event {c}", start.isoformat(), end.isoformat(), calendar_id=calendar_id)
+
+
+def time_listing(service: FakeCalendarService, day: datetime.date, workers: int, iterations: int) -> list:
+    samples = []
+    # The event store would answer every iteration after the first; measure the fetch itself
+    with offline_backend(service), mock.patch.object(calendar_tools, "FANOUT_WORKERS", workers), \
+            mock.patch.object(event_store, "EVENT_CACHE_TTL", 0):
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            events = list_events.invoke({"time_min": f"{day}T00:00:00Z", "time_max": f"{day}T23:59:59Z",
+                                         "calendar_ids": ["all"]})
+            samples.append(time.perf_counter() - t0)
+    starts = [calendar_tools._event_start(e) for e in events]
+    assert starts == sorted(starts), "merged events are out of order"
+    return samples
+
+
+def time_merge(service: FakeCalendarService, iterations: int) -> dict:
+    per_calendar = [sorted(events.values(), key=calendar_tools._event_start)
+                    for cid, events in service.calendars.items() if events]
+    timings = {"heap merge": [], "concat + sort": []}
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        list(heapq.merge(*per_calendar, key=calendar_tools._event_start))
+        timings["heap merge"].append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        sorted((e for events in per_calendar for e in events), key=calendar_tools._event_start)
+        timings["concat + sort"].append(time.perf_counter() - t0)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calendars", type=int, default=10)
+    parser.add_argument("--events", type=int, default=200, help="events per calendar on the day")
+    parser.add_argument("--api-latency", type=float, default=0.05, help="seconds per fake Calendar call")
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    day = datetime.date.today()
+    service = FakeCalendarService(latency=args.api_latency)
+    seed(service, args.calendars, args.events, day, random.Random(3))
+
+    print(f"list_events over {args.calendars} calendars x {args.events} events, {args.api_latency * 1000:g} ms per call")
+    for label, workers in (("sequential", 1), ("concurrent", calendar_tools.FANOUT_WORKERS)):
+        samples = time_listing(service, day, workers, args.iterations)
+        print(f"  {label:<14} p50={percentile(samples, 50) * 1000:8.1f} ms  p95={percentile(samples, 95) * 1000:8.1f} ms")
+
+    print(f"\nOrdering {args.calendars * args.events} events")
+    for label, samples in time_merge(service, args.iterations).items():
+        print(f"  {label:<14} p50={percentile(samples, 50) * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
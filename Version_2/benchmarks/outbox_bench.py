@@ -0,0 +1,168 @@
+"""
+Email outbox benchmark against a local aiosmtpd server.
+
+Every new SMTP session costs `--handshake` seconds (connect + EHLO + AUTH against a remote
+server take several round-trips); each message costs `--server-time`. Compared:
+
+1. The old tool: one SMTP session per email, sent inside the agent's turn.
+2. The outbox from core/outbox.py: the tool only enqueues, one background session drains it.
+3. The outbox in digest mode, notifications to the same recipient merged into one email.
+
+Then faults are injected: a transient 451 (retried and delivered) and a permanent 550
+(dead-lettered).
+
+    python benchmarks/outbox_bench.py --emails 50 --recipients 5 --handshake 0.3
+"""
+import os
+import time
+import socket
+import asyncio
+import smtplib
+import argparse
+import tempfile
+import logging
+from email.mime.text import MIMEText
+
+from common import percentile
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+from core import outbox
+
+# aiosmtpd logs a deprecation warning about its own Session.login_data on every AUTH
+logging.getLogger("mail.log").setLevel(logging.ERROR)
+
+
+class Handler:
+    """Counts sessions and delivered emails; replies with queued fault codes first."""
+
+    def __init__(self, handshake: float, server_time: float):
+        self.handshake = handshake
+        self.server_time = server_time
+        self.sessions = 0
+        self.delivered = []
+        self.faults = []   # (recipient substring, reply)
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        await asyncio.sleep(self.handshake)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.server_time)
+        for i, (match, reply) in enumerate(self.faults):
+            if any(match in rcpt for rcpt in envelope.rcpt_tos):
+                if reply.startswith("4"):
+                    del self.faults[i]     # transient: the next attempt goes through
+                return reply
+        self.delivered.append((envelope.rcpt_tos[0], envelope.content))
+        return "250 OK"
+
+
+def authenticate(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=True)
+
+
+def start_server(handler: Handler) -> Controller:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    controller = Controller(handler, hostname="127.0.0.1", port=port, authenticator=authenticate,
+                            auth_require_tls=False, server_kwargs={"ident": "bench"})
+    controller.start()
+    handler.sessions = 0   # Controller.start() opens a probe connection
+    return controller
+
+
+def messages(count: int, recipients: int) -> list:
+    return [(f"user{i % recipients}@example.com", f"Reminder {i}", f"Your meeting {i} starts in 10 minutes.")
+            for i in range(count)]
+
+
+def per_message(port: int, batch: list) -> list:
+    """The old tool: connect, log in and send for every email."""
+    latencies = []
+    for recipient, subject, body in batch:
+        t0 = time.perf_counter()
+        msg = MIMEText(body)
+        msg['From'], msg['To'], msg['Subject'] = "me@example.com", recipient, subject
+        with smtplib.SMTP("127.0.0.1", port) as server:
+            server.login("me@example.com", "secret")
+            server.send_message(msg)
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def make_outbox(port: int, path: str, **kwargs) -> outbox.Outbox:
+    transport = outbox.SMTPTransport("127.0.0.1", port, "me@example.com", "secret", starttls=False)
+    return outbox.Outbox(transport, "me@example.com", path=path, **kwargs)
+
+
+def through_outbox(box: outbox.Outbox, batch: list, timeout: float = 120) -> tuple:
+    """(enqueue latencies, seconds until everything left the queue)."""
+    latencies = []
+    t0 = time.perf_counter()
+    box.start()
+    for recipient, subject, body in batch:
+        t = time.perf_counter()
+        box.enqueue(recipient, subject, body)
+        latencies.append(time.perf_counter() - t)
+    while box.counts().get("pending", 0) + box.counts().get("sending", 0) and time.perf_counter() - t0 < timeout:
+        time.sleep(0.01)
+    drained = time.perf_counter() - t0
+    box.stop(5)
+    return latencies, drained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--emails", type=int, default=50)
+    parser.add_argument("--recipients", type=int, default=5)
+    parser.add_argument("--handshake", type=float, default=0.3, help="seconds a new SMTP session costs")
+    parser.add_argument("--server-time", type=float, default=0.01, help="seconds per message on an open session")
+    parser.add_argument("--digest-window", type=float, default=1.0)
+    args = parser.parse_args()
+
+    batch = messages(args.emails, args.recipients)
+    print(f"{args.emails} notifications to {args.recipients} recipients; new session "
+          f"{args.handshake * 1000:g} ms, message {args.server_time * 1000:g} ms")
+    print(f"  {'':<22}{'tool p50':>10}{'tool p95':>10}{'all sent':>10}{'sessions':>10}{'emails':>8}")
+
+    def report(label, latencies, drained, handler):
+        print(f"  {label:<22}{percentile(latencies, 50) * 1000:>7.1f} ms{percentile(latencies, 95) * 1000:>7.1f} ms"
+              f"{drained:>8.1f} s{handler.sessions:>10}{len(handler.delivered):>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        handler = Handler(args.handshake, args.server_time)
+        server = start_server(handler)
+        t0 = time.perf_counter()
+        latencies = per_message(server.port, batch)
+        report("session per email", latencies, time.perf_counter() - t0, handler)
+        server.stop()
+
+        for label, window in (("outbox", 0.0), (f"outbox, digest {args.digest_window:g} s", args.digest_window)):
+            handler = Handler(args.handshake, args.server_time)
+            server = start_server(handler)
+            box = make_outbox(server.port, os.path.join(tmp, f"{label}.db"), digest_window=window)
+            latencies, drained = through_outbox(box, batch)
+            report(label, latencies, drained, handler)
+            server.stop()
+
+        # Faults: one transient rejection, one permanent
+        handler = Handler(args.handshake, args.server_time)
+        handler.faults = [("retry@", "451 4.3.0 Try again later"), ("bounce@", "550 5.1.1 No such user")]
+        server = start_server(handler)
+        box = make_outbox(server.port, os.path.join(tmp, "faults.db"), retry_base=0.2)
+        through_outbox(box, [("retry@example.com", "Retried", "..."), ("bounce@example.com", "Bounced", "..."),
+                             ("ok@example.com", "Fine", "...")])
+        print(f"faults: {box.counts()}; delivered {sorted(r for r, _ in handler.delivered)}")
+        for letter in box.dead_letters():
+            print(f"  dead letter {letter['id']} to {letter['recipient']} after {letter['attempts']} attempt(s): "
+                  f"{letter['last_error']}")
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Plan-and-execute vs tool-loop benchmark.
+
+Runs the same requests through the regular agent graph (one LLM call per tool round) and the
+plan graph from core/planner.py (one planning call, local DAG execution, one call to phrase
+the answer), with ScriptedChatModel and FakeCalendarService. Reports LLM calls, tool calls
+and turn latency per scenario, and checks that both modes leave the calendar the same.
+
+    python benchmarks/plan_bench.py --iterations 5 --llm-latency 0.4 --api-latency 0.05
+"""
+import os
+import time
+import argparse
+import datetime
+from unittest import mock
+
+from common import percentile
+from fakes import FakeCalendarService, ScriptedChatModel, tool_call
+from e2e_bench import offline_backend, seed_calendar
+
+from langchain_core.messages import HumanMessage
+
+from core import metering, read_cache
+from core.agent import build_agent
+from core.planner import build_plan_agent
+
+
+def ref(path: str, add_minutes: int = 0) -> dict:
+    return {"$ref": path, "add_minutes": add_minutes} if add_minutes else {"$ref": path}
+
+
+def build_scenarios(day: datetime.date) -> dict:
+    """name -> (prompt, loop script, plan script)."""
+    d = day.isoformat()
+    flight_window = dict(time_min=f"{d}T05:00:00+05:30", time_max=f"{d}T09:00:00+05:30")
+    email = dict(recipient_email="me@example.com", subject="Your cab is booked")
+    trip_reply = "Your flight lands at 8 AM; a cab is booked from 8:30 to 9 and the details are in your inbox."
+    review = [tool_call("list_events", time_min=f"{d}T09:00:00+05:30", time_max=f"{d}T18:00:00+05:30"),
+              tool_call("find_available_slots", date_str=d),
+              tool_call("get_daily_schedule", date_str=d)]
+    review_reply = "You have three meetings; you are free 9-10 AM, 12-1 PM, 2-4 PM and after 5 PM."
+    return {
+        "flight_cab_email": (
+            f"Find my flight on {d}, then book a cab slot 30 minutes after it lands, then email me.",
+            [
+                [tool_call("list_events", **flight_window)],
+                [tool_call("check_availability", start_time=f"{d}T08:30:00+05:30", end_time=f"{d}T09:00:00+05:30")],
+                [tool_call("create_event", summary="Cab from airport", start_time=f"{d}T08:30:00+05:30",
+                           end_time=f"{d}T09:00:00+05:30")],
+                [tool_call("send_email_notification", body="Cab from airport at 8:30 AM.", **email)],
+                trip_reply,
+            ],
+            [
+                [tool_call("make_plan", steps=[
+                    {"id": "s1", "tool": "list_events", "args": flight_window},
+                    {"id": "s2", "tool": "check_availability",
+                     "args": {"start_time": ref("s1.0.end.dateTime", 30), "end_time": ref("s1.0.end.dateTime", 60)}},
+                    {"id": "s3", "tool": "create_event",
+                     "args": {"summary": "Cab from airport", "start_time": ref("s1.0.end.dateTime", 30),
+                              "end_time": ref("s1.0.end.dateTime", 60)}},
+                    {"id": "s4", "tool": "send_email_notification",
+                     "args": dict(email, body=ref("s3.start.dateTime"))},
+                ])],
+                trip_reply,
+            ],
+        ),
+        "review_day": (
+            f"What's on my calendar on {d} during work hours, and where are the gaps?",
+            [[call] for call in review] + [review_reply],
+            [[tool_call("make_plan", steps=[{"id": f"s{i}", "tool": c["name"], "args": c["args"]}
+                                            for i, c in enumerate(review, 1)])], review_reply],
+        ),
+        "find_slots": (
+            f"When am I free on {d}?",
+            [[tool_call("find_available_slots", date_str=d)], "You are free from 9 to 10 AM and after 5 PM."],
+            [[tool_call("make_plan", steps=[{"id": "s1", "tool": "find_available_slots", "args": {"date_str": d}}])],
+             "You are free from 9 to 10 AM and after 5 PM."],
+        ),
+        "small_talk": ("Thanks, that's all!", ["You're welcome!"], ["You're welcome!"]),
+    }
+
+
+def run_mode(build, script, prompt, day, iterations, llm_latency, api_latency) -> dict:
+    latencies, llm_calls, tool_calls, events = [], 0, 0, None
+    for _ in range(iterations):
+        service = FakeCalendarService(latency=api_latency)
+        seed_calendar(service, day)
+        d = day.isoformat()
+        service.add_event("Flight BLR-DEL", f"{d}T06:00:00+05:30", f"{d}T08:00:00+05:30")
+        executor = build(ScriptedChatModel(script=script, latency=llm_latency))
+        with offline_backend(service), metering.turn("bench") as usage, read_cache.read_scope():
+            t0 = time.perf_counter()
+            executor.invoke({"messages": [HumanMessage(content=prompt)]})
+            latencies.append(time.perf_counter() - t0)
+        llm_calls += usage.counts["llm_calls"]
+        tool_calls += sum(service.calls.values())
+        events = sorted((e["summary"], e["start"].get("dateTime")) for e in service.live_events())
+    return {"p50": percentile(latencies, 50), "llm_calls": llm_calls / iterations,
+            "api_calls": tool_calls / iterations, "events": events}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.4, help="seconds per scripted LLM call")
+    parser.add_argument("--api-latency", type=float, default=0.05, help="seconds per fake Calendar call")
+    args = parser.parse_args()
+
+    day = datetime.date.today() + datetime.timedelta(days=1)
+    print(f"{'scenario':<20}{'mode':<7}{'LLM calls':>10}{'API calls':>11}{'turn p50 (ms)':>15}")
+    # No SMTP from a benchmark: the email tool reports missing credentials instead
+    with mock.patch.dict(os.environ, {"EMAIL_ADDRESS": "", "EMAIL_PASSWORD": ""}):
+        for name, (prompt, loop_script, plan_script) in build_scenarios(day).items():
+            rows = {}
+            for mode, build, script in (("loop", lambda llm: build_agent(llm), loop_script),
+                                        ("plan", lambda llm: build_plan_agent(llm), plan_script)):
+                rows[mode] = r = run_mode(build, script, prompt, day, args.iterations, args.llm_latency, args.api_latency)
+                print(f"{name:<20}{mode:<7}{r['llm_calls']:>10.0f}{r['api_calls']:>11.0f}{r['p50'] * 1000:>15.0f}")
+            assert rows["loop"]["events"] == rows["plan"]["events"], f"{name}: modes left different calendars"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+First-question latency with and without the session warm start (core/prefetch.py).
+
+Each sample is a new session against a FakeCalendarService seeded with a week of meetings.
+Authorization is simulated: building the Calendar service sleeps --auth-latency (OAuth token
+refresh plus discovery build), as the real get_calendar_service does on its first call. The
+user then takes --think seconds to ask the first question, which is one of:
+
+1. "What's next?": an agent turn (ScriptedChatModel) calling list_events for the rest of today.
+2. "When am I free tomorrow?": an agent turn calling find_available_slots.
+3. "Brief Me": the daily briefing computed on the spot (core/briefing.py).
+
+"cold" asks with nothing loaded; "warm" starts the warm start when the session opens.
+
+    python benchmarks/prefetch_bench.py --auth-latency 0.4 --api-latency 0.15 --think 1
+"""
+import time
+import argparse
+import datetime
+import contextlib
+from unittest import mock
+
+from common import percentile
+from fakes import FakeCalendarService, ScriptedChatModel, tool_call
+from e2e_bench import offline_backend, run_turn
+
+from core import briefing, metering, prefetch, tools
+from core.agent import build_agent
+from core.credentials import CalendarCredentials, use_credentials
+from core.event_store import LOCAL_TZ
+
+CREDENTIALS = CalendarCredentials("bench-client", "bench-secret", "bench-refresh-token")
+# offline_backend replaces get_calendar_service; put the caching one back with a slow builder
+get_calendar_service = tools.get_calendar_service
+
+
+def seed(service: FakeCalendarService, first: datetime.date, days: int = 7):
+    for offset in range(days):
+        day = first + datetime.timedelta(days=offset)
+        for hour, minutes, summary in ((10, 15, "Standup"), (13, 60, "Lunch"), (16, 60, "Planning")):
+            start = datetime.datetime.combine(day, datetime.time(hour), tzinfo=LOCAL_TZ)
+            service.add_event(f"{summary} {day}", start.isoformat(), (start + datetime.timedelta(minutes=minutes)).isoformat())
+
+
+def questions(now: datetime.datetime) -> dict:
+    end_of_day = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time(), tzinfo=LOCAL_TZ)
+    tomorrow = (now.date() + datetime.timedelta(days=1)).isoformat()
+    return {
+        "what's next": ("What's next?", [
+            [tool_call("list_events", time_min=now.isoformat(), time_max=end_of_day.isoformat())],
+            "Next up is Planning at 4 PM.",
+        ]),
+        "free tomorrow": (f"When am I free on {tomorrow}?", [
+            [tool_call("find_available_slots", date_str=tomorrow)],
+            "You are free 9-10 AM, 10:15 AM-1 PM, 2-4 PM and after 5 PM.",
+        ]),
+        "brief me": None,
+    }
+
+
+@contextlib.contextmanager
+def session(service: FakeCalendarService, auth_latency: float):
+    """A fresh backend whose service is built (slowly) once per set of credentials, as in production."""
+    def build_service(*credentials):
+        time.sleep(auth_latency)
+        return service
+
+    with offline_backend(service), \
+            mock.patch.object(tools, "get_calendar_service", get_calendar_service), \
+            mock.patch.object(tools, "_build_service", build_service), \
+            mock.patch.object(tools, "_services", {}), \
+            mock.patch.object(prefetch, "_prefetchers", {}), \
+            use_credentials(CREDENTIALS):
+        yield
+
+
+def ask(question, llm_latency: float) -> float:
+    t0 = time.perf_counter()
+    if question is None:
+        briefing.compute_briefing(briefing.today())
+    else:
+        prompt, script = question
+        run_turn(build_agent(llm=ScriptedChatModel(script=script, latency=llm_latency)), prompt)
+    return time.perf_counter() - t0
+
+
+def run(mode: str, args) -> dict:
+    now = datetime.datetime.now(LOCAL_TZ)
+    results = {}
+    for name, question in questions(now).items():
+        latencies, calls, prefetched = [], [], []
+        for _ in range(args.iterations):
+            service = FakeCalendarService(latency=args.api_latency)
+            seed(service, now.date())
+            with session(service, args.auth_latency):
+                warm = prefetch.warm_start(refresh=0) if mode == "warm" else None
+                time.sleep(args.think)
+                if warm:
+                    prefetched.append(warm.wait(0))
+                before = sum(service.calls.values())
+                with metering.turn("bench"):
+                    latencies.append(ask(question, args.llm_latency))
+                calls.append(sum(service.calls.values()) - before)
+                if warm:
+                    warm.stop()
+        results[name] = {"p50": percentile(latencies, 50), "p95": percentile(latencies, 95),
+                         "calls": sum(calls) / len(calls), "prefetched": all(prefetched)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--auth-latency", type=float, default=0.4, help="seconds for token refresh + discovery build")
+    parser.add_argument("--api-latency", type=float, default=0.15, help="seconds per fake Calendar call")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds per scripted LLM call")
+    parser.add_argument("--think", type=float, default=1.0, help="seconds between session start and the first question")
+    args = parser.parse_args()
+
+    rows = {mode: run(mode, args) for mode in ("cold", "warm")}
+    print(f"auth {args.auth_latency * 1000:g} ms, {args.api_latency * 1000:g} ms per Calendar call, "
+          f"LLM {args.llm_latency * 1000:g} ms per call, first question after {args.think:g} s")
+    print(f"  {'first question':<16}{'cold p50':>10}{'warm p50':>10}{'cold p95':>10}{'warm p95':>10}"
+          f"{'calls cold/warm':>18}")
+    for name in rows["cold"]:
+        cold, warm = rows["cold"][name], rows["warm"][name]
+        print(f"  {name:<16}{cold['p50'] * 1000:>8.0f}ms{warm['p50'] * 1000:>8.0f}ms"
+              f"{cold['p95'] * 1000:>8.0f}ms{warm['p95'] * 1000:>8.0f}ms"
+              f"{cold['calls']:>12.1f} / {warm['calls']:.1f}"
+              + ("" if warm["prefetched"] else "  (warm start had not finished)"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Recurring series benchmark: per-instance listing and edits vs series-aware tools.
+
+Seeds FakeCalendarService with a weekday standup, a weekly team sync and a fortnightly 1:1
+running for a year, plus one-off meetings. Then compares, through the real tools:
+
+1. Listing a quarter: every instance (expand_recurring=True) vs one entry per series,
+   in items and characters handed to the LLM.
+2. "Move all my standups 30 minutes later": update_event on every remaining instance vs
+   one update_series call.
+3. "Cancel the team sync from <date> on": delete_event on every later instance vs one
+   delete_series(scope="following") call.
+
+Both ways must leave the same occurrences in the calendar.
+
+    python benchmarks/recurring_bench.py --api-latency 0.05 --weeks 52
+"""
+import json
+import time
+import argparse
+import datetime
+
+from fakes import FakeCalendarService
+from e2e_bench import offline_backend
+
+from core import tools
+from core.event_store import LOCAL_TZ
+
+
+def seed(service: FakeCalendarService, first: datetime.date, weeks: int) -> dict:
+    monday = first - datetime.timedelta(days=first.weekday())
+
+    def at(day: datetime.date, hour: int, minute: int = 0) -> str:
+        return datetime.datetime.combine(day, datetime.time(hour, minute), tzinfo=LOCAL_TZ).isoformat()
+
+    series = {
+        "standup": service.add_event("Standup", at(monday, 9, 30), at(monday, 9, 45),
+                                     recurrence=[f"RRULE:FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR;COUNT={weeks * 5}"]),
+        "sync": service.add_event("Team sync", at(monday + datetime.timedelta(days=2), 15),
+                                  at(monday + datetime.timedelta(days=2), 16),
+                                  recurrence=[f"RRULE:FREQ=WEEKLY;COUNT={weeks}"]),
+        "one_on_one": service.add_event("1:1 with manager", at(monday + datetime.timedelta(days=3), 11),
+                                        at(monday + datetime.timedelta(days=3), 11, 30),
+                                        recurrence=[f"RRULE:FREQ=WEEKLY;INTERVAL=2;COUNT={weeks // 2}"]),
+    }
+    for i in range(weeks):
+        day = monday + datetime.timedelta(days=7 * i + 1)
+        service.add_event(f"Customer call {i + 1}", at(day, 14), at(day, 15))
+    return {name: event["id"] for name, event in series.items()}
+
+
+def window(first: datetime.date, weeks: int) -> dict:
+    start = datetime.datetime.combine(first - datetime.timedelta(days=first.weekday()), datetime.time(), tzinfo=LOCAL_TZ)
+    return {"time_min": start.isoformat(), "time_max": (start + datetime.timedelta(weeks=weeks)).isoformat()}
+
+
+def occurrences(year: dict) -> list:
+    events = tools.list_events.invoke(dict(year, expand_recurring=True))
+    return sorted((e["summary"], e["start"]["dateTime"]) for e in events)
+
+
+def later(event: dict, minutes: int = 30) -> dict:
+    """start_time/end_time arguments moving an event (or a series' first occurrence) by `minutes`."""
+    shift = datetime.timedelta(minutes=minutes)
+    return {"start_time": (datetime.datetime.fromisoformat(event["start"]["dateTime"]) + shift).isoformat(),
+            "end_time": (datetime.datetime.fromisoformat(event["end"]["dateTime"]) + shift).isoformat()}
+
+
+def timed(service: FakeCalendarService, action) -> tuple:
+    before = sum(service.calls.values())
+    t0 = time.perf_counter()
+    action()
+    return sum(service.calls.values()) - before, time.perf_counter() - t0
+
+
+def run(mode: str, first: datetime.date, weeks: int, latency: float) -> dict:
+    service = FakeCalendarService()
+    ids = seed(service, first, weeks)
+    year, quarter = window(first, weeks), window(first, 13)
+    result = {}
+    with offline_backend(service):
+        service.latency = latency
+        listing = tools.list_events.invoke(dict(quarter, expand_recurring=mode == "instances"))
+        result["items"], result["chars"] = len(listing), len(json.dumps(listing))
+
+        def move_standups():
+            events = tools.list_events.invoke(dict(year, expand_recurring=mode == "instances"))
+            if mode == "series":
+                series = next(e for e in events if e["id"] == ids["standup"])
+                tools.update_series.invoke(dict(event_id=series["id"], **later(series)))
+                return
+            for event in events:
+                if event.get("recurringEventId") == ids["standup"]:
+                    tools.update_event.invoke(dict(event_id=event["id"], **later(event)))
+
+        cutoff = datetime.datetime.combine(first + datetime.timedelta(weeks=weeks // 2), datetime.time(), tzinfo=LOCAL_TZ)
+
+        def cancel_sync():
+            remaining = [e for e in tools.list_events.invoke({"time_min": cutoff.isoformat(),
+                                                              "time_max": year["time_max"], "expand_recurring": True})
+                         if e.get("recurringEventId") == ids["sync"]]
+            if mode == "series":
+                tools.delete_series.invoke({"event_id": remaining[0]["id"], "scope": "following"})
+                return
+            for event in remaining:
+                tools.delete_event.invoke({"event_id": event["id"]})
+
+        result["move_calls"], result["move_seconds"] = timed(service, move_standups)
+        result["cancel_calls"], result["cancel_seconds"] = timed(service, cancel_sync)
+        service.latency = 0
+        result["calendar"] = occurrences(year)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weeks", type=int, default=52, help="length of the seeded series")
+    parser.add_argument("--api-latency", type=float, default=0.05, help="seconds per fake Calendar call")
+    args = parser.parse_args()
+
+    first = datetime.date.today() + datetime.timedelta(days=7)
+    rows = {mode: run(mode, first, args.weeks, args.api_latency) for mode in ("instances", "series")}
+    assert rows["instances"]["calendar"] == rows["series"]["calendar"], "the two ways left different calendars"
+
+    print(f"{args.weeks}-week series, {args.api_latency * 1000:g} ms per Calendar call")
+    print(f"  {'':<11}{'quarter listing':>24}{'move all standups':>24}{'cancel sync from mid-year':>30}")
+    for mode, r in rows.items():
+        print(f"  {mode:<11}{r['items']:>8} items {r['chars'] / 1000:>6.1f}k chars"
+              f"{r['move_calls']:>10} calls {r['move_seconds']:>6.2f} s"
+              f"{r['cancel_calls']:>16} calls {r['cancel_seconds']:>6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Rerun benchmark: cost of one Streamlit rerun of ui/app.py with a long conversation in session.
+
+The session is seeded with a synthetic history (500 messages by default) and the script is
+rerun several times through Streamlit's AppTest harness. Pass --before <git-ref> to compare
+with an older revision.
+
+    python benchmarks/rerun_bench.py --messages 500 --before HEAD~1
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+from common import VERSION_DIR, extract_revision
+
+# Executed inside the child interpreter with cwd set to the Version_2 tree under test.
+PROBE = r"""
+import os, sys, time, json
+sys.path.insert(0, os.getcwd())
+from streamlit.testing.v1 import AppTest
+from langchain_core.messages import HumanMessage, AIMessage
+
+n_messages, reruns = int(sys.argv[1]), int(sys.argv[2])
+at = AppTest.from_file(os.path.join("ui", "app.py"), default_timeout=120)
+at.run()
+history = at.session_state["messages"][:1]
+for i in range(n_messages // 2):
+    history.append(HumanMessage(content=f"Can you move meeting {i} to **{i % 12 + 1} PM** tomorrow?"))
+    history.append(AIMessage(content=f"Done! Meeting {i} now starts at {i % 12 + 1} PM.\n\n- Room: A{i}\n- Attendees: 3"))
+at.session_state["messages"] = history
+
+samples = []
+for _ in range(reruns):
+    t0 = time.perf_counter()
+    at.run()
+    samples.append(time.perf_counter() - t0)
+print(json.dumps({"samples": samples, "elements": len(at.chat_message), "errors": [str(e.value) for e in at.exception]}))
+"""
+
+
+def measure(tree: str, n_messages: int, reruns: int) -> dict:
+    env = dict(os.environ)
+    env.setdefault("HUGGINGFACEHUB_API_TOKEN", "hf_benchmark_placeholder")
+    out = subprocess.run([sys.executable, "-c", PROBE, str(n_messages), str(reruns)], cwd=tree, env=env,
+                         capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    return {
+        "median_s": statistics.median(result["samples"]),
+        "max_s": max(result["samples"]),
+        "rendered_messages": result["elements"],
+        "errors": result["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--before", help="git ref to compare against (e.g. HEAD~1)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {"after": measure(VERSION_DIR, args.messages, args.reruns)}
+    if args.before:
+        with tempfile.TemporaryDirectory() as tmp:
+            results["before"] = measure(extract_revision(args.before, tmp), args.messages, args.reruns)
+
+    print(f"{args.messages}-message session, {args.reruns} reruns")
+    print(f"{'':<8}{'median (s)':>12}{'max (s)':>10}{'rendered':>10}")
+    for label in ("before", "after"):
+        if label in results:
+            r = results[label]
+            print(f"{label:<8}{r['median_s']:>12.3f}{r['max_s']:>10.3f}{r['rendered_messages']:>10}")
+            for error in r["errors"]:
+                print(f"  [{label}] app error: {error}")
+
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Response cache benchmark.
+
+Replays a day of user turns (mostly repeated "what's my day like" style questions, with a
+few bookings in between) through core.agent.run_turn with a ScriptedChatModel and a
+FakeCalendarService, once with the response cache disabled and once enabled. Reports LLM
+calls, total time, hit rate and the latency the cache saved. Bookings change the calendar,
+so the answers cached before them must not be served afterwards.
+
+    python benchmarks/response_cache_bench.py --rounds 10 --llm-latency 0.3 --api-latency 0.05
+"""
+import time
+import argparse
+import datetime
+from unittest import mock
+
+from common import percentile
+from fakes import FakeCalendarService, ScriptedChatModel, tool_call
+from e2e_bench import offline_backend, seed_calendar
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from core import metering, response_cache
+from core.agent import build_agent, build_system_prompt, run_turn
+
+
+def build_workload(day: datetime.date, rounds: int) -> list:
+    """(prompt, script, is_read) turns: paraphrased reads, and one booking every round."""
+    d = day.isoformat()
+    overview = [[tool_call("list_events", time_min=f"{d}T00:00:00+05:30", time_max=f"{d}T23:59:59+05:30")],
+                "You have a standup at 10, lunch at 1 and a planning session at 4."]
+    free = [[tool_call("find_available_slots", date_str=d)], "You are free 9-10 AM, 12-1 PM and after 5 PM."]
+    reads = [
+        (f"What's my day look like on {d}?", overview),
+        (f"what's my day look like on {d}", overview),
+        (f"Hey, can you tell me what my day looks like on {d}?", overview),
+        (f"When am I free on {d}?", free),
+        (f"Please, when am I free on {d}?", free),
+    ]
+    turns = []
+    for r in range(rounds):
+        turns += [(prompt, script, True) for prompt, script in reads]
+        start = f"{d}T{18 + r % 5:02d}:{(r // 5) * 10 % 60:02d}:00+05:30"
+        end = (datetime.datetime.fromisoformat(start) + datetime.timedelta(minutes=10)).isoformat()
+        turns.append((f"Book a check-in on {d} at {start[11:16]}.",
+                      [[tool_call("create_event", summary=f"Check-in {r}", start_time=start, end_time=end)],
+                       "Booked."], False))
+    return turns
+
+
+def replay(day: datetime.date, turns: list, ttl: float, llm_latency: float, api_latency: float) -> dict:
+    service = FakeCalendarService(latency=api_latency)
+    seed_calendar(service, day)
+    executors = {}
+    system = SystemMessage(content=build_system_prompt())
+    read_latencies = []
+    llm_calls = 0
+    with offline_backend(service), mock.patch.object(response_cache, "cache", response_cache.ResponseCache(ttl=ttl)):
+        t0 = time.perf_counter()
+        for prompt, script, is_read in turns:
+            key = repr(script)
+            if key not in executors:
+                executors[key] = build_agent(llm=ScriptedChatModel(script=script, latency=llm_latency))
+            started = time.perf_counter()
+            with metering.turn("bench") as usage:
+                run_turn([system, HumanMessage(content=prompt)], executors[key])
+            llm_calls += usage.counts["llm_calls"]
+            if is_read:
+                read_latencies.append(time.perf_counter() - started)
+        total = time.perf_counter() - t0
+        stats = response_cache.cache.stats()
+    return {"seconds": total, "llm_calls": llm_calls, "read_p50": percentile(read_latencies, 50),
+            "read_p95": percentile(read_latencies, 95), "stats": stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=10, help="rounds of 5 reads followed by 1 booking")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds per scripted LLM call")
+    parser.add_argument("--api-latency", type=float, default=0.05, help="seconds per fake Calendar call")
+    args = parser.parse_args()
+
+    day = datetime.date.today() + datetime.timedelta(days=1)
+    turns = build_workload(day, args.rounds)
+    print(f"{len(turns)} turns, {args.llm_latency * 1000:g} ms per LLM call, {args.api_latency * 1000:g} ms per API call")
+    for label, ttl in (("cache off", 0), ("cache on", response_cache.RESPONSE_CACHE_TTL)):
+        r = replay(day, turns, ttl, args.llm_latency, args.api_latency)
+        line = (f"  {label:<10} total {r['seconds']:6.2f} s  llm_calls={r['llm_calls']:<4} "
+                f"read p50 {r['read_p50'] * 1000:7.1f} ms  p95 {r['read_p95'] * 1000:7.1f} ms")
+        if ttl:
+            s = r["stats"]
+            line += f"  hit_rate={s['hit_rate']:.0%} bypassed={s['bypassed']} saved={s['seconds_saved']:.2f} s"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
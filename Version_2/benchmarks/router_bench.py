@@ -0,0 +1,108 @@
+"""
+Model router benchmark against local stand-in model endpoints.
+
+Starts FakeChatServer endpoints (OpenAI-compatible, see benchmarks/fakes.py) for a fast
+small model and a large reasoning model, and sends a mix of agent steps through real
+ChatOpenAI clients:
+
+1. Tiering: every step on the large model versus routed by complexity.
+2. Slow large model: some requests stall; without hedging versus hedged to a backup.
+3. Large model down: every request fails; failover to the backup keeps steps answering.
+
+    python benchmarks/router_bench.py --steps 60 --fast-latency 0.15 --large-latency 0.9
+"""
+import time
+import random
+import argparse
+
+from common import percentile
+from fakes import FakeChatServer
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_openai import ChatOpenAI
+
+from core import metering
+from core.router import FAST, REASONING, ModelRouter, Route, classify
+
+
+def client(server: FakeChatServer) -> Route:
+    # No client-side retries, so failover and hedging are what is measured
+    return Route(server.name, lambda: ChatOpenAI(model=server.name, base_url=server.base_url, api_key="local",
+                                                 max_retries=0, timeout=30))
+
+
+def workload(count: int, rng: random.Random) -> list:
+    """Conversations ending at the step the model must answer, in a realistic mix."""
+    system = SystemMessage(content="You are a scheduling assistant.")
+    lookup = [system, HumanMessage(content="When am I free tomorrow?")]
+    read_result = lookup + [AIMessage(content="", tool_calls=[{"name": "find_available_slots", "args": {}, "id": "c1"}]),
+                            ToolMessage(content='[{"start": "09:00", "end": "10:00"}]', tool_call_id="c1")]
+    confirm = [system, HumanMessage(content="Yes, go ahead")]
+    booking = [system, HumanMessage(content="Book a design review tomorrow at 3 and then email the team the agenda")]
+    failed = booking + [AIMessage(content="", tool_calls=[{"name": "create_event", "args": {}, "id": "c2"}]),
+                        ToolMessage(content='{"error": "invalid start time"}', tool_call_id="c2")]
+    mix = [lookup] * 3 + [read_result] * 3 + [confirm] * 2 + [booking] * 2 + [failed]
+    return [rng.choice(mix) for _ in range(count)]
+
+
+def run(router, steps: list) -> dict:
+    latencies, errors = [], 0
+    with metering.turn("bench") as usage:
+        for messages in steps:
+            t0 = time.perf_counter()
+            try:
+                router.invoke(messages)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - t0)
+    return {"p50": percentile(latencies, 50), "p95": percentile(latencies, 95), "p99": percentile(latencies, 99),
+            "total": sum(latencies), "errors": errors, "hedges": usage.counts["llm_hedges"],
+            "failovers": usage.counts["llm_failovers"]}
+
+
+def report(label: str, r: dict):
+    print(f"  {label:<28} p50 {r['p50'] * 1000:7.0f} ms  p95 {r['p95'] * 1000:7.0f} ms  p99 {r['p99'] * 1000:7.0f} ms"
+          f"  total {r['total']:6.1f} s  errors={r['errors']:<3} hedges={r['hedges']:<3} failovers={r['failovers']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=60)
+    parser.add_argument("--fast-latency", type=float, default=0.15)
+    parser.add_argument("--large-latency", type=float, default=0.9)
+    parser.add_argument("--stall-rate", type=float, default=0.15, help="fraction of large-model requests that stall")
+    parser.add_argument("--stall", type=float, default=6.0, help="seconds a stalled request takes")
+    parser.add_argument("--hedge-after", type=float, default=1.5)
+    args = parser.parse_args()
+
+    steps = workload(args.steps, random.Random(3))
+    fast_share = sum(classify(s) == FAST for s in steps) / len(steps)
+    print(f"{args.steps} steps ({fast_share:.0%} classified fast); fast model {args.fast_latency * 1000:g} ms, "
+          f"large model {args.large_latency * 1000:g} ms")
+
+    fast = FakeChatServer("small", latency=args.fast_latency)
+    large = FakeChatServer("large", latency=args.large_latency)
+    print("\n1. Tiering")
+    report("large model only", run(ModelRouter({REASONING: [client(large)]}), steps))
+    report("routed by complexity", run(ModelRouter({FAST: [client(fast)], REASONING: [client(large)]}), steps))
+
+    slow = FakeChatServer("large-slow", latency=args.large_latency, stall_rate=args.stall_rate, stall=args.stall, seed=1)
+    backup = FakeChatServer("large-backup", latency=args.large_latency * 1.2)
+    print(f"\n2. Large model stalls {args.stall_rate:.0%} of the time for {args.stall:g} s")
+    report("no hedging", run(ModelRouter({REASONING: [client(slow)]}), steps))
+    report(f"hedged after {args.hedge_after:g} s", run(ModelRouter({REASONING: [client(slow), client(backup)]},
+                                                                   hedge_after=args.hedge_after), steps))
+
+    down = FakeChatServer("large-down", latency=0.02, error_rate=1.0)
+    print("\n3. Large model down")
+    report("no failover", run(ModelRouter({REASONING: [client(down)]}), steps))
+    router = ModelRouter({REASONING: [client(down), client(backup)]})
+    report("failover to backup", run(router, steps))
+    print(f"  route health: { {name: (s['calls'], round(s['error_rate'], 2), s['healthy']) for name, s in router.stats().items()} }")
+
+    for server in (fast, large, slow, backup, down):
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
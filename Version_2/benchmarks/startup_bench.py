@@ -0,0 +1,79 @@
+"""
+Startup benchmark: module import time and time-to-first-render of the Streamlit app.
+
+Each measurement runs in a fresh interpreter so import caches do not leak between runs.
+Pass --before <git-ref> to measure an older revision of Version_2 side by side, e.g.
+
+    python benchmarks/startup_bench.py --before HEAD~1 --runs 5
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+from common import VERSION_DIR, extract_revision
+
+# Executed inside the child interpreter with cwd set to the Version_2 tree under test.
+PROBE = r"""
+import os, sys, time, json
+sys.path.insert(0, os.getcwd())
+t0 = time.perf_counter()
+import core.agent
+import_s = time.perf_counter() - t0
+
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file(os.path.join("ui", "app.py"), default_timeout=120)
+at.run()
+render_s = time.perf_counter() - t1
+print(json.dumps({"import_s": import_s, "first_render_s": render_s, "errors": [str(e.value) for e in at.exception]}))
+"""
+
+
+def measure(tree: str, runs: int) -> dict:
+    env = dict(os.environ)
+    # Client constructors need a token to be present; no request is made at startup.
+    env.setdefault("HUGGINGFACEHUB_API_TOKEN", "hf_benchmark_placeholder")
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", PROBE], cwd=tree, env=env,
+                             capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "import_s": statistics.median(s["import_s"] for s in samples),
+        "first_render_s": statistics.median(s["first_render_s"] for s in samples),
+        "errors": samples[-1]["errors"],
+        "runs": runs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--before", help="git ref to compare against (e.g. HEAD~1)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {"after": measure(VERSION_DIR, args.runs)}
+    if args.before:
+        with tempfile.TemporaryDirectory() as tmp:
+            results["before"] = measure(extract_revision(args.before, tmp), args.runs)
+
+    print(f"{'':<8}{'import (s)':>12}{'first render (s)':>20}")
+    for label in ("before", "after"):
+        if label in results:
+            r = results[label]
+            print(f"{label:<8}{r['import_s']:>12.3f}{r['first_render_s']:>20.3f}")
+            for error in r["errors"]:
+                print(f"  [{label}] app error: {error}")
+
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Spoken reply benchmark: whole-text gTTS + one ffmpeg pass vs chunked parallel synthesis.
+
+gTTS and ffmpeg are replaced by stand-ins with configurable costs, so no network or ffmpeg
+is needed. The real gTTS tokenizer still decides how many requests a text takes:
+
+- a TTS request costs --request-latency seconds plus --per-char seconds per character, and
+  returns 32 kbit/s audio at about 15 spoken characters per second;
+- a speed-up costs --ffmpeg-start seconds plus --ffmpeg-rate seconds per second of audio.
+
+For replies of growing length it reports total synthesis time and time to first audio for:
+
+1. serial: PooledgTTS over the whole reply (one request per 100 characters, in turn), then
+   ffmpeg over the whole file; nothing can play before both finish.
+2. chunked: core/tts.py synthesize() with --workers chunks in flight.
+
+    python benchmarks/tts_bench.py --workers 4 --request-latency 0.3
+"""
+import time
+import argparse
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from common import percentile
+
+from core import tts
+
+SENTENCES = [
+    "You have a standup at 10 AM with the platform team.",
+    "Lunch with the design team is at 1 PM, in the cafeteria on the second floor.",
+    "The quarterly planning review runs from 4 to 5:30 PM, and it overlaps with your dentist appointment at 5.",
+    "You are free from 9 to 10 AM, from 10:15 AM to 1 PM, and from 2 to 4 PM.",
+    "Tomorrow starts with a customer call at 9, followed by interviews until noon.",
+    "Would you like me to move the dentist appointment to Thursday afternoon?",
+]
+CHARS_PER_SECOND = 15
+
+
+def reply(length: int) -> str:
+    text, i = "", 0
+    while len(text) < length:
+        text += (" " if text else "") + SENTENCES[i % len(SENTENCES)]
+        i += 1
+    return text
+
+
+@contextlib.contextmanager
+def stand_ins(args):
+    def stream(self):
+        # One request per part, split by gTTS's own tokenizer
+        for part in self._tokenize(self.text):
+            time.sleep(args.request_latency + args.per_char * len(part))
+            yield bytes(int(len(part) / CHARS_PER_SECOND * tts.MP3_BITRATE / 8))
+
+    def speed_up(audio, tempo=tts.TTS_TEMPO):
+        time.sleep(args.ffmpeg_start + args.ffmpeg_rate * tts.mp3_seconds(audio))
+        return audio[:int(len(audio) / tempo)]
+
+    with mock.patch.object(tts.PooledgTTS, "stream", stream), \
+            mock.patch.object(tts, "speed_up", speed_up), \
+            mock.patch.object(tts.shutil, "which", lambda name: f"/usr/bin/{name}"), \
+            mock.patch.object(tts, "_pool", ThreadPoolExecutor(max_workers=args.workers)):
+        yield
+
+
+def serial(text: str) -> tuple:
+    t0 = time.perf_counter()
+    audio = tts.speed_up(b"".join(tts.PooledgTTS(text=text, lang="en").stream()))
+    total = time.perf_counter() - t0
+    return total, total, tts.mp3_seconds(audio)
+
+
+def chunked(text: str) -> tuple:
+    t0 = time.perf_counter()
+    first, seconds = None, 0.0
+    for audio, _ in tts.synthesize(text):
+        first = first or time.perf_counter() - t0
+        seconds += tts.mp3_seconds(audio)
+    return time.perf_counter() - t0, first, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[100, 300, 600, 1200, 2400])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--request-latency", type=float, default=0.3, help="seconds per TTS request")
+    parser.add_argument("--per-char", type=float, default=0.002, help="extra seconds per character of a request")
+    parser.add_argument("--ffmpeg-start", type=float, default=0.05, help="seconds to start ffmpeg")
+    parser.add_argument("--ffmpeg-rate", type=float, default=0.01, help="ffmpeg seconds per second of audio")
+    args = parser.parse_args()
+
+    print(f"{args.request_latency * 1000:g} ms per TTS request, {args.workers} workers, tempo {tts.TTS_TEMPO:g}")
+    print(f"  {'chars':>6}{'chunks':>8}{'audio':>8}{'serial total':>14}{'chunked total':>15}"
+          f"{'serial first':>14}{'chunked first':>15}")
+    with stand_ins(args):
+        for length in args.lengths:
+            text = reply(length)
+            runs = {"serial": [serial(text) for _ in range(args.repeat)],
+                    "chunked": [chunked(text) for _ in range(args.repeat)]}
+            # Both ways speak the same text at the same speed, give or take the chunk boundaries
+            assert abs(runs["serial"][0][2] - runs["chunked"][0][2]) < 0.05 * runs["serial"][0][2], "audio lengths differ"
+            row = {mode: (percentile([r[0] for r in rs], 50), percentile([r[1] for r in rs], 50))
+                   for mode, rs in runs.items()}
+            print(f"  {len(text):>6}{len(tts.split_text(text)):>8}{runs['chunked'][0][2]:>7.1f}s"
+                  f"{row['serial'][0]:>13.2f}s{row['chunked'][0]:>14.2f}s"
+                  f"{row['serial'][1]:>13.2f}s{row['chunked'][1]:>14.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,37 @@
 import os
+import re
 import datetime
+import functools
 from typing import Annotated
 from typing_extensions import TypedDict
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
-from langchain_openai import ChatOpenAI
+from langgraph.prebuilt import ToolNode
 from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
 
 from core.tools import (
     list_events, 
     create_event, 
     update_event, 
     delete_event, 
+    update_series,
+    delete_series,
     get_event_details, 
     list_calendars, 
     check_availability, 
     find_available_slots, 
+    find_conflicts,
+    schedule_analytics,
+    reschedule_by_description,
+    cancel_by_description,
+    import_ics,
+    export_ics,
     send_email_notification,
     get_daily_schedule
 )
+from core.providers import get_llm
+from core import metering, read_cache, response_cache, router, tracing
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -29,22 +40,8 @@ load_dotenv()
 class AgentState(TypedDict):
     messages: Annotated[list[BaseMessage], add_messages]
 
-# --- Google Gemini Configuration (Commented Out) ---
-# llm = ChatGoogleGenerativeAI(
-#     model="gemini-2.0-flash",
-#     google_api_key=os.environ.get("GEMINI_API_KEY"),
-#     temperature=0
-# )
-
-# --- DeepSeek V3.2 Configuration (via Hugging Face router) ---
-# Using ChatOpenAI wrapper with the router endpoint
-llm = ChatOpenAI(
-    model="deepseek-ai/DeepSeek-V3.2",
-    openai_api_key=os.getenv("HUGGINGFACEHUB_API_TOKEN"),
-    openai_api_base="https://router.huggingface.co/v1",
-    max_tokens=1024,
-    temperature=0.2,
-)
+# The chat model is built on demand by the provider registry (core/providers.py).
+# Set LLM_PROVIDER to switch backends, e.g. LLM_PROVIDER=gemini.
 
 # Bind Tools
 tools = [
@@ -52,14 +49,21 @@ tools = [
     create_event, 
     update_event, 
     delete_event, 
+    update_series,
+    delete_series,
     get_event_details, 
     list_calendars, 
     check_availability, 
     find_available_slots, 
+    find_conflicts,
+    schedule_analytics,
+    reschedule_by_description,
+    cancel_by_description,
+    import_ics,
+    export_ics,
     send_email_notification,
     get_daily_schedule
 ]
-llm_with_tools = llm.bind_tools(tools)
 
 # System Prompt
 SYSTEM_PROMPT = f"""You are a professional AI Scheduling Agent (Version 2.0). 
@@ -71,42 +75,50 @@ CAPABILITIES:
 - Check real-time availability and suggest optimal meeting slots.
 - Create, update, and delete events with high accuracy.
 - capable of sending email notifications and summaries.
+- Answer questions about meeting load over weeks or months ("hours of meetings per week", "busiest day") with 'schedule_analytics' instead of adding up 'list_events' results.
+- Import and export whole calendars as .ics files ('import_ics', 'export_ics'); never recreate many events one by one with 'create_event'.
 
 RULES:
 1. Always Check First: Use 'check_availability' or 'find_available_slots' before proposing or booking a time.
-2. Conflict Resolution: If a slot is taken, use 'find_available_slots' to offer 2-3 alternatives.
-3. Primary Calendar: default to the 'primary' calendar unless the user specifies otherwise.
+2. Conflict Resolution: If a slot is taken, use 'find_available_slots' to offer 2-3 alternatives. When checking several proposed times at once (e.g. rescheduling many events), use 'find_conflicts' with all of them in one call.
+3. Primary Calendar: default to the 'primary' calendar unless the user specifies otherwise. To cover other calendars, pass 'calendar_ids' (IDs from 'list_calendars', or ["all"] for every visible calendar) to 'list_events', 'check_availability' or 'find_available_slots'.
 4. Time Zone: All scheduling and time operations MUST be done in IST (UTC+05:30).
-5. Precision: When updating or deleting, search for the event first to get the correct 'event_id'.
-6. Politeness: Be concise, professional, and helpful.
+5. Precision: To move or cancel an event the user describes in words, call 'reschedule_by_description' or 'cancel_by_description' directly; they find the event themselves. Only if they return candidates, ask the user which one and use 'update_event'/'delete_event' with its id. Search with 'list_events' only when they find nothing.
+6. Recurring Events: 'list_events' shows each recurring event once, with its rule and occurrence count. To change or cancel all occurrences ("all my standups") or one occurrence and every later one, call 'update_series'/'delete_series' once with scope "all" or "following"; never edit occurrences one by one.
+7. Politeness: Be concise, professional, and helpful.
 """
 
-# Define Nodes
-def chatbot(state: AgentState):
-    messages = state["messages"]
-    if not any(isinstance(m, SystemMessage) for m in messages):
-         messages = [SystemMessage(content=SYSTEM_PROMPT)] + messages
-    
-    response = llm_with_tools.invoke(messages)
-    # Post‑process the LLM output to make voice‑friendly time strings
-    # Remove ":00" and ensure AM/PM is kept (e.g., "9:00 AM" → "9 AM")
-    import re
-    def _clean_time(text: str) -> str:
-        # Replace patterns like "9:00 AM" or "12:00" with "9 AM" / "12"
-        return re.sub(r"(\d{1,2}):00\s*(AM|PM)?", lambda m: f"{m.group(1)} {m.group(2) or ''}".strip(), text)
-    if hasattr(response, "content"):
-        response.content = _clean_time(response.content)
-    return {"messages": [response]}
-
-from langgraph.prebuilt import ToolNode
-tool_node = ToolNode(tools)
-
-# Define Graph
-graph_builder = StateGraph(AgentState)
-graph_builder.add_node("chatbot", chatbot)
-graph_builder.add_node("tools", tool_node)
+# Appended to the system prompt when a turn has used up its budget (see core/metering.py)
+BUDGET_NOTICE = """
+NOTE: The tool-call budget for this request is used up. Do not call any more tools.
+Answer now using the information already gathered, and say briefly what is still unfinished.
+"""
 
-graph_builder.add_edge(START, "chatbot")
+# Define Personality Prompts
+PERSONALITY_PROMPTS = {
+    "Professional Executive": """
+    Tone: Formal, concise, and efficient.
+    Style: Use business terminology. Focus on productivity and clear outcomes.
+    Example: "I have scheduled the meeting. Is there anything else?"
+    """,
+    "Chill Bestie": """
+    Tone: Casual, friendly, and enthusiastic. Use emojis! 🌟
+    Style: Talk like a helpful friend. Be supportive and relaxed.
+    Example: "Got it! Meeting is booked! 🎉 Anything else you need, bestie?"
+    """
+}
+DEFAULT_PERSONALITY = "Professional Executive"
+
+# Messages (besides the system prompt) sent to the model each turn
+HISTORY_WINDOW = 10
+
+def build_system_prompt(personality: str = DEFAULT_PERSONALITY) -> str:
+    """System prompt for the given persona."""
+    return SYSTEM_PROMPT + "\n\n" + PERSONALITY_PROMPTS[personality]
+
+def _clean_time(text: str) -> str:
+    # Replace patterns like "9:00 AM" or "12:00" with "9 AM" / "12"
+    return re.sub(r"(\d{1,2}):00\s*(AM|PM)?", lambda m: f"{m.group(1)} {m.group(2) or ''}".strip(), text)
 
 # Conditional Edge
 def should_continue(state: AgentState):
@@ -116,8 +128,85 @@ def should_continue(state: AgentState):
         return "tools"
     return END
 
-graph_builder.add_conditional_edges("chatbot", should_continue, ["tools", END])
-graph_builder.add_edge("tools", "chatbot")
-
-# Compile
-agent_executor = graph_builder.compile()
\ No newline at end of file
+def build_agent(llm=None):
+    """
+    Bind the tools to the chat model and compile the LangGraph.
+    Args:
+        llm: Optional chat model; defaults to the model router when LLM_ROUTES_* are set, else the configured provider
+    """
+    llm = llm or router.from_env() or get_llm()
+    llm_with_tools = llm.bind_tools(tools)
+
+    # Define Nodes
+    def chatbot(state: AgentState):
+        messages = state["messages"]
+        if not any(isinstance(m, SystemMessage) for m in messages):
+             messages = [SystemMessage(content=SYSTEM_PROMPT)] + messages
+
+        budget = metering.exceeded_budget()
+        with tracing.span("chatbot") as span:
+            if budget:
+                # Graceful degradation: finish the turn with a tool-less call instead of looping
+                metering.note_budget_exhausted(budget)
+                span.set(budget_exhausted=budget)
+                response = llm.invoke([SystemMessage(content=messages[0].content + BUDGET_NOTICE)] + messages[1:])
+            else:
+                response = llm_with_tools.invoke(messages)
+            metering.record_llm_response(response)
+            span.set(tool_calls=[c["name"] for c in getattr(response, "tool_calls", [])])
+        # Post‑process the LLM output to make voice‑friendly time strings
+        # Remove ":00" and ensure AM/PM is kept (e.g., "9:00 AM" → "9 AM")
+        if hasattr(response, "content"):
+            response.content = _clean_time(response.content)
+        return {"messages": [response]}
+
+    tool_node = ToolNode(tools)
+
+    def run_tools(state: AgentState, config: RunnableConfig):
+        with tracing.span("tools"):
+            return tool_node.invoke(state, config)
+
+    # Define Graph
+    graph_builder = StateGraph(AgentState)
+    graph_builder.add_node("chatbot", chatbot)
+    graph_builder.add_node("tools", run_tools)
+
+    graph_builder.add_edge(START, "chatbot")
+    graph_builder.add_conditional_edges("chatbot", should_continue, ["tools", END])
+    graph_builder.add_edge("tools", "chatbot")
+
+    # Compile
+    return graph_builder.compile()
+
+# "loop" (default): one LLM call per tool round; "plan": plan once, execute locally (core/planner.py)
+AGENT_MODE = os.environ.get("AGENT_MODE", "loop")
+
+@functools.lru_cache(maxsize=None)
+def get_agent_executor():
+    """Returns the process-wide compiled agent, building it on first use."""
+    if AGENT_MODE == "plan":
+        from core.planner import build_plan_agent
+        return build_plan_agent()
+    return build_agent()
+
+def run_turn(messages: list, executor=None) -> BaseMessage:
+    """
+    Run one agent turn over a conversation and return the final AI message.
+    Args:
+        messages: Full history, system prompt first and the new user message last
+        executor: Compiled graph to use; defaults to the process-wide agent
+    """
+    # Prepare state with optimized context window
+    # Always keep the first message (likely System Prompt) and the last messages
+    if len(messages) > HISTORY_WINDOW:
+        messages = [messages[0]] + messages[-HISTORY_WINDOW:]
+    executor = executor or get_agent_executor()
+    with read_cache.read_scope():
+        # Repeated read-only questions are answered from core/response_cache.py
+        return response_cache.respond(messages, lambda: executor.invoke({"messages": messages})["messages"])
+
+def __getattr__(name):
+    # Keep `from core.agent import agent_executor` working without compiling the graph at import
+    if name == "agent_executor":
+        return get_agent_executor()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,253 @@
+import os
+from typing import Dict, List
+
+import numpy as np
+
+from core.event_store import LOCAL_TZ, parse_time
+
+# Schedule analytics over a window of events, computed on columnar numpy arrays.
+# Questions like "hours of meetings per week this quarter" or "my busiest weekday" used to
+# mean paging raw list_events output into the LLM and doing the arithmetic in context.
+# Here the events become arrays (start, end, calendar, attendee count); a vectorized
+# merge of the sorted intervals gives busy time without double-counting overlaps, free
+# gaps inside working hours and an hour-by-weekday heatmap. Everything is aggregated per
+# local day first and then grouped, and the result is a small table.
+
+ANALYTICS_MAX_DAYS = int(os.environ.get("ANALYTICS_MAX_DAYS", 731))
+# Free stretches shorter than this count as fragmented time
+FOCUS_BLOCK_MINUTES = int(os.environ.get("FOCUS_BLOCK_MINUTES", 60))
+
+GROUPS = ("day", "week", "weekday", "month", "calendar")
+WEEKDAY_NAMES = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+COLUMNS = ["period", "events", "hours", "busy_hours", "days", "avg_attendees", "fragmentation", "longest_focus_min"]
+OFFSET = int(LOCAL_TZ.utcoffset(None).total_seconds())
+
+
+def _declined(event: Dict) -> bool:
+    return any(a.get('self') and a.get('responseStatus') == 'declined' for a in event.get('attendees', []))
+
+
+class EventColumns:
+    """
+    The timed events of a listing as parallel arrays.
+    All-day, free ("transparent"), declined and cancelled events are left out and counted in `skipped`.
+    """
+
+    def __init__(self, events: List[Dict]):
+        self.skipped = {"all_day": 0, "free_or_declined": 0}
+        starts, ends, calendars, attendees = [], [], [], []
+        for event in events:
+            start = event.get('start', {})
+            if 'error' in event or event.get('status') == 'cancelled':
+                continue
+            if 'dateTime' not in start:
+                self.skipped["all_day"] += 1
+                continue
+            people = event.get('attendees') or ()
+            if event.get('transparency') == 'transparent' or (people and _declined(event)):
+                self.skipped["free_or_declined"] += 1
+                continue
+            starts.append(parse_time(start['dateTime']).timestamp())
+            ends.append(parse_time(event['end']['dateTime']).timestamp())
+            calendars.append(event.get('calendarSummary') or event.get('calendarId', 'primary'))
+            attendees.append(len(people))
+        self.start = np.array(starts, dtype=np.float64)
+        self.end = np.array(ends, dtype=np.float64)
+        self.calendars, codes = np.unique(np.array(calendars, dtype=str), return_inverse=True)
+        self.calendars = self.calendars.tolist()
+        self.calendar = codes.astype(np.int32)
+        self.attendees = np.array(attendees, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+
+def _pieces(start: np.ndarray, end: np.ndarray, size: float):
+    """Cut intervals at multiples of `size`: (bucket, piece start, piece end) for every piece."""
+    first = (start // size).astype(np.int64)
+    count = np.maximum(np.ceil(end / size).astype(np.int64) - first, 1)
+    offsets = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+    bucket = np.repeat(first, count) + offsets
+    index = np.repeat(np.arange(len(start)), count)
+    return bucket, np.maximum(start[index], bucket * size), np.minimum(end[index], (bucket + 1) * size)
+
+
+class Timeline:
+    """
+    The events of a window as seconds from local midnight of its first day, plus their union.
+    Args:
+        columns: Events to lay out
+        time_min: Start of the window (ISO)
+        time_max: End of the window (ISO)
+        work_start_hour: Working day start, for free-time and fragmentation figures
+        work_end_hour: Working day end
+    """
+
+    def __init__(self, columns: EventColumns, time_min: str, time_max: str,
+                 work_start_hour: int = 9, work_end_hour: int = 18):
+        lo, hi = parse_time(time_min).timestamp(), parse_time(time_max).timestamp()
+        origin = (lo + OFFSET) // 86400 * 86400 - OFFSET
+        self.days = int(np.ceil((hi - origin) / 86400))
+        if self.days > ANALYTICS_MAX_DAYS:
+            raise ValueError(f"Window spans {self.days} days; the limit is {ANALYTICS_MAX_DAYS}.")
+        start = np.clip(columns.start, lo, hi) - origin
+        end = np.clip(columns.end, lo, hi) - origin
+        self.inside = end > start
+        self.start, self.end = start[self.inside], end[self.inside]
+        self.seconds = self.end - self.start
+        self.event_day = np.minimum(self.start // 86400, self.days - 1).astype(np.int64)
+
+        # Union of the events: in start order, a new block begins where an event starts after every earlier end
+        order = np.argsort(self.start, kind="stable")
+        s, e = self.start[order], self.end[order]
+        reach = np.maximum.accumulate(e) if len(e) else e
+        new = np.ones(len(s), dtype=bool)
+        new[1:] = s[1:] > reach[:-1]
+        last = np.append(np.nonzero(new)[0][1:] - 1, len(s) - 1) if len(s) else np.zeros(0, dtype=np.int64)
+        self.block_start, self.block_end = s[new], reach[last]
+
+        day_numbers = (origin + OFFSET) // 86400 + np.arange(self.days)
+        self.dates = np.array(day_numbers, dtype="datetime64[D]")
+        self.weekday = ((day_numbers + 3) % 7).astype(np.int64)    # 1970-01-01 was a Thursday
+        # Working hours per day, as seconds from the origin; weekends and time outside the window have none
+        midnight = np.arange(self.days) * 86400.0
+        self.work_start = np.clip(midnight + work_start_hour * 3600, lo - origin, hi - origin)
+        self.work_end = np.clip(midnight + work_end_hour * 3600, lo - origin, hi - origin)
+        self.work_end = np.where(self.weekday < 5, np.maximum(self.work_end, self.work_start), self.work_start)
+
+    def busy_minutes(self) -> np.ndarray:
+        """Busy minutes per day, overlaps counted once."""
+        day, s, e = _pieces(self.block_start, self.block_end, 86400)
+        return np.bincount(day, weights=e - s, minlength=self.days) / 60
+
+    def free_runs(self):
+        """(free working minutes, minutes in short gaps, longest gap in minutes) per day."""
+        day, s, e = _pieces(self.block_start, self.block_end, 86400)
+        s = np.clip(s, self.work_start[day], self.work_end[day])
+        e = np.clip(e, self.work_start[day], self.work_end[day])
+        keep = e > s
+        day, s, e = day[keep], s[keep], e[keep]
+        # Gap before each busy block (from the previous block that day, or from the start of work)
+        same_day = np.zeros(len(day), dtype=bool)
+        same_day[1:] = day[1:] == day[:-1]
+        previous_end = np.where(same_day, np.roll(e, 1), self.work_start[day])
+        # Gap after the last block of each day, and whole working days without any
+        is_last = np.ones(len(day), dtype=bool)
+        is_last[:-1] = day[1:] != day[:-1]
+        empty = np.setdiff1d(np.arange(self.days), day)
+        gap_day = np.concatenate([day, day[is_last], empty])
+        gaps = np.concatenate([s - previous_end, self.work_end[day[is_last]] - e[is_last],
+                               self.work_end[empty] - self.work_start[empty]]) / 60
+        free = np.bincount(gap_day, weights=gaps, minlength=self.days)
+        short = np.bincount(gap_day, weights=gaps * (gaps < FOCUS_BLOCK_MINUTES), minlength=self.days)
+        longest = np.zeros(self.days)
+        np.maximum.at(longest, gap_day, gaps)
+        return free, short, longest
+
+    def heatmap(self) -> np.ndarray:
+        """Average busy minutes per (weekday, hour of day)."""
+        hour, s, e = _pieces(self.block_start, self.block_end, 3600)
+        totals = np.zeros((7, 24))
+        np.add.at(totals, (self.weekday[np.minimum(hour // 24, self.days - 1)], hour % 24), (e - s) / 60)
+        occurrences = np.bincount(self.weekday, minlength=7)
+        return totals / np.maximum(occurrences, 1)[:, None]
+
+
+def _num(value, digits: int = 1) -> float:
+    return round(float(value), digits)
+
+
+def _day_keys(timeline: Timeline, group_by: str) -> np.ndarray:
+    if group_by == "day":
+        return timeline.dates.astype(str)
+    if group_by == "week":
+        monday = timeline.dates - timeline.weekday.astype("timedelta64[D]")
+        return np.char.add("week of ", monday.astype(str))
+    if group_by == "month":
+        return timeline.dates.astype("datetime64[M]").astype(str)
+    return np.array(WEEKDAY_NAMES)[timeline.weekday]
+
+
+def summarize(events: List[Dict], time_min: str, time_max: str, group_by: str = "week",
+              work_start_hour: int = 9, work_end_hour: int = 18, heatmap: bool = False) -> Dict:
+    """
+    Meeting load of a window as a compact table.
+    Args:
+        events: Instances in the window (expand recurring events first)
+        time_min: Start of the window (ISO)
+        time_max: End of the window (ISO)
+        group_by: 'day', 'week', 'weekday', 'month' or 'calendar'
+        work_start_hour: Working day start, for fragmentation and focus time
+        work_end_hour: Working day end
+        heatmap: Add average busy minutes per weekday and working hour
+    """
+    return aggregate(EventColumns(events), time_min, time_max, group_by, work_start_hour, work_end_hour, heatmap)
+
+
+def aggregate(columns: EventColumns, time_min: str, time_max: str, group_by: str = "week",
+              work_start_hour: int = 9, work_end_hour: int = 18, heatmap: bool = False) -> Dict:
+    """`summarize` on events already loaded into columns."""
+    if group_by not in GROUPS:
+        raise ValueError(f"group_by must be one of {', '.join(GROUPS)}")
+    timeline = Timeline(columns, time_min, time_max, work_start_hour, work_end_hour)
+    # Each event counts towards the local day it starts on
+    event_day = timeline.event_day
+    minutes = timeline.seconds / 60
+    busy = timeline.busy_minutes()
+    free, short, longest = timeline.free_runs()
+
+    if group_by == "calendar":
+        # Busy time and fragmentation mix calendars; per calendar only the event figures apply
+        codes = columns.calendar[timeline.inside]
+        count = np.bincount(codes, minlength=len(columns.calendars))
+        minutes = np.bincount(codes, weights=minutes, minlength=len(columns.calendars))
+        people = np.bincount(codes, weights=columns.attendees[timeline.inside], minlength=len(columns.calendars))
+        rows = [[name, int(count[i]), _num(minutes[i] / 60), None, timeline.days,
+                 _num(people[i] / count[i]) if count[i] else 0.0, None, None]
+                for i, name in enumerate(columns.calendars)]
+    else:
+        labels, day_group = np.unique(_day_keys(timeline, group_by), return_inverse=True)
+        if group_by == "weekday":
+            order = [WEEKDAY_NAMES.index(label) for label in labels]
+            labels = labels[np.argsort(order)]
+            day_group = np.argsort(np.argsort(order))[day_group]
+        groups = len(labels)
+        group_of_event = day_group[event_day]
+        count = np.bincount(group_of_event, minlength=groups)
+        minutes = np.bincount(group_of_event, weights=minutes, minlength=groups)
+        people = np.bincount(group_of_event, weights=columns.attendees[timeline.inside], minlength=groups)
+        busy_by = np.bincount(day_group, weights=busy, minlength=groups)
+        free_by = np.bincount(day_group, weights=free, minlength=groups)
+        short_by = np.bincount(day_group, weights=short, minlength=groups)
+        longest_by = np.zeros(groups)
+        np.maximum.at(longest_by, day_group, longest)
+        days = np.bincount(day_group, minlength=groups)
+        rows = [[str(labels[i]), int(count[i]), _num(minutes[i] / 60), _num(busy_by[i] / 60), int(days[i]),
+                 _num(people[i] / count[i]) if count[i] else 0.0,
+                 _num(short_by[i] / free_by[i], 2) if free_by[i] else None, int(longest_by[i])]
+                for i in range(groups)]
+
+    busiest = int(np.argmax(busy)) if len(busy) else None
+    result = {
+        "window": {"from": time_min, "to": time_max, "days": timeline.days},
+        "group_by": group_by,
+        "columns": COLUMNS,
+        "rows": rows,
+        "totals": {
+            "events": int(len(timeline.seconds)),
+            "hours": _num(timeline.seconds.sum() / 3600),
+            "busy_hours": _num(busy.sum() / 60),
+            "busiest_day": {"date": str(timeline.dates[busiest]), "busy_hours": _num(busy[busiest] / 60)}
+            if busiest is not None and busy[busiest] else None,
+            "fragmentation": _num(short.sum() / free.sum(), 2) if free.sum() else None,
+        },
+        "skipped": columns.skipped,
+        "notes": "hours: sum of event durations; busy_hours: time covered by at least one event; "
+                 f"fragmentation: share of free working time in gaps under {FOCUS_BLOCK_MINUTES} min; "
+                 "longest_focus_min: longest free working stretch.",
+    }
+    if heatmap:
+        grid = timeline.heatmap()[:, work_start_hour:work_end_hour]
+        result["heatmap"] = {"unit": "average busy minutes", "hours": list(range(work_start_hour, work_end_hour)),
+                             **{WEEKDAY_NAMES[d]: [int(round(v)) for v in grid[d]] for d in range(7)}}
+    return result
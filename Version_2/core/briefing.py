@@ -0,0 +1,237 @@
+import os
+import time
+import queue
+import datetime
+import threading
+import contextvars
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core import event_store
+from core.credentials import current_user_id
+from core.event_store import EVENT_CACHE_TTL, LOCAL_TZ, event_bounds, parse_time
+
+# Precomputed daily briefing.
+# A background worker builds the day's structured summary (events, free slots, conflicts
+# and the activity log) at start of day, so "Brief Me" and "Today's Agenda" answer from
+# memory instead of running a full LLM turn. Writes that touch a day (create, update,
+# delete, imports) arrive as event-store change notifications and recompute only the
+# affected days. Changes made outside the app (another device, a shared calendar) are
+# noticed when the event store reloads a window, and a briefing older than BRIEFING_TTL
+# is rebuilt from a fresh listing on the next request. An optional synthesizer
+# pre-renders the spoken version as well.
+
+# Keep briefings for this many days around today
+RETAIN_DAYS = 2
+# Seconds a briefing is served before it is rebuilt; the event store trusts a listing as long
+BRIEFING_TTL = float(os.environ.get("BRIEFING_TTL", EVENT_CACHE_TTL))
+
+
+def today() -> str:
+    return datetime.datetime.now(LOCAL_TZ).date().isoformat()
+
+
+def _clock(value: Dict) -> str:
+    if 'dateTime' not in value:
+        return "all day"
+    return parse_time(value['dateTime']).astimezone(LOCAL_TZ).strftime("%I:%M %p").lstrip("0")
+
+
+def find_overlaps(events: List[Dict]) -> List[Tuple[Dict, Dict]]:
+    """Pairs of overlapping timed events; `events` must be in start order."""
+    overlaps, active = [], []
+    for event in events:
+        if 'dateTime' not in event['start']:
+            continue
+        start, end = event_bounds(event)
+        active = [(e, e_end) for e, e_end in active if e_end > start]
+        overlaps += [(other, event) for other, _ in active]
+        active.append((event, end))
+    return overlaps
+
+
+def compute_briefing(date_str: str) -> Dict:
+    """
+    Structured summary of one day, with ready-to-speak summary and agenda texts.
+    Args:
+        date_str: Date in YYYY-MM-DD format
+    """
+    # Imported here: core.tools pulls in the Calendar client, which most importers of this module do not need
+    from core.tools import find_available_slots, get_daily_schedule, list_events
+
+    day = datetime.date.fromisoformat(date_str)
+    start = datetime.datetime.combine(day, datetime.time(), tzinfo=LOCAL_TZ)
+    events = list_events.invoke({"time_min": start.isoformat(), "expand_recurring": True,
+                                 "time_max": (start + datetime.timedelta(days=1)).isoformat()})
+    if events and "error" in events[0]:
+        raise RuntimeError(events[0]["error"])
+    gaps = find_available_slots.invoke({"date_str": date_str})
+    gaps = [] if gaps and "error" in gaps[0] else gaps
+    conflicts = find_overlaps(events)
+    activity = get_daily_schedule.invoke({"date_str": date_str})
+
+    briefing = {
+        "date": date_str,
+        "events": [{"id": e.get("id"), "summary": e.get("summary", "(no title)"), "start": e["start"], "end": e["end"]}
+                   for e in events],
+        "gaps": gaps,
+        "conflicts": [{"first": a.get("summary"), "second": b.get("summary"), "at": _clock(b["start"])}
+                      for a, b in conflicts],
+        "activity": activity,
+        "generated_at": datetime.datetime.now(LOCAL_TZ).isoformat(timespec="seconds"),
+    }
+    briefing["summary"] = render_summary(briefing)
+    briefing["agenda"] = render_agenda(briefing)
+    return briefing
+
+
+def render_summary(briefing: Dict) -> str:
+    """Spoken-style briefing: what is on, where the gaps are, and what clashes."""
+    label = "today" if briefing["date"] == today() else f"on {briefing['date']}"
+    events = briefing["events"]
+    if not events:
+        return f"Your calendar is clear {label}."
+    lines = [f"You have {len(events)} event{'s' if len(events) != 1 else ''} {label}:"]
+    lines += [f"- {_clock(e['start'])}: {e['summary']}" for e in events]
+    if briefing["gaps"]:
+        free = ", ".join(f"{_clock({'dateTime': g['start']})} to {_clock({'dateTime': g['end']})}" for g in briefing["gaps"])
+        lines.append(f"You are free {free}.")
+    for c in briefing["conflicts"]:
+        lines.append(f"Heads-up: {c['first']} overlaps {c['second']} at {c['at']}.")
+    return "\n".join(lines)
+
+
+def render_agenda(briefing: Dict) -> str:
+    """Agenda with start and end times, followed by the day's activity log."""
+    lines = [f"Agenda for {briefing['date']}:"]
+    lines += [f"- {_clock(e['start'])} - {_clock(e['end'])}: {e['summary']}" for e in briefing["events"]] \
+        or ["- Nothing scheduled."]
+    if briefing["activity"] and not briefing["activity"].startswith("No events recorded"):
+        lines += ["", "Activity log:", briefing["activity"].strip()]
+    return "\n".join(lines)
+
+
+def _days(start: Optional[float], end: Optional[float]) -> Optional[List[str]]:
+    """Local dates touched by [start, end); None means all of them."""
+    if start is None or end is None:
+        return None
+    first = datetime.datetime.fromtimestamp(start, LOCAL_TZ).date()
+    last = datetime.datetime.fromtimestamp(max(start, end - 1), LOCAL_TZ).date()
+    return [(first + datetime.timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+
+
+class BriefingService:
+    """
+    Keeps each user's briefing for today (and any day asked for) ready in memory.
+    Args:
+        synthesizer: Optional callable turning briefing text into an audio file path
+        ttl: Seconds a briefing is served before it is rebuilt (default BRIEFING_TTL)
+    """
+
+    def __init__(self, synthesizer: Optional[Callable[[str], str]] = None, ttl: Optional[float] = None,
+                 clock=time.monotonic):
+        self.synthesizer = synthesizer
+        self.ttl = BRIEFING_TTL if ttl is None else ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+        # (user, date) -> (briefing, built at)
+        self.briefings: Dict[Tuple[Optional[str], str], Tuple[Dict, float]] = {}
+        # Bumped on every change to a day, so a recompute that raced with a write is not kept
+        self.generations: Dict[Tuple[Optional[str], str], int] = {}
+        self.pending = set()
+        self.queue: "queue.Queue" = queue.Queue()
+        self.worker: Optional[threading.Thread] = None
+        self.context: Optional[contextvars.Context] = None
+
+    def start(self) -> "BriefingService":
+        """Listen for changes and compute today's briefing in the background (in the caller's context)."""
+        event_store.add_listener(self.on_change)
+        self.context = contextvars.copy_context()
+        if self.worker is None:
+            self.worker = threading.Thread(target=self._run, name="briefing-worker", daemon=True)
+            self.worker.start()
+        self.schedule(today())
+        return self
+
+    def stop(self):
+        event_store.remove_listener(self.on_change)
+        self.queue.put(None)
+
+    def schedule(self, date_str: str, context: Optional[contextvars.Context] = None):
+        """Queue a (re)computation of a day; duplicates of a queued day are dropped."""
+        key = (current_user_id(), date_str)
+        with self.lock:
+            if key in self.pending:
+                return
+            self.pending.add(key)
+        self.queue.put((key, context or contextvars.copy_context()))
+
+    def get(self, date_str: Optional[str] = None) -> Dict:
+        """The briefing for a day, computed on the spot if it is not ready yet or older than the TTL."""
+        key = (current_user_id(), date_str or today())
+        with self.lock:
+            cached = self.briefings.get(key)
+        if cached is not None and self.clock() - cached[1] < self.ttl:
+            return cached[0]
+        # Rebuilt from a fresh listing, which also notices changes made outside the app
+        return self._refresh(key)
+
+    def on_change(self, owner: Optional[str], calendar_id: str, start: Optional[float], end: Optional[float]):
+        """Event-store listener: drop and recompute the briefings of the touched days."""
+        days = _days(start, end)
+        with self.lock:
+            keys = [k for k in self.briefings if k[0] == owner and (days is None or k[1] in days)]
+            for key in keys:
+                del self.briefings[key]
+            for day in days or []:
+                self.generations[(owner, day)] = self.generations.get((owner, day), 0) + 1
+            for key in keys:
+                self.generations[key] = self.generations.get(key, 0) + 1
+        # Recompute cached days, and today even if its first computation is still running;
+        # in the writer's context so the right user's credentials are used
+        refresh = {day for _, day in keys} | ({today()} & set(days or [today()]))
+        for day in sorted(refresh):
+            self.schedule(day)
+
+    def _refresh(self, key: Tuple[Optional[str], str]) -> Dict:
+        with self.lock:
+            generation = self.generations.get(key, 0)
+        built = self.clock()
+        briefing = compute_briefing(key[1])
+        if self.synthesizer:
+            try:
+                briefing["audio"] = {kind: self.synthesizer(briefing[kind]) for kind in ("summary", "agenda")}
+            except Exception as e:
+                print(f"Briefing audio synthesis failed: {e}")
+        with self.lock:
+            if self.generations.get(key, 0) == generation:
+                self.briefings[key] = (briefing, built)
+                self._prune(key[0])
+        return briefing
+
+    def _prune(self, owner: Optional[str]):
+        oldest = (datetime.date.fromisoformat(today()) - datetime.timedelta(days=RETAIN_DAYS)).isoformat()
+        for key in [k for k in self.briefings if k[0] == owner and k[1] < oldest]:
+            del self.briefings[key]
+
+    def _seconds_to_midnight(self) -> float:
+        now = datetime.datetime.now(LOCAL_TZ)
+        midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time(), tzinfo=LOCAL_TZ)
+        return max(1.0, (midnight - now).total_seconds())
+
+    def _run(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=self._seconds_to_midnight())
+            except queue.Empty:
+                # Start of a new day: prepare it for whoever started the service
+                self.context.copy().run(self.schedule, today())
+                continue
+            if item is None:
+                return
+            key, context = item
+            with self.lock:
+                self.pending.discard(key)
+            try:
+                context.copy().run(self._refresh, key)
+            except Exception as e:
+                print(f"Briefing for {key[1]} failed: {e}")
@@ -0,0 +1,197 @@
+import os
+import time
+import heapq
+import random
+import socket
+import itertools
+import threading
+from typing import Callable, Optional
+
+from core import metering, read_cache, tracing
+
+# Central executor for Google Calendar API requests.
+# Every `request.execute()` from core/tools.py goes through here. Requests wait for a
+# token from a bucket sized to the API quota, with interactive requests (the user is
+# waiting) always served before bulk ones (imports, batch rewrites). Retryable failures
+# such as 403 rateLimitExceeded, 429 and 5xx are retried with jittered exponential backoff
+# instead of surfacing to the LLM as tool errors.
+
+# Priority lanes: lower value is served first
+INTERACTIVE = 0
+BULK = 1
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+RETRYABLE_403_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded"}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def error_status(error: Exception) -> Optional[int]:
+    """HTTP status of a googleapiclient HttpError (or anything shaped like one)."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "resp", None), "status", None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for rate limiting, server errors and dropped connections."""
+    if isinstance(error, (socket.timeout, ConnectionError, TimeoutError)):
+        return True
+    status = error_status(error)
+    if status in RETRYABLE_STATUSES:
+        return True
+    if status == 403:
+        reasons = {d.get("reason") for d in (getattr(error, "error_details", None) or []) if isinstance(d, dict)}
+        return bool(reasons & RETRYABLE_403_REASONS) or "rate limit" in str(error).lower()
+    return False
+
+
+class PriorityTokenBucket:
+    """
+    Token bucket whose waiters are served strictly by (priority, arrival).
+    Args:
+        rate: Tokens added per second
+        capacity: Maximum burst size
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+        self.waiters = []
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority: int = INTERACTIVE) -> float:
+        """Block until a token is granted; returns the seconds spent waiting."""
+        if self.rate <= 0:
+            return 0.0
+        ticket = (priority, next(self.sequence))
+        start = self.clock()
+        with self.condition:
+            heapq.heappush(self.waiters, ticket)
+            while True:
+                self._refill()
+                if self.waiters[0] == ticket and self.tokens >= 1:
+                    heapq.heappop(self.waiters)
+                    self.tokens -= 1
+                    self.condition.notify_all()
+                    return self.clock() - start
+                timeout = None if self.waiters[0] != ticket else (1 - self.tokens) / self.rate
+                self.condition.wait(timeout)
+
+
+class CalendarRequestExecutor:
+    """
+    Executes Calendar API requests with rate limiting and retries.
+    Args:
+        rate: Requests per second allowed (CALENDAR_QPS); 0 disables throttling
+        burst: Bucket capacity (CALENDAR_BURST)
+        max_retries: Retries for retryable errors (CALENDAR_MAX_RETRIES)
+        backoff_base: First backoff ceiling in seconds (CALENDAR_BACKOFF_BASE)
+        backoff_cap: Largest backoff ceiling in seconds (CALENDAR_BACKOFF_CAP)
+    """
+
+    def __init__(self, rate: float = 10.0, burst: float = 20.0, max_retries: int = 5,
+                 backoff_base: float = 0.5, backoff_cap: float = 16.0,
+                 sleep: Callable[[float], None] = time.sleep, rng: Optional[random.Random] = None):
+        self.bucket = PriorityTokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+
+    @classmethod
+    def from_env(cls) -> "CalendarRequestExecutor":
+        return cls(
+            rate=_env_float("CALENDAR_QPS", 10.0),
+            burst=_env_float("CALENDAR_BURST", 20.0),
+            max_retries=int(_env_float("CALENDAR_MAX_RETRIES", 5)),
+            backoff_base=_env_float("CALENDAR_BACKOFF_BASE", 0.5),
+            backoff_cap=_env_float("CALENDAR_BACKOFF_CAP", 16.0),
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for retry number `attempt` (0-based)."""
+        return self.rng.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def execute(self, request, lane: int = INTERACTIVE):
+        """
+        Run `request.execute()` under the rate limit, retrying transient failures.
+        Args:
+            request: googleapiclient HttpRequest (or BatchHttpRequest)
+            lane: INTERACTIVE or BULK
+        """
+        # Identical interactive reads within a turn share one request (see core/read_cache.py);
+        # bulk reads such as export pages are streamed, not held
+        return read_cache.execute(request, lambda: self._execute(request, lane), cacheable=lane == INTERACTIVE)
+
+    def _execute(self, request, lane: int):
+        # One import or export legitimately issues many bulk requests, so only interactive
+        # requests count against the per-turn budget
+        counter = "calendar_calls"
+        if lane == BULK:
+            counter = "calendar_bulk_calls"
+        else:
+            metering.check_calendar_budget()
+        attempt = 0
+        while True:
+            waited = self.bucket.acquire(lane)
+            if waited > 0.001:
+                metering.record("calendar_throttled")
+                metering.record("calendar_throttle_seconds", waited)
+            metering.record(counter)
+            try:
+                with tracing.span("calendar.request", lane="bulk" if lane == BULK else "interactive", attempt=attempt):
+                    return request.execute()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    if is_retryable(e):
+                        metering.record("calendar_retry_exhausted")
+                    raise
+                delay = self.backoff(attempt)
+                metering.record("calendar_retries")
+                attempt += 1
+                self.sleep(delay)
+
+
+_default_executor: Optional[CalendarRequestExecutor] = None
+_default_lock = threading.Lock()
+
+
+def get_executor() -> CalendarRequestExecutor:
+    """The process-wide executor, configured from the environment on first use."""
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = CalendarRequestExecutor.from_env()
+        return _default_executor
+
+
+def set_executor(executor: Optional[CalendarRequestExecutor]):
+    """Replace the process-wide executor (e.g. with different limits in a benchmark)."""
+    global _default_executor
+    with _default_lock:
+        _default_executor = executor
+
+
+def execute(request, lane: int = INTERACTIVE):
+    """Execute a Calendar request through the process-wide executor."""
+    return get_executor().execute(request, lane)
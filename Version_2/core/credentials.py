@@ -0,0 +1,47 @@
+import os
+import contextlib
+from contextvars import ContextVar
+from typing import NamedTuple, Optional
+
+# Per-user Google credentials.
+# The Streamlit app serves one user from GOOGLE_* environment variables. The backend
+# service (Version_2/service) serves many, so it binds each request's credentials to a
+# context variable that get_calendar_service() reads before falling back to the env.
+
+
+class CalendarCredentials(NamedTuple):
+    client_id: str
+    client_secret: str
+    refresh_token: str
+
+
+_current: ContextVar[Optional[CalendarCredentials]] = ContextVar("calendar_credentials", default=None)
+_user_id: ContextVar[Optional[str]] = ContextVar("calendar_user_id", default=None)
+
+
+def from_env() -> Optional[CalendarCredentials]:
+    """Credentials from GOOGLE_CLIENT_ID / GOOGLE_CLIENT_SECRET / GOOGLE_REFRESH_TOKEN, if all are set."""
+    values = [os.environ.get(k) for k in ("GOOGLE_CLIENT_ID", "GOOGLE_CLIENT_SECRET", "GOOGLE_REFRESH_TOKEN")]
+    return CalendarCredentials(*values) if all(values) else None
+
+
+def current_credentials() -> Optional[CalendarCredentials]:
+    """Credentials bound to the current context, else the environment's."""
+    return _current.get() or from_env()
+
+
+def current_user_id() -> Optional[str]:
+    """User bound by `use_credentials`, or None in single-user mode."""
+    return _user_id.get()
+
+
+@contextlib.contextmanager
+def use_credentials(credentials: Optional[CalendarCredentials], user_id: Optional[str] = None):
+    """Bind `credentials` (and the owning user) for Calendar calls made inside the block, including tool threads."""
+    token = _current.set(credentials)
+    user_token = _user_id.set(user_id)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+        _user_id.reset(user_token)
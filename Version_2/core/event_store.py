@@ -0,0 +1,262 @@
+import os
+import time
+import datetime
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.credentials import current_user_id
+from core.interval_index import IntervalIndex
+
+# In-memory copy of recently fetched Calendar events, indexed for overlap queries.
+# Every successful events.list over a window is loaded here together with the window it
+# covers. While a window is fresh (EVENT_CACHE_TTL seconds), listing, availability checks
+# and conflict detection inside it are answered from the interval index without an API
+# call. Writes made through the tools update the store incrementally and notify change
+# listeners (e.g. the daily briefing) with the time range they touched. The recurring
+# events behind listed instances are kept too, for series-aware listings, and so is the
+# user's calendar list.
+
+# Scheduling happens in IST (see the system prompt); all-day dates start at local midnight
+LOCAL_TZ = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+EVENT_CACHE_TTL = float(os.environ.get("EVENT_CACHE_TTL", 60))
+
+
+def parse_time(value: str) -> datetime.datetime:
+    """
+    Timezone-aware datetime for an ISO timestamp or an all-day date (local midnight).
+    A naive timestamp is local time: the agent schedules in IST and often leaves the offset out.
+    """
+    parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=LOCAL_TZ)
+
+
+def event_time(value: Dict) -> datetime.datetime:
+    """Start or end of an event from its {'dateTime': ...} or {'date': ...} field."""
+    return parse_time(value.get('dateTime') or value.get('date'))
+
+
+def event_start(event: Dict) -> datetime.datetime:
+    return event_time(event['start'])
+
+
+def event_bounds(event: Dict) -> Tuple[float, float]:
+    """Event as epoch seconds [start, end); all-day and multi-day end dates are already exclusive."""
+    return event_time(event['start']).timestamp(), event_time(event['end']).timestamp()
+
+
+def _seconds(value: str) -> float:
+    return parse_time(value).timestamp()
+
+
+# Called as listener(owner, calendar_id, start, end) after a write, or after a reload found
+# events changed outside the app; start/end are epoch seconds of the affected range, or
+# None for "everything" (e.g. after a bulk import)
+ChangeListener = Callable[[Optional[str], str, Optional[float], Optional[float]], None]
+_listeners: List[ChangeListener] = []
+
+
+def add_listener(listener: ChangeListener):
+    """Be told about every event written, deleted or found changed by any store."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_listener(listener: ChangeListener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+class EventStore:
+    """
+    Events per calendar with an interval index and the time windows known to be complete.
+    Args:
+        ttl: Seconds a fetched window is trusted (default EVENT_CACHE_TTL); 0 disables serving from the store
+        owner: User the store belongs to, passed to change listeners
+    """
+
+    def __init__(self, ttl: Optional[float] = None, clock=time.monotonic, owner: Optional[str] = None):
+        self.ttl = EVENT_CACHE_TTL if ttl is None else ttl
+        self.owner = owner
+        self.clock = clock
+        self.lock = threading.RLock()
+        self.events: Dict[Tuple[str, str], Dict] = {}
+        self.indexes: Dict[str, IntervalIndex] = {}
+        # calendar_id -> [(start, end, fetched_at)] windows loaded from the API
+        self.coverage: Dict[str, List[Tuple[float, float, float]]] = {}
+        # (calendar_id, series id) -> (recurring event, fetched_at); listings hold only instances
+        self.masters: Dict[Tuple[str, str], Tuple[Dict, float]] = {}
+        # (calendarList items, fetched_at)
+        self.calendars: Optional[Tuple[List[Dict], float]] = None
+
+    def _index(self, calendar_id: str) -> IntervalIndex:
+        return self.indexes.setdefault(calendar_id, IntervalIndex())
+
+    def load(self, calendar_id: str, time_min: str, time_max: str, events: Iterable[Dict]):
+        """
+        Replace what is known about [time_min, time_max) with a fresh listing, and tell the
+        listeners about events that changed since the window was last listed.
+        Args:
+            calendar_id: Calendar the events came from
+            time_min: Start of the listed window (ISO)
+            time_max: End of the listed window (ISO)
+            events: Every event the API returned for the window
+        """
+        lo, hi = _seconds(time_min), _seconds(time_max)
+        with self.lock:
+            index = self._index(calendar_id)
+            before = {}
+            for event_id in index.overlapping(lo, hi):
+                before[event_id] = self.events.get((calendar_id, event_id))
+                index.remove(event_id)
+                self.events.pop((calendar_id, event_id), None)
+            for event in events:
+                self._put(calendar_id, event)
+            # Windows listed before, stale ones included: new events there were added outside the app
+            known = [(s, e) for s, e, _ in self.coverage.get(calendar_id, [])]
+            changed = self._changes(calendar_id, before, index.overlapping(lo, hi), known)
+            now = self.clock()
+            fresh = [w for w in self.coverage.get(calendar_id, []) if now - w[2] < self.ttl]
+            self.coverage[calendar_id] = fresh + [(lo, hi, now)]
+        self._notify(calendar_id, changed)
+
+    def _changes(self, calendar_id: str, before: Dict[str, Dict], after: Iterable[str],
+                 known: List[Tuple[float, float]]) -> set:
+        """Ranges of events a reload added, moved, edited or dropped."""
+        changed = set()
+        for event_id in set(before) | set(after):
+            old, new = before.get(event_id), self.events.get((calendar_id, event_id))
+            if old is None:
+                bounds = event_bounds(new)
+                if any(s < bounds[1] and bounds[0] < e for s, e in known):
+                    changed.add(bounds)
+            elif new is None:
+                changed.add(event_bounds(old))
+            elif (old.get('etag'), old.get('updated')) != (new.get('etag'), new.get('updated')) \
+                    or event_bounds(old) != event_bounds(new):
+                changed |= {event_bounds(old), event_bounds(new)}
+        return changed
+
+    def covers(self, calendar_id: str, time_min: str, time_max: str) -> bool:
+        """True if [time_min, time_max) lies inside windows fetched within the TTL."""
+        if self.ttl <= 0:
+            return False
+        lo, hi = _seconds(time_min), _seconds(time_max)
+        now = self.clock()
+        with self.lock:
+            windows = sorted((s, e) for s, e, at in self.coverage.get(calendar_id, []) if now - at < self.ttl)
+        for start, end in windows:
+            if start > lo:
+                return False
+            lo = max(lo, end)
+            if lo >= hi:
+                return True
+        return lo >= hi
+
+    def _put(self, calendar_id: str, event: Dict):
+        if event.get('status') == 'cancelled':
+            self._discard(calendar_id, event['id'])
+            return
+        start, end = event_bounds(event)
+        self._index(calendar_id).add(event['id'], start, end)
+        self.events[(calendar_id, event['id'])] = event
+
+    def _discard(self, calendar_id: str, event_id: str):
+        self._index(calendar_id).remove(event_id)
+        self.events.pop((calendar_id, event_id), None)
+
+    def _bounds(self, calendar_id: str, event_id: str) -> Optional[Tuple[float, float]]:
+        event = self.events.get((calendar_id, event_id))
+        return event_bounds(event) if event else None
+
+    def _notify(self, calendar_id: str, ranges: Iterable[Optional[Tuple[float, float]]]):
+        for bounds in ranges:
+            if bounds is None:
+                continue
+            for listener in list(_listeners):
+                listener(self.owner, calendar_id, *bounds)
+
+    def put(self, calendar_id: str, event: Dict):
+        """Insert or update one event after a write."""
+        with self.lock:
+            before = self._bounds(calendar_id, event['id'])
+            self._put(calendar_id, event)
+            after = self._bounds(calendar_id, event['id'])
+        # A moved event changes both the day it left and the day it landed on
+        self._notify(calendar_id, {before, after})
+
+    def discard(self, calendar_id: str, event_id: str):
+        """Forget one event after a delete."""
+        with self.lock:
+            before = self._bounds(calendar_id, event_id)
+            self._discard(calendar_id, event_id)
+        self._notify(calendar_id, [before])
+
+    def master(self, calendar_id: str, series_id: str) -> Optional[Dict]:
+        """The recurring event behind a series, if fetched within the TTL."""
+        with self.lock:
+            cached = self.masters.get((calendar_id, series_id))
+        if cached is None or self.clock() - cached[1] >= self.ttl:
+            return None
+        return dict(cached[0])
+
+    def put_master(self, calendar_id: str, event: Dict):
+        with self.lock:
+            self.masters[(calendar_id, event['id'])] = (event, self.clock())
+
+    def calendar_list(self) -> Optional[List[Dict]]:
+        """The user's calendar list, if fetched within the TTL."""
+        with self.lock:
+            cached = self.calendars
+        if cached is None or self.clock() - cached[1] >= self.ttl:
+            return None
+        return list(cached[0])
+
+    def put_calendar_list(self, calendars: List[Dict]):
+        with self.lock:
+            self.calendars = (list(calendars), self.clock())
+
+    def overlapping(self, calendar_id: str, time_min: str, time_max: str) -> List[Dict]:
+        """Copies of the calendar's events overlapping the window, in start order."""
+        with self.lock:
+            ids = self._index(calendar_id).overlapping(_seconds(time_min), _seconds(time_max))
+            return [dict(self.events[(calendar_id, event_id)]) for event_id in ids]
+
+    def conflicts(self, calendar_id: str, candidates: Iterable[Tuple[str, str]]) -> List[List[Dict]]:
+        """For each (start, end) candidate, copies of the events it would overlap."""
+        with self.lock:
+            index = self._index(calendar_id)
+            hits = index.conflicts((_seconds(start), _seconds(end)) for start, end in candidates)
+            return [[dict(self.events[(calendar_id, event_id)]) for event_id in ids] for ids in hits]
+
+    def forget(self, calendar_id: str):
+        """Drop everything known about one calendar (e.g. after a bulk import)."""
+        with self.lock:
+            self.indexes.pop(calendar_id, None)
+            self.coverage.pop(calendar_id, None)
+            for key in [k for k in self.events if k[0] == calendar_id]:
+                del self.events[key]
+            for key in [k for k in self.masters if k[0] == calendar_id]:
+                del self.masters[key]
+        self._notify(calendar_id, [(None, None)])
+
+    def clear(self):
+        with self.lock:
+            self.events.clear()
+            self.indexes.clear()
+            self.coverage.clear()
+            self.masters.clear()
+            self.calendars = None
+
+
+_stores: Dict[Optional[str], EventStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store() -> EventStore:
+    """The event store of the current user (one shared store in single-user mode)."""
+    user_id = current_user_id()
+    with _stores_lock:
+        store = _stores.get(user_id)
+        if store is None:
+            store = _stores[user_id] = EventStore(owner=user_id)
+        return store
@@ -0,0 +1,174 @@
+import os
+import time
+import threading
+from typing import Dict, List, Optional
+
+import httpx
+
+from core import metering
+
+# Process-wide pooled HTTP clients for the chat model, Whisper and TTS.
+# Library defaults either open a connection per request (gTTS) or drop idle connections
+# after 5 seconds (httpx), so nearly every turn paid a fresh TCP + TLS handshake to the
+# same few hosts. One long-lived client per service keeps connections alive between turns,
+# uses HTTP/2 when the optional `h2` package is installed, sets explicit timeouts and can
+# pre-connect at startup. Each request is traced (httpcore's trace extension) to count new
+# connections and time to first byte, so the reuse rate can be reported.
+
+HTTP_KEEPALIVE = float(os.environ.get("HTTP_KEEPALIVE", 120))         # seconds an idle connection is kept
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", 32))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5))
+
+# name -> (read timeout in seconds, hosts to pre-connect)
+SERVICES = {
+    "llm": (float(os.environ.get("LLM_READ_TIMEOUT", 90)), ["https://router.huggingface.co"]),
+    "hf": (float(os.environ.get("STT_READ_TIMEOUT", 60)), ["https://router.huggingface.co"]),
+    "tts": (float(os.environ.get("TTS_READ_TIMEOUT", 20)), ["https://translate.google.com"]),
+}
+
+
+def http2_available() -> bool:
+    if os.environ.get("HTTP2", "1").lower() in ("0", "false", "no"):
+        return False
+    try:
+        import h2  # noqa: F401  (httpx[http2])
+        return True
+    except ImportError:
+        return False
+
+
+class ConnectionStats:
+    """Requests, new connections and time to first byte of one client."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.first_byte: List[float] = []
+
+    def tracer(self):
+        """httpcore trace callback for one request."""
+        started = time.perf_counter()
+
+        def trace(event: str, info: Dict):
+            if event == "connection.connect_tcp.complete":
+                with self.lock:
+                    self.connections += 1
+                metering.record("http_new_connections")
+            elif event.endswith(".receive_response_headers.complete"):
+                with self.lock:
+                    self.first_byte.append(time.perf_counter() - started)
+                    del self.first_byte[:-1000]
+        return trace
+
+    def to_dict(self) -> Dict[str, float]:
+        with self.lock:
+            ordered = sorted(self.first_byte)
+            return {"requests": self.requests, "new_connections": self.connections,
+                    "reuse_rate": 1 - self.connections / self.requests if self.requests else 0.0,
+                    "first_byte_p50": ordered[len(ordered) // 2] if ordered else None}
+
+
+_clients: Dict[str, httpx.Client] = {}
+_stats: Dict[str, ConnectionStats] = {}
+_lock = threading.Lock()
+
+
+def _timeout(name: str) -> httpx.Timeout:
+    read = SERVICES.get(name, (60.0, []))[0]
+    return httpx.Timeout(connect=HTTP_CONNECT_TIMEOUT, read=read, write=30.0, pool=HTTP_CONNECT_TIMEOUT)
+
+
+def build_client(name: str, event_hooks: Optional[Dict] = None, **kwargs) -> httpx.Client:
+    """
+    A pooled client whose requests are counted under `name`.
+    Args:
+        name: Service name for stats and timeouts, e.g. 'llm'
+        event_hooks: Extra httpx event hooks to run before ours
+        kwargs: Overrides for httpx.Client
+    """
+    stats = _stats.setdefault(name, ConnectionStats())
+
+    def on_request(request: httpx.Request):
+        with stats.lock:
+            stats.requests += 1
+        metering.record("http_requests")
+        request.extensions["trace"] = stats.tracer()
+
+    hooks = {"request": list((event_hooks or {}).get("request", [])) + [on_request],
+             "response": list((event_hooks or {}).get("response", []))}
+    config = dict(
+        http2=http2_available(),
+        timeout=_timeout(name),
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                            keepalive_expiry=HTTP_KEEPALIVE),
+        event_hooks=hooks,
+    )
+    config.update(kwargs)
+    return httpx.Client(**config)
+
+
+def _new_client(name: str) -> httpx.Client:
+    if name == "hf":
+        # huggingface_hub's own request hook (offline mode, request ids) must stay on its client
+        from huggingface_hub.utils._http import hf_request_event_hook
+        return build_client(name, {"request": [hf_request_event_hook]}, follow_redirects=True)
+    return build_client(name)
+
+
+def get_client(name: str) -> httpx.Client:
+    """The shared client for a service, created on first use."""
+    with _lock:
+        client = _clients.get(name)
+        # huggingface_hub closes its session at exit and after fork; build a new one then
+        if client is None or client.is_closed:
+            client = _clients[name] = _new_client(name)
+        return client
+
+
+def install_hf_client():
+    """Route huggingface_hub (InferenceClient, Whisper) through the pooled 'hf' client."""
+    from huggingface_hub import set_client_factory
+    set_client_factory(lambda: get_client("hf"))
+
+
+def preconnect(urls: Optional[Dict[str, List[str]]] = None, wait: bool = False) -> List[threading.Thread]:
+    """
+    Open a connection to each service's hosts in the background, so the first turn skips the handshake.
+    Args:
+        urls: {service name: [base URLs]}; defaults to SERVICES
+        wait: Block until every attempt has finished
+    """
+    if os.environ.get("HTTP_PRECONNECT", "1").lower() in ("0", "false", "no"):
+        return []
+    urls = urls or {name: hosts for name, (_, hosts) in SERVICES.items()}
+
+    def connect(name, url):
+        try:
+            # Any response will do: the point is the pooled TCP + TLS connection
+            get_client(name).head(url)
+        except httpx.HTTPError as e:
+            print(f"Pre-connect to {url} failed: {e}")
+
+    threads = [threading.Thread(target=connect, args=(name, url), daemon=True, name=f"preconnect-{name}")
+               for name, hosts in urls.items() for url in hosts]
+    for thread in threads:
+        thread.start()
+    if wait:
+        for thread in threads:
+            thread.join()
+    return threads
+
+
+def stats() -> Dict[str, Dict[str, float]]:
+    """Connection reuse and first-byte latency per service."""
+    with _lock:
+        names = list(_stats)
+    return {name: _stats[name].to_dict() for name in names}
+
+
+def close():
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -0,0 +1,352 @@
+import re
+import hashlib
+import datetime
+import functools
+from zoneinfo import ZoneInfo
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from core import calendar_client
+
+# Streaming iCalendar (RFC 5545) import and export.
+# The reader unfolds and parses one content line at a time and yields one VEVENT at a
+# time, so a file with tens of thousands of events never sits in memory as a whole.
+# Imports go through events.import in batched HTTP requests on the BULK lane; the iCalUID
+# is the idempotency key, so importing the same file twice updates rather than duplicates.
+# Exports page through events.list and write each page as it arrives.
+
+DEFAULT_TIMEZONE = "Asia/Kolkata"
+BATCH_SIZE = 50        # Google's recommended upper bound per batch request
+EXPORT_PAGE_SIZE = 2500
+RECURRENCE_PROPERTIES = ("RRULE", "EXRULE", "RDATE", "EXDATE")
+MAX_REPORTED_ERRORS = 10
+
+Property = Tuple[Dict[str, str], str]  # (parameters, raw value)
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def unfold(lines: Iterable[str]) -> Iterator[str]:
+    """Join folded continuation lines (those starting with a space or tab)."""
+    current = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def parse_line(line: str) -> Tuple[str, Dict[str, str], str]:
+    """Split a content line into (NAME, {PARAM: value}, value)."""
+    in_quotes, colon = False, len(line)
+    for i, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ":" and not in_quotes:
+            colon = i
+            break
+    head, value = line[:colon], line[colon + 1:]
+    parts = re.findall(r'(?:[^;"]|"[^"]*")+', head)
+    params = {}
+    for part in parts[1:]:
+        key, _, param_value = part.partition("=")
+        params[key.upper()] = param_value.strip('"')
+    return (parts[0] if parts else "").upper(), params, value
+
+
+def unescape(value: str) -> str:
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+def iter_vevents(fp: TextIO) -> Iterator[Dict[str, List[Property]]]:
+    """Yield each VEVENT as {NAME: [(params, value), ...]}; nested components (VALARM) are skipped."""
+    event, depth = None, 0
+    for line in unfold(fp):
+        if not line:
+            continue
+        name, params, value = parse_line(line)
+        if name == "BEGIN":
+            if value.upper() == "VEVENT" and event is None:
+                event, depth = {}, 0
+            elif event is not None:
+                depth += 1
+        elif name == "END":
+            if event is not None and depth:
+                depth -= 1
+            elif event is not None and value.upper() == "VEVENT":
+                yield event
+                event = None
+        elif event is not None and not depth:
+            event.setdefault(name, []).append((params, value))
+
+
+_DATE_TIME = re.compile(r"^\d{8}T\d{6}Z?$")
+
+
+@functools.lru_cache(maxsize=64)
+def _zone(tzid: Optional[str]) -> str:
+    """IANA zone for a TZID; unknown names (e.g. Windows zone names) fall back to the default."""
+    try:
+        ZoneInfo(tzid)
+        return tzid
+    except Exception:
+        return DEFAULT_TIMEZONE
+
+
+def _time(prop: Property) -> Dict[str, str]:
+    """DTSTART/DTEND/RECURRENCE-ID as a Calendar {'date'} or {'dateTime', 'timeZone'} field."""
+    params, value = prop
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return {"date": datetime.datetime.strptime(value, "%Y%m%d").date().isoformat()}
+    if not _DATE_TIME.match(value):
+        raise ValueError(f"Invalid DATE-TIME: {value}")
+    stamp = f"{value[:4]}-{value[4:6]}-{value[6:8]}T{value[9:11]}:{value[11:13]}:{value[13:15]}"
+    if value.endswith("Z"):
+        return {"dateTime": stamp + "Z"}
+    # Local time in the named zone, or floating time (interpreted in the default zone)
+    return {"dateTime": stamp, "timeZone": _zone(params.get("TZID"))}
+
+
+_DURATION = re.compile(r"([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+
+
+def _add_duration(start: Dict[str, str], duration: str) -> Dict[str, str]:
+    match = _DURATION.match(duration.strip())
+    if not match:
+        raise ValueError(f"Invalid DURATION: {duration}")
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    delta = datetime.timedelta(weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+                               minutes=int(minutes or 0), seconds=int(seconds or 0))
+    if sign == "-":
+        delta = -delta
+    if "date" in start:
+        return {"date": (datetime.date.fromisoformat(start["date"]) + delta).isoformat()}
+    end = datetime.datetime.fromisoformat(start["dateTime"].replace("Z", "+00:00")) + delta
+    value = end.strftime("%Y-%m-%dT%H:%M:%S") + ("Z" if start["dateTime"].endswith("Z") else "")
+    return dict(start, dateTime=value)
+
+
+def _text(vevent: Dict[str, List[Property]], name: str) -> Optional[str]:
+    props = vevent.get(name)
+    return unescape(props[0][1]) if props else None
+
+
+def _line(name: str, params: Dict[str, str], value: str) -> str:
+    head = "".join(f";{k}={v}" for k, v in params.items())
+    return f"{name}{head}:{value}"
+
+
+def _uid(vevent: Dict[str, List[Property]]) -> str:
+    """The event's UID; events without one get a stable UID derived from their content."""
+    uid = _text(vevent, "UID")
+    if uid:
+        return uid
+    material = "|".join(str(vevent.get(name, "")) for name in ("SUMMARY", "DTSTART", "DTEND", "DURATION"))
+    return hashlib.sha1(material.encode()).hexdigest() + "@ics-import"
+
+
+def dedup_key(vevent: Dict[str, List[Property]]) -> str:
+    """UID plus RECURRENCE-ID, so a recurring event and its modified instances stay distinct."""
+    uid = _uid(vevent)
+    recurrence_id = vevent.get("RECURRENCE-ID")
+    return uid if not recurrence_id else f"{uid}#{recurrence_id[0][1]}"
+
+
+def vevent_to_event(vevent: Dict[str, List[Property]]) -> Dict:
+    """Map a parsed VEVENT onto a Calendar events resource for events.import."""
+    if "DTSTART" not in vevent:
+        raise ValueError("VEVENT without DTSTART")
+    start = _time(vevent["DTSTART"][0])
+    if "DTEND" in vevent:
+        end = _time(vevent["DTEND"][0])
+    elif "DURATION" in vevent:
+        end = _add_duration(start, vevent["DURATION"][0][1])
+    else:
+        # RFC 5545: a date lasts one day, a date-time has no duration
+        end = _add_duration(start, "P1D") if "date" in start else dict(start)
+
+    event = {"iCalUID": _uid(vevent), "start": start, "end": end}
+    for name, field in (("SUMMARY", "summary"), ("DESCRIPTION", "description"), ("LOCATION", "location")):
+        value = _text(vevent, name)
+        if value is not None:
+            event[field] = value
+    status = (_text(vevent, "STATUS") or "").lower()
+    if status in ("confirmed", "tentative", "cancelled"):
+        event["status"] = status
+    if (_text(vevent, "TRANSP") or "").upper() == "TRANSPARENT":
+        event["transparency"] = "transparent"
+    recurrence = [_line(name, params, value) for name in RECURRENCE_PROPERTIES for params, value in vevent.get(name, [])]
+    if recurrence:
+        event["recurrence"] = recurrence
+    if "RECURRENCE-ID" in vevent:
+        event["originalStartTime"] = _time(vevent["RECURRENCE-ID"][0])
+    return event
+
+
+def import_events(service, fp: TextIO, calendar_id: str = "primary", batch_size: int = BATCH_SIZE,
+                  progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Stream VEVENTs from `fp` into a calendar with batched events.import requests.
+    Args:
+        service: Calendar API service
+        fp: Open text file with iCalendar data
+        calendar_id: Target calendar
+        batch_size: Imports per batch request
+        progress: Called with the running stats after every batch
+    """
+    stats = {"parsed": 0, "imported": 0, "duplicates": 0, "failed": 0, "batches": 0, "errors": []}
+    # 8-byte digests keep the seen-set small even for very large files
+    seen = set()
+    pending: List[Tuple[str, Dict]] = []
+
+    def fail(key: str, error: Exception):
+        stats["failed"] += 1
+        if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+            stats["errors"].append({"uid": key, "error": str(error)})
+
+    for vevent in iter_vevents(fp):
+        stats["parsed"] += 1
+        key = dedup_key(vevent)
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        if digest in seen:
+            stats["duplicates"] += 1
+            continue
+        seen.add(digest)
+        try:
+            pending.append((key, vevent_to_event(vevent)))
+        except ValueError as e:
+            fail(key, e)
+        if len(pending) >= batch_size:
+            _import_batch(service, calendar_id, pending, stats, fail)
+            pending = []
+            if progress:
+                progress(stats)
+    if pending:
+        _import_batch(service, calendar_id, pending, stats, fail)
+        if progress:
+            progress(stats)
+    return stats
+
+
+def _import_batch(service, calendar_id: str, items: List[Tuple[str, Dict]], stats: Dict, fail: Callable):
+    """Send one batch; items that hit a retryable error are resent with backoff."""
+    executor = calendar_client.get_executor()
+    attempt = 0
+    while items:
+        retry = []
+
+        def callback(request_id, response, exception):
+            key, body = items[int(request_id)]
+            if exception is None:
+                stats["imported"] += 1
+            elif calendar_client.is_retryable(exception) and attempt < executor.max_retries:
+                retry.append((key, body))
+            else:
+                fail(key, exception)
+
+        batch = service.new_batch_http_request(callback=callback)
+        for i, (key, body) in enumerate(items):
+            batch.add(service.events().import_(calendarId=calendar_id, body=body), request_id=str(i))
+        executor.execute(batch, calendar_client.BULK)
+        stats["batches"] += 1
+        items = retry
+        if items:
+            executor.sleep(executor.backoff(attempt))
+            attempt += 1
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def fold(line: str) -> str:
+    """Fold a content line at 75 octets without splitting UTF-8 sequences."""
+    data = line.encode()
+    if len(data) <= 75:
+        return line + "\r\n"
+    chunks, limit = [], 75
+    while data:
+        cut = min(limit, len(data))
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        chunks.append(data[:cut].decode())
+        data = data[cut:]
+        limit = 74  # continuation lines start with a space
+    return "\r\n ".join(chunks) + "\r\n"
+
+
+def _format_time(name: str, value: Dict[str, str]) -> str:
+    if "date" in value and "dateTime" not in value:
+        return f"{name};VALUE=DATE:{value['date'].replace('-', '')}"
+    stamp = datetime.datetime.fromisoformat(value["dateTime"].replace("Z", "+00:00"))
+    zone = value.get("timeZone")
+    if zone and _zone(zone) == zone:
+        # Keep the wall-clock time and zone so recurrences stay correct across DST changes
+        local = stamp.astimezone(ZoneInfo(zone)) if stamp.tzinfo else stamp
+        return f"{name};TZID={zone}:{local:%Y%m%dT%H%M%S}"
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=ZoneInfo(DEFAULT_TIMEZONE))
+    return f"{name}:{stamp.astimezone(datetime.timezone.utc):%Y%m%dT%H%M%SZ}"
+
+
+def event_to_vevent(event: Dict, stamp: str) -> Iterator[str]:
+    """Content lines of one Calendar event as a VEVENT."""
+    yield "BEGIN:VEVENT"
+    yield f"UID:{event.get('iCalUID') or event['id']}"
+    yield f"DTSTAMP:{stamp}"
+    yield _format_time("DTSTART", event["start"])
+    yield _format_time("DTEND", event["end"])
+    if event.get("originalStartTime"):
+        yield _format_time("RECURRENCE-ID", event["originalStartTime"])
+    for field, name in (("summary", "SUMMARY"), ("description", "DESCRIPTION"), ("location", "LOCATION")):
+        if event.get(field):
+            yield f"{name}:{escape(event[field])}"
+    if event.get("status") in ("confirmed", "tentative", "cancelled"):
+        yield f"STATUS:{event['status'].upper()}"
+    if event.get("transparency") == "transparent":
+        yield "TRANSP:TRANSPARENT"
+    yield from event.get("recurrence", [])
+    yield "END:VEVENT"
+
+
+def export_events(service, fp: TextIO, calendar_id: str = "primary", time_min: Optional[str] = None,
+                  time_max: Optional[str] = None, progress: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Write a calendar as iCalendar, one events.list page at a time. Returns the number of events.
+    Recurring events are written once with their RRULE and exceptions, not expanded.
+    Args:
+        service: Calendar API service
+        fp: Open text file to write to
+        calendar_id: Calendar to export
+        time_min: Optional lower bound (ISO)
+        time_max: Optional upper bound (ISO)
+        progress: Called with the running event count after every page
+    """
+    stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    fp.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//AI Scheduling Agent//Calendar Export//EN\r\n")
+    count, page_token = 0, None
+    while True:
+        page = calendar_client.execute(service.events().list(
+            calendarId=calendar_id, timeMin=time_min, timeMax=time_max, singleEvents=False,
+            maxResults=EXPORT_PAGE_SIZE, pageToken=page_token), calendar_client.BULK)
+        for event in page.get("items", []):
+            fp.writelines(fold(line) for line in event_to_vevent(event, stamp))
+            count += 1
+        if progress:
+            progress(count)
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            break
+    fp.write("END:VCALENDAR\r\n")
+    return count
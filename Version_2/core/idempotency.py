@@ -0,0 +1,136 @@
+import os
+import time
+import base64
+import hashlib
+import datetime
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+
+from core import metering
+from core.credentials import current_user_id
+from core.event_store import LOCAL_TZ, EventStore, parse_time
+
+# Idempotent event creation.
+# The agent sometimes repeats create_event after an ambiguous result, e.g. first with a
+# naive time and then with the same time and a "Z". Every create is keyed by a request key
+# derived from the calendar, the normalized summary and the local wall-clock start/end
+# (see key_time). The key becomes the event's client-supplied ID, so the API itself rejects
+# a second insert (409). Before writing we also check a recent-writes table (concurrent or
+# repeated calls in this process) and the event store (the event is already known), so a
+# retry returns the existing event.
+# Deleting an event drops it from the recent-writes table, so it can be created again.
+
+CANONICAL_TZ = datetime.timezone.utc
+RECENT_WRITES_TTL = float(os.environ.get("RECENT_WRITES_TTL", 600))
+KEY_PROPERTY = "requestKey"
+
+
+def normalize_time(value: str) -> str:
+    """ISO timestamp in the canonical timezone; a naive time is local (event_store.parse_time)."""
+    return parse_time(value).astimezone(CANONICAL_TZ).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def key_time(value: str) -> str:
+    """
+    Local wall-clock time a create asks for, as it goes into the request key.
+    Naive and "Z" forms keep their digits: the agent writes local times and sometimes appends
+    a "Z" when it retries, so both spellings name the same event. Other offsets are converted.
+    """
+    if value.endswith(("Z", "z")):
+        value = value[:-1]
+    return parse_time(value).astimezone(LOCAL_TZ).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def normalize_summary(summary: str) -> str:
+    return " ".join((summary or "").casefold().split())
+
+
+def request_key(calendar_id: str, summary: str, start_time: str, end_time: str) -> str:
+    """Deterministic key for creating this event; equal for retries of the same request."""
+    material = "|".join((calendar_id, normalize_summary(summary), key_time(start_time), key_time(end_time)))
+    return hashlib.sha256(material.encode()).hexdigest()[:32]
+
+
+def event_id(key: str) -> str:
+    """Calendar event ID for a request key (IDs must use base32hex characters a-v and 0-9)."""
+    return base64.b32hexencode(bytes.fromhex(key)).decode().lower().rstrip("=")
+
+
+def find_existing(store: EventStore, calendar_id: str, key: str, summary: str,
+                  start_time: str, end_time: str) -> Optional[Dict]:
+    """An event already in the store that this request would duplicate, if any."""
+    start, end = normalize_time(start_time), normalize_time(end_time)
+    for event in store.overlapping(calendar_id, start, end):
+        private = event.get("extendedProperties", {}).get("private", {})
+        if private.get(KEY_PROPERTY) == key:
+            return event
+        event_start, event_end = event.get("start", {}).get("dateTime"), event.get("end", {}).get("dateTime")
+        if event_start and event_end and normalize_summary(event.get("summary")) == normalize_summary(summary) \
+                and normalize_time(event_start) == start and normalize_time(event_end) == end:
+            return event
+    return None
+
+
+class RecentWrites:
+    """
+    Results of recent writes by request key; a repeat within the TTL gets the first result.
+    Args:
+        ttl: Seconds a finished write is remembered
+    """
+
+    def __init__(self, ttl: float = RECENT_WRITES_TTL, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries: Dict[Tuple[Optional[str], str], Tuple[Future, float]] = {}
+
+    def run_once(self, key: str, write: Callable[[], Dict]) -> Tuple[Dict, bool]:
+        """
+        Run `write()` unless the same key was written recently or is being written now.
+        Returns (result, True) for a fresh write and (earlier result, False) for a repeat.
+        """
+        entry_key = (current_user_id(), key)
+        now = self.clock()
+        with self.lock:
+            for stale in [k for k, (f, at) in self.entries.items() if f.done() and now - at > self.ttl]:
+                del self.entries[stale]
+            entry = self.entries.get(entry_key)
+            owner = entry is None
+            if owner:
+                future = Future()
+                self.entries[entry_key] = (future, now)
+            else:
+                future = entry[0]
+        if not owner:
+            metering.record("duplicate_writes_avoided")
+            return future.result(), False
+
+        try:
+            result = write()
+        except BaseException as e:
+            with self.lock:
+                # Failed writes are not remembered; the next attempt tries again
+                self.entries.pop(entry_key, None)
+            future.set_exception(e)
+            raise
+        with self.lock:
+            self.entries[entry_key] = (future, self.clock())
+        future.set_result(result)
+        return result, True
+
+    def forget_event(self, event_id: str):
+        """Drop the current user's finished writes that produced `event_id` (e.g. after it was deleted)."""
+        user_id = current_user_id()
+        with self.lock:
+            for entry_key, (future, _) in list(self.entries.items()):
+                if entry_key[0] != user_id or not future.done() or future.exception() is not None:
+                    continue
+                result = future.result()
+                # create_event remembers (event, created) pairs
+                event = result[0] if isinstance(result, tuple) else result
+                if isinstance(event, dict) and event.get("id") == event_id:
+                    del self.entries[entry_key]
+
+
+recent_writes = RecentWrites()
@@ -0,0 +1,22 @@
+import re
+
+# What a user message asks for, from its words alone.
+# Shared by the model router (writes go to the reasoning tier for the whole turn) and the
+# response cache (writes are never answered from the cache).
+
+WRITE_INTENT = re.compile(r"\b(book|create|add|move|reschedule|postpone|shift|cancel|delete|remove|update|change|"
+                          r"rename|edit|import|export|send|email|mail|invite|notify|remind)\b")
+# Verbs that are also nouns/adjectives ("my schedule", "is Friday clear?") only count as a request to act
+WRITE_VERB_FIRST = re.compile(r"(^|\bto )(schedule|clear|block|plan|set)\b")
+FILLER = {"please", "hey", "hi", "kindly", "can", "could", "would", "you", "tell", "show", "let", "know", "just"}
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase words without punctuation or politeness filler."""
+    words = re.findall(r"[a-z0-9]+", text.casefold().replace("'", ""))
+    return " ".join(w for w in words if w not in FILLER)
+
+
+def wants_write(query: str) -> bool:
+    """True if a normalized query asks to change the calendar or send something."""
+    return bool(WRITE_INTENT.search(query) or WRITE_VERB_FIRST.search(query))
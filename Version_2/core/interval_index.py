@@ -0,0 +1,142 @@
+import random
+import itertools
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+# Overlap index over half-open intervals [start, end).
+# A treap ordered by (start, end) where every node also stores the largest `end` in its
+# subtree. An overlap query skips any subtree whose max end is before the query start and
+# stops descending right once nodes start after the query end, so it only walks the
+# branches that can contain a hit: O(log n + k) for calendar-shaped data (k = hits).
+# Inserts and deletes are O(log n) expected and keep the index current as events change.
+
+
+class _Node:
+    __slots__ = ("order", "start", "end", "key", "priority", "left", "right", "max_end")
+
+    def __init__(self, order: Tuple, start: float, end: float, key: Hashable, priority: float):
+        self.order = order
+        self.start = start
+        self.end = end
+        self.key = key
+        self.priority = priority
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+        self.max_end = end
+
+
+def _update(node: _Node) -> _Node:
+    node.max_end = node.end
+    if node.left is not None and node.left.max_end > node.max_end:
+        node.max_end = node.left.max_end
+    if node.right is not None and node.right.max_end > node.max_end:
+        node.max_end = node.right.max_end
+    return node
+
+
+def _split(node: Optional[_Node], order: Tuple) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """Split into nodes ordered before `order` and the rest."""
+    if node is None:
+        return None, None
+    if node.order < order:
+        node.right, right = _split(node.right, order)
+        return _update(node), right
+    left, node.left = _split(node.left, order)
+    return left, _update(node)
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    """Join two treaps where every node of `left` orders before every node of `right`."""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return _update(left)
+    right.left = _merge(left, right.left)
+    return _update(right)
+
+
+def _remove(node: Optional[_Node], order: Tuple) -> Optional[_Node]:
+    if node is None:
+        return None
+    if order == node.order:
+        return _merge(node.left, node.right)
+    if order < node.order:
+        node.left = _remove(node.left, order)
+    else:
+        node.right = _remove(node.right, order)
+    return _update(node)
+
+
+class IntervalIndex:
+    """
+    Set of keyed intervals [start, end) supporting overlap queries.
+    Args:
+        seed: Seed for the treap priorities, for reproducible shapes in benchmarks
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self._root: Optional[_Node] = None
+        self._orders: Dict[Hashable, Tuple] = {}
+        self._sequence = itertools.count()
+        self._rng = random.Random(seed)
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._orders
+
+    def add(self, key: Hashable, start: float, end: float):
+        """Insert or move the interval stored under `key`."""
+        self.remove(key)
+        # The sequence number keeps identical (start, end) pairs distinct without comparing keys
+        order = (start, end, next(self._sequence))
+        node = _Node(order, start, end, key, self._rng.random())
+        left, right = _split(self._root, order)
+        self._root = _merge(_merge(left, node), right)
+        self._orders[key] = order
+
+    def remove(self, key: Hashable) -> bool:
+        """Drop the interval stored under `key`; returns False if there was none."""
+        order = self._orders.pop(key, None)
+        if order is None:
+            return False
+        self._root = _remove(self._root, order)
+        return True
+
+    def overlapping(self, start: float, end: float) -> List[Hashable]:
+        """Keys of intervals that overlap [start, end), in start order."""
+        hits = []
+        # Iterative in-order walk, pruned by max_end on the left and by start on the right
+        stack, node = [], self._root
+        while stack or node is not None:
+            while node is not None and node.max_end > start:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.start >= end:
+                break
+            if node.end > start:
+                hits.append(node.key)
+            node = node.right
+        return hits
+
+    def conflicts(self, candidates: Iterable[Tuple[float, float]]) -> List[List[Hashable]]:
+        """Overlapping keys for each candidate interval, in the order given."""
+        return [self.overlapping(start, end) for start, end in candidates]
+
+    def items(self) -> List[Tuple[Hashable, float, float]]:
+        """All (key, start, end) entries in start order."""
+        out, stack, node = [], [], self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            out.append((node.key, node.start, node.end))
+            node = node.right
+        return out
@@ -0,0 +1,221 @@
+import os
+import threading
+import contextlib
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+# Usage accounting and per-turn budgets.
+# Counters are recorded against the current turn (a context variable set by `turn()`),
+# folded into the owning session when the turn ends, and summed process-wide for the
+# Prometheus text endpoint.
+COUNTERS = {
+    "llm_calls": "Chat model invocations (graph iterations).",
+    "prompt_tokens": "Prompt tokens reported by the chat model.",
+    "completion_tokens": "Completion tokens reported by the chat model.",
+    "llm_hedges": "Chat model calls raced against a second route after the hedge deadline.",
+    "llm_failovers": "Chat model calls retried on another route after an error.",
+    "tool_calls": "Tool calls requested by the chat model.",
+    "calendar_calls": "Interactive Google Calendar API requests executed (including retries).",
+    "calendar_bulk_calls": "Bulk-lane Calendar requests (imports, exports); not limited by the per-turn budget.",
+    "calendar_retries": "Calendar requests retried after a transient error.",
+    "calendar_retry_exhausted": "Calendar requests that failed after all retries.",
+    "calendar_throttled": "Calendar requests delayed by the client-side rate limiter.",
+    "calendar_throttle_seconds": "Seconds Calendar requests spent waiting for the rate limiter.",
+    "calendar_prefetches": "Background loads of a session's upcoming calendar window (warm start).",
+    "calendar_reads_deduplicated": "Calendar reads served from an identical read earlier in the same turn.",
+    "response_cache_hits": "Turns answered from the response cache without running the agent.",
+    "response_cache_misses": "Cacheable turns that had to run the agent.",
+    "response_cache_seconds_saved": "Estimated seconds saved by response cache hits.",
+    "ics_events_imported": "Events written by .ics imports, recorded batch by batch as the file streams in.",
+    "ics_events_exported": "Events written to .ics exports, recorded page by page.",
+    "duplicate_writes_avoided": "Repeated create requests answered with the event created earlier.",
+    "http_requests": "HTTP requests sent through the pooled clients (LLM, Whisper, TTS).",
+    "http_new_connections": "New connections the pooled clients had to open (reuse rate = 1 - this / http_requests).",
+    "emails_queued": "Emails written to the outbox.",
+    "emails_sent": "Outbox messages delivered (a digest email counts each message it carries).",
+    "emails_retried": "Outbox deliveries that failed and were rescheduled.",
+    "emails_dead_lettered": "Outbox messages given up on (permanent rejection or out of attempts).",
+    "smtp_connections": "Authenticated SMTP sessions the outbox opened.",
+    "whisper_seconds": "Seconds of audio sent to Whisper for transcription.",
+}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# Budgets; 0 disables a limit.
+BUDGETS = {
+    "llm_calls": _env_int("BUDGET_MAX_LLM_CALLS_PER_TURN", 8),
+    "tokens": _env_int("BUDGET_MAX_TOKENS_PER_TURN", 0),
+    "calendar_calls": _env_int("BUDGET_MAX_CALENDAR_CALLS_PER_TURN", 25),
+    "session_tokens": _env_int("BUDGET_MAX_TOKENS_PER_SESSION", 0),
+}
+
+
+class BudgetExceeded(Exception):
+    """Raised when a metered operation would exceed its per-turn budget."""
+
+
+class Usage:
+    """A bag of counters for one turn or one session."""
+
+    def __init__(self):
+        self.counts: Dict[str, float] = {name: 0 for name in COUNTERS}
+
+    def add(self, other: "Usage"):
+        for name, value in other.counts.items():
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    @property
+    def tokens(self) -> float:
+        return self.counts["prompt_tokens"] + self.counts["completion_tokens"]
+
+    def to_dict(self) -> Dict[str, float]:
+        return dict(self.counts, total_tokens=self.tokens)
+
+
+class _Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = Usage()
+        self.sessions: Dict[str, Usage] = {}
+        self.turns = 0
+        self.budget_exhausted: Dict[str, int] = {}
+
+
+_registry = _Registry()
+_turn: ContextVar[Optional[Usage]] = ContextVar("metering_turn", default=None)
+_session: ContextVar[Optional[str]] = ContextVar("metering_session", default=None)
+
+
+@contextlib.contextmanager
+def turn(session_id: str = "default"):
+    """
+    Meter one user turn; counters recorded inside the block are attributed to it.
+    Args:
+        session_id: Session the turn belongs to
+    """
+    usage = Usage()
+    turn_token = _turn.set(usage)
+    session_token = _session.set(session_id)
+    try:
+        yield usage
+    finally:
+        _turn.reset(turn_token)
+        _session.reset(session_token)
+        with _registry.lock:
+            _registry.sessions.setdefault(session_id, Usage()).add(usage)
+            _registry.turns += 1
+
+
+def record(name: str, amount: float = 1):
+    """Add `amount` to counter `name` for the current turn and the process totals."""
+    usage = _turn.get()
+    # A turn's parallel tool calls and hedged LLM calls share its Usage from several threads
+    with _registry.lock:
+        if usage is not None:
+            usage.counts[name] += amount
+        _registry.totals.counts[name] += amount
+
+
+def record_llm_response(response):
+    """Record one chat model call and the token usage it reports, if any."""
+    record("llm_calls")
+    usage = getattr(response, "usage_metadata", None) or {}
+    record("prompt_tokens", usage.get("input_tokens", 0))
+    record("completion_tokens", usage.get("output_tokens", 0))
+    record("tool_calls", len(getattr(response, "tool_calls", None) or []))
+
+
+def totals() -> Dict[str, float]:
+    """Process-wide counter values."""
+    with _registry.lock:
+        return dict(_registry.totals.counts)
+
+
+def current_turn() -> Optional[Usage]:
+    return _turn.get()
+
+
+def session_usage(session_id: str) -> Usage:
+    with _registry.lock:
+        usage = Usage()
+        usage.add(_registry.sessions.get(session_id, Usage()))
+        # Include the turn still in progress
+        if _session.get() == session_id and _turn.get() is not None:
+            usage.add(_turn.get())
+    return usage
+
+
+def exceeded_budget() -> Optional[str]:
+    """Name of the first budget the current turn has used up, or None."""
+    usage = _turn.get()
+    if usage is None:
+        return None
+    if BUDGETS["llm_calls"] and usage.counts["llm_calls"] >= BUDGETS["llm_calls"]:
+        return "llm_calls"
+    if BUDGETS["tokens"] and usage.tokens >= BUDGETS["tokens"]:
+        return "tokens"
+    if BUDGETS["session_tokens"] and session_usage(_session.get()).tokens >= BUDGETS["session_tokens"]:
+        return "session_tokens"
+    return None
+
+
+def check_calendar_budget():
+    """Raise BudgetExceeded if the turn has used its Calendar API allowance."""
+    usage = _turn.get()
+    if usage is not None and BUDGETS["calendar_calls"] and usage.counts["calendar_calls"] >= BUDGETS["calendar_calls"]:
+        note_budget_exhausted("calendar_calls")
+        raise BudgetExceeded(f"Calendar API budget of {BUDGETS['calendar_calls']} calls for this turn is used up.")
+
+
+def note_budget_exhausted(budget: str):
+    with _registry.lock:
+        _registry.budget_exhausted[budget] = _registry.budget_exhausted.get(budget, 0) + 1
+
+
+def render_prometheus() -> str:
+    """Process-wide counters in the Prometheus text exposition format."""
+    with _registry.lock:
+        lines = []
+        for name, help_text in COUNTERS.items():
+            metric = f"agent_{name}_total"
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter",
+                      f"{metric} {_registry.totals.counts[name]:g}"]
+        lines += ["# HELP agent_turns_total Completed user turns.", "# TYPE agent_turns_total counter",
+                  f"agent_turns_total {_registry.turns}"]
+        lines += ["# HELP agent_sessions Sessions seen by this process.", "# TYPE agent_sessions gauge",
+                  f"agent_sessions {len(_registry.sessions)}"]
+        lines += ["# HELP agent_budget_exhausted_total Turns that hit a budget.",
+                  "# TYPE agent_budget_exhausted_total counter"]
+        for budget in BUDGETS:
+            lines.append(f'agent_budget_exhausted_total{{budget="{budget}"}} {_registry.budget_exhausted.get(budget, 0)}')
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int) -> ThreadingHTTPServer:
+    """Serve /metrics on `port` from a daemon thread."""
+    server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
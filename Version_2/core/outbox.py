@@ -0,0 +1,312 @@
+import os
+import time
+import sqlite3
+import smtplib
+import threading
+import contextlib
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from typing import Dict, List, NamedTuple, Optional
+
+from core import metering
+
+# Persistent email outbox.
+# `send_email_notification` only writes the message to a SQLite queue and returns; a
+# background worker drains the queue over one authenticated SMTP session that stays open
+# while there is mail to send. Failed deliveries are retried with exponential backoff;
+# permanent failures (5xx) and messages out of attempts are kept as dead letters. In
+# digest mode a message waits `digest_window` seconds and goes out together with every
+# other pending message to the same recipient, as one email.
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "outbox.db")
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 20))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 5))
+OUTBOX_RETRY_BASE = float(os.environ.get("OUTBOX_RETRY_BASE", 30))       # seconds; doubled per attempt
+OUTBOX_DIGEST_WINDOW = float(os.environ.get("OUTBOX_DIGEST_WINDOW", 0))  # seconds; 0 sends each message alone
+SMTP_IDLE_TIMEOUT = float(os.environ.get("SMTP_IDLE_TIMEOUT", 60))       # close the session after this long idle
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recipient TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+"""
+
+
+class Message(NamedTuple):
+    id: int
+    recipient: str
+    subject: str
+    body: str
+    attempts: int
+
+
+class SMTPTransport:
+    """
+    One SMTP session, opened on first use and reopened if the server dropped it.
+    Args:
+        host: SMTP server
+        port: SMTP port
+        username: Login user; no login when empty
+        password: Login password
+        starttls: Upgrade the connection with STARTTLS before logging in
+    """
+
+    def __init__(self, host: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                 starttls: bool = True, timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.smtp: Optional[smtplib.SMTP] = None
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            smtp.starttls()
+        if self.username:
+            smtp.login(self.username, self.password)
+        metering.record("smtp_connections")
+        return smtp
+
+    def send(self, sender: str, recipient: str, subject: str, body: str):
+        msg = MIMEMultipart()
+        msg['From'] = sender
+        msg['To'] = recipient
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+        if self.smtp is None:
+            self.smtp = self._connect()
+        try:
+            self.smtp.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # The server closed an idle session; one fresh session before giving up
+            self.smtp = self._connect()
+            self.smtp.send_message(msg)
+
+    def close(self):
+        if self.smtp is not None:
+            with contextlib.suppress(smtplib.SMTPException, OSError):
+                self.smtp.quit()
+            self.smtp = None
+
+
+def permanent(error: Exception) -> bool:
+    """True for rejections retrying cannot fix (5xx replies other than auth problems)."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    code = getattr(error, "smtp_code", 0)
+    return 500 <= code < 600 and not isinstance(error, smtplib.SMTPAuthenticationError)
+
+
+def merge(messages: List[Message]) -> tuple:
+    """(subject, body) of one digest email covering several messages."""
+    if len(messages) == 1:
+        return messages[0].subject, messages[0].body
+    subject = f"{len(messages)} notifications: " + "; ".join(m.subject for m in messages)
+    if len(subject) > 150:
+        subject = subject[:147] + "..."
+    body = "\n\n".join(f"--- {m.subject} ---\n{m.body}" for m in messages)
+    return subject, body
+
+
+class Outbox:
+    """
+    Durable email queue with a background sender.
+    Args:
+        transport: SMTPTransport used by the worker
+        sender: From address
+        path: Database file (defaults to OUTBOX_DB or Version_2/data/outbox.db)
+        digest_window: Seconds to hold messages so those to the same recipient go out as one
+    """
+
+    def __init__(self, transport: SMTPTransport, sender: str, path: Optional[str] = None,
+                 digest_window: float = OUTBOX_DIGEST_WINDOW, batch_size: int = OUTBOX_BATCH_SIZE,
+                 max_attempts: int = OUTBOX_MAX_ATTEMPTS, retry_base: float = OUTBOX_RETRY_BASE):
+        self.transport = transport
+        self.sender = sender
+        self.path = path or os.environ.get("OUTBOX_DB", DEFAULT_DB_PATH)
+        self.digest_window = digest_window
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.worker: Optional[threading.Thread] = None
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            # Messages a previous process was sending when it stopped go back in the queue
+            conn.execute("UPDATE outbox SET status = 'pending' WHERE status = 'sending'")
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, recipient: str, subject: str, body: str) -> int:
+        """Queue a message and return its outbox id; delivery happens in the background."""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO outbox (recipient, subject, body, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                (recipient, subject, body, now + self.digest_window, now),
+            )
+        metering.record("emails_queued")
+        self.wakeup.set()
+        return cursor.lastrowid
+
+    def claim(self) -> List[List[Message]]:
+        """
+        Take due messages for sending, grouped into the emails to send.
+        In digest mode a due message brings along every pending message to the same recipient.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            due = conn.execute(
+                "SELECT id, recipient, subject, body, attempts FROM outbox "
+                "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (now, self.batch_size),
+            ).fetchall()
+            if self.digest_window and due:
+                recipients = sorted({row[1] for row in due})
+                due = conn.execute(
+                    "SELECT id, recipient, subject, body, attempts FROM outbox WHERE status = 'pending' "
+                    f"AND recipient IN ({','.join('?' * len(recipients))}) ORDER BY id",
+                    recipients,
+                ).fetchall()
+            conn.executemany("UPDATE outbox SET status = 'sending' WHERE id = ?", [(row[0],) for row in due])
+        groups: Dict[str, List[Message]] = {}
+        for row in due:
+            message = Message(*row)
+            key = message.recipient if self.digest_window else str(message.id)
+            groups.setdefault(key, []).append(message)
+        return list(groups.values())
+
+    def _finish(self, messages: List[Message], error: Optional[Exception] = None):
+        now = time.time()
+        with self._connect() as conn:
+            if error is None:
+                conn.executemany("UPDATE outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+                                 [(now, m.id) for m in messages])
+                metering.record("emails_sent", len(messages))
+                return
+            for m in messages:
+                attempts = m.attempts + 1
+                if permanent(error) or attempts >= self.max_attempts:
+                    conn.execute("UPDATE outbox SET status = 'dead', attempts = ?, last_error = ? WHERE id = ?",
+                                 (attempts, str(error), m.id))
+                    metering.record("emails_dead_lettered")
+                else:
+                    conn.execute(
+                        "UPDATE outbox SET status = 'pending', attempts = ?, last_error = ?, next_attempt_at = ? WHERE id = ?",
+                        (attempts, str(error), now + self.retry_base * 2 ** (attempts - 1), m.id))
+                    metering.record("emails_retried")
+
+    def drain(self) -> int:
+        """Send everything that is due now; returns the number of emails sent."""
+        sent = 0
+        while True:
+            groups = self.claim()
+            if not groups:
+                return sent
+            for messages in groups:
+                subject, body = merge(messages)
+                try:
+                    self.transport.send(self.sender, messages[0].recipient, subject, body)
+                except (smtplib.SMTPException, OSError) as e:
+                    if not isinstance(e, (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError)):
+                        # The session itself may be unusable; start a new one next time
+                        self.transport.close()
+                    self._finish(messages, e)
+                    continue
+                self._finish(messages)
+                sent += 1
+
+    def next_due(self) -> Optional[float]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'").fetchone()
+        return row[0]
+
+    def start(self) -> "Outbox":
+        if self.worker is None:
+            self.worker = threading.Thread(target=self._run, name="outbox-worker", daemon=True)
+            self.worker.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self.stopping.set()
+        self.wakeup.set()
+        if self.worker is not None:
+            self.worker.join(timeout)
+
+    def _run(self):
+        idle_since = time.monotonic()
+        while not self.stopping.is_set():
+            try:
+                if self.drain():
+                    idle_since = time.monotonic()
+            except Exception as e:
+                print(f"Outbox delivery failed: {e}")
+            if self.transport.smtp is not None and time.monotonic() - idle_since > SMTP_IDLE_TIMEOUT:
+                self.transport.close()
+            due = self.next_due()
+            wait = SMTP_IDLE_TIMEOUT if due is None else min(SMTP_IDLE_TIMEOUT, max(0.0, due - time.time()))
+            self.wakeup.wait(wait)
+            self.wakeup.clear()
+        self.transport.close()
+
+    def counts(self) -> Dict[str, int]:
+        """Messages per status: pending, sending, sent, dead."""
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+
+    def dead_letters(self, limit: int = 50) -> List[Dict]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, recipient, subject, attempts, last_error FROM outbox WHERE status = 'dead' "
+                "ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(zip(("id", "recipient", "subject", "attempts", "last_error"), row)) for row in rows]
+
+    def retry_dead(self, message_id: int):
+        """Put a dead letter back in the queue with a fresh set of attempts."""
+        with self._connect() as conn:
+            conn.execute("UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = ? "
+                         "WHERE id = ? AND status = 'dead'", (time.time(), message_id))
+        self.wakeup.set()
+
+
+_outbox: Optional[Outbox] = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox() -> Optional[Outbox]:
+    """The process-wide outbox with its worker running, or None if email is not configured."""
+    global _outbox
+    address, password = os.environ.get("EMAIL_ADDRESS"), os.environ.get("EMAIL_PASSWORD")
+    if not address or not password:
+        return None
+    with _outbox_lock:
+        if _outbox is None:
+            transport = SMTPTransport(os.environ.get("SMTP_HOST", "smtp.gmail.com"), int(os.environ.get("SMTP_PORT", 587)),
+                                      address, password,
+                                      starttls=os.environ.get("SMTP_STARTTLS", "1").lower() not in ("0", "false", "no"))
+            _outbox = Outbox(transport, address).start()
+        return _outbox
@@ -0,0 +1,287 @@
+import os
+import json
+import datetime
+from contextvars import copy_context
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Annotated, Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field, ValidationError
+from typing_extensions import TypedDict
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
+
+from core import metering, router, tracing
+from core.agent import SYSTEM_PROMPT, _clean_time, build_agent, tools
+from core.providers import get_llm
+
+# Plan-and-execute mode (AGENT_MODE=plan).
+# The tool loop pays one LLM round-trip per dependent step. Here the model is asked once
+# for a plan, a small DAG of tool calls whose arguments may reference earlier results,
+# e.g. {"$ref": "s1.0.end.dateTime", "add_minutes": 30}. The plan runs locally, with
+# steps started as soon as the steps they depend on have finished, and the model is
+# called once more to phrase the answer. Requests that need no tools are answered by
+# the first call; a plan that is not valid, or whose references do not resolve against
+# the actual results, falls back to the regular tool loop.
+
+PLAN_WORKERS = int(os.environ.get("PLAN_WORKERS", 4))
+MAX_PLAN_STEPS = 12
+MAX_RESULT_CHARS = 4000   # per step, in the prompt that phrases the answer
+
+TOOLS_BY_NAME = {t.name: t for t in tools}
+
+
+class PlanStep(BaseModel):
+    id: str = Field(description="Short unique step id, e.g. 's1'")
+    tool: str = Field(description="Name of the tool to call")
+    args: Dict[str, Any] = Field(default_factory=dict,
+                                 description='Tool arguments; any value may be {"$ref": "<step id>[.<key or index>...]"}, '
+                                             'optionally with "add_minutes" for ISO times')
+
+
+class make_plan(BaseModel):
+    """Submit every tool call needed to answer the request, as one plan."""
+    steps: List[PlanStep] = Field(description="Tool calls; a step may use the results of earlier steps via $ref")
+
+
+PLANNER_PROMPT = """
+PLANNING MODE: Do not call the tools directly. If the request needs calendar or email actions, call
+'make_plan' once with every step needed. Each step is {"id", "tool", "args"}. When an argument depends
+on an earlier step's result, use {"$ref": "<step id>.<key or list index>..."} instead of a value,
+e.g. {"$ref": "s1.0.end.dateTime", "add_minutes": 30} for 30 minutes after the first listed event ends.
+Steps run in parallel unless they reference each other. If no tools are needed, just answer.
+
+Tools:
+"""
+
+RESPOND_PROMPT = """
+The plan for the user's request has been executed. The result of each step is below
+(status "skipped" means a step it depended on failed). Answer the user based on these results.
+"""
+
+
+class PlanError(ValueError):
+    """The plan cannot be executed (unknown tool, bad reference, cycle)."""
+
+
+def describe_tools() -> str:
+    lines = []
+    for t in tools:
+        args = ", ".join(f"{name}: {spec.get('type', 'any')}" for name, spec in t.args.items())
+        lines.append(f"- {t.name}({args}): {t.description.strip().splitlines()[0]}")
+    return "\n".join(lines)
+
+
+def _refs(value: Any) -> List[str]:
+    """Step ids referenced anywhere inside an argument value."""
+    if isinstance(value, dict):
+        if "$ref" in value:
+            return [str(value["$ref"]).split(".")[0]]
+        return [r for v in value.values() for r in _refs(v)]
+    if isinstance(value, list):
+        return [r for v in value for r in _refs(v)]
+    return []
+
+
+def validate(steps: List[Dict]) -> Dict[str, List[str]]:
+    """Dependencies of each step; raises PlanError for plans that cannot run."""
+    if not steps or len(steps) > MAX_PLAN_STEPS:
+        raise PlanError(f"A plan needs 1 to {MAX_PLAN_STEPS} steps")
+    ids = [s["id"] for s in steps]
+    if len(set(ids)) != len(ids):
+        raise PlanError("Duplicate step ids")
+    deps: Dict[str, List[str]] = {}
+    for step in steps:
+        if step["tool"] not in TOOLS_BY_NAME:
+            raise PlanError(f"Unknown tool '{step['tool']}'")
+        deps[step["id"]] = sorted(set(_refs(step.get("args", {}))))
+        for dep in deps[step["id"]]:
+            if dep not in ids:
+                raise PlanError(f"Step '{step['id']}' refers to unknown step '{dep}'")
+            if dep not in deps or dep == step["id"]:
+                # Only earlier steps may be referenced, which also rules out cycles
+                raise PlanError(f"Step '{step['id']}' refers to later step '{dep}'")
+    return deps
+
+
+def _lookup(results: Dict[str, Any], ref: str) -> Any:
+    step_id, *path = ref.split(".")
+    value = results[step_id]
+    for key in path:
+        if isinstance(value, list):
+            value = value[int(key)]
+        elif isinstance(value, dict):
+            value = value[key]
+        else:
+            raise PlanError(f"Cannot follow '{ref}' into a {type(value).__name__}")
+    return value
+
+
+def resolve(value: Any, results: Dict[str, Any]) -> Any:
+    """Argument value with every {"$ref": ...} replaced by the referenced result."""
+    if isinstance(value, dict):
+        if "$ref" in value:
+            try:
+                resolved = _lookup(results, str(value["$ref"]))
+            except (KeyError, IndexError, ValueError) as e:
+                raise PlanError(f"Reference '{value['$ref']}' not found in the result ({e})")
+            if value.get("add_minutes"):
+                moved = datetime.datetime.fromisoformat(str(resolved).replace("Z", "+00:00")) \
+                    + datetime.timedelta(minutes=float(value["add_minutes"]))
+                resolved = moved.isoformat()
+            return resolved
+        return {k: resolve(v, results) for k, v in value.items()}
+    if isinstance(value, list):
+        return [resolve(v, results) for v in value]
+    return value
+
+
+def failed(result: Any) -> bool:
+    """True for the error shapes the tools return."""
+    if isinstance(result, dict):
+        return "error" in result
+    if isinstance(result, list):
+        return bool(result) and isinstance(result[0], dict) and "error" in result[0]
+    return isinstance(result, str) and result.startswith("Error")
+
+
+def execute_plan(steps: List[Dict]) -> Dict[str, Dict]:
+    """
+    Run a plan; every step starts as soon as the steps it references are done.
+    Returns {step id: {"tool", "status", "result"}} in plan order. A step whose references
+    do not resolve (or do not fit the argument, e.g. add_minutes on a title) is "invalid",
+    and the steps depending on it are skipped.
+    """
+    deps = validate(steps)
+    by_id = {s["id"]: s for s in steps}
+    results: Dict[str, Any] = {}
+    outcome: Dict[str, Dict] = {}
+
+    def run(step):
+        with tracing.span("plan.step", step=step["id"], tool=step["tool"]):
+            try:
+                args = resolve(step.get("args", {}), results)
+            except (PlanError, ValueError, TypeError, KeyError) as e:
+                return "invalid", {"error": f"Cannot resolve the arguments: {e}"}
+            try:
+                result = TOOLS_BY_NAME[step["tool"]].invoke(args)
+            except Exception as e:
+                result = {"error": str(e)}
+            return ("error" if failed(result) else "ok"), result
+
+    waiting = list(by_id)
+    running = {}
+    with ThreadPoolExecutor(max_workers=PLAN_WORKERS) as pool:
+        while waiting or running:
+            for step_id in list(waiting):
+                if any(outcome.get(d, {}).get("status") in ("error", "invalid", "skipped") for d in deps[step_id]):
+                    outcome[step_id] = {"tool": by_id[step_id]["tool"], "status": "skipped"}
+                    waiting.remove(step_id)
+                elif all(d in results for d in deps[step_id]):
+                    running[pool.submit(copy_context().run, run, by_id[step_id])] = step_id
+                    waiting.remove(step_id)
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step_id = running.pop(future)
+                try:
+                    status, result = future.result()
+                except Exception as e:
+                    status, result = "error", {"error": str(e)}
+                outcome[step_id] = {"tool": by_id[step_id]["tool"], "status": status, "result": result}
+                results[step_id] = result
+    metering.record("tool_calls", len(steps))
+    return {step_id: outcome[step_id] for step_id in by_id}
+
+
+def _results_text(outcome: Dict[str, Dict]) -> str:
+    lines = []
+    for step_id, entry in outcome.items():
+        text = json.dumps(entry.get("result"), default=str) if "result" in entry else ""
+        if len(text) > MAX_RESULT_CHARS:
+            text = text[:MAX_RESULT_CHARS] + "... (truncated)"
+        lines.append(f"{step_id} {entry['tool']} [{entry['status']}]: {text}")
+    return "\n".join(lines)
+
+
+class PlanState(TypedDict):
+    messages: Annotated[list[BaseMessage], add_messages]
+    plan: Optional[List[Dict]]
+    outcome: Optional[Dict[str, Dict]]
+    fallback: bool
+
+
+def build_plan_agent(llm=None):
+    """
+    Compile the plan-and-execute graph; same input and output as `build_agent`.
+    Args:
+        llm: Optional chat model; defaults to the model router when LLM_ROUTES_* are set, else the configured provider
+    """
+    llm = llm or router.from_env() or get_llm()
+    planner = llm.bind_tools([make_plan])
+    loop = build_agent(llm)
+    planner_prompt = PLANNER_PROMPT + describe_tools()
+
+    def with_system(messages, extra):
+        if messages and isinstance(messages[0], SystemMessage):
+            return [SystemMessage(content=messages[0].content + extra)] + list(messages[1:])
+        return [SystemMessage(content=SYSTEM_PROMPT + extra)] + list(messages)
+
+    def plan(state: PlanState):
+        with tracing.span("plan") as span:
+            response = planner.invoke(with_system(state["messages"], planner_prompt))
+            metering.record_llm_response(response)
+            calls = [c for c in getattr(response, "tool_calls", []) if c["name"] == "make_plan"]
+            if not calls:
+                # Nothing to do with tools: this is the answer
+                return {"messages": [response], "plan": None}
+            try:
+                steps = [PlanStep(**s).model_dump() for s in calls[0]["args"].get("steps", [])]
+                validate(steps)
+            except (PlanError, ValidationError, TypeError, AttributeError) as e:
+                span.set(invalid_plan=str(e))
+                return {"plan": None, "fallback": True}
+            span.set(steps=len(steps))
+            return {"plan": steps, "fallback": False}
+
+    def execute(state: PlanState):
+        with tracing.span("execute") as span:
+            outcome = execute_plan(state["plan"])
+            invalid = [step_id for step_id, entry in outcome.items() if entry["status"] == "invalid"]
+            if invalid:
+                # The plan did not fit the results it got; let the tool loop work from the request instead
+                span.set(invalid_steps=",".join(invalid))
+                return {"outcome": outcome, "fallback": True}
+            return {"outcome": outcome}
+
+    def respond(state: PlanState):
+        with tracing.span("respond"):
+            response = llm.invoke(with_system(state["messages"], RESPOND_PROMPT + _results_text(state["outcome"])))
+            metering.record_llm_response(response)
+        return {"messages": [AIMessage(content=_clean_time(response.content), usage_metadata=response.usage_metadata)]}
+
+    def run_loop(state: PlanState):
+        with tracing.span("loop_fallback"):
+            result = loop.invoke({"messages": state["messages"]})
+        return {"messages": result["messages"][len(state["messages"]):]}
+
+    def route(state: PlanState):
+        if state.get("fallback"):
+            return "loop"
+        return "execute" if state.get("plan") else END
+
+    def after_execute(state: PlanState):
+        return "loop" if state.get("fallback") else "respond"
+
+    graph_builder = StateGraph(PlanState)
+    graph_builder.add_node("plan", plan)
+    graph_builder.add_node("execute", execute)
+    graph_builder.add_node("respond", respond)
+    graph_builder.add_node("loop", run_loop)
+    graph_builder.add_edge(START, "plan")
+    graph_builder.add_conditional_edges("plan", route, ["execute", "loop", END])
+    graph_builder.add_conditional_edges("execute", after_execute, ["respond", "loop"])
+    graph_builder.add_edge("respond", END)
+    graph_builder.add_edge("loop", END)
+    return graph_builder.compile()
@@ -0,0 +1,144 @@
+import os
+import time
+import datetime
+import threading
+import contextvars
+from typing import Dict, List, Optional
+
+from core import calendar_client, metering
+from core.credentials import current_user_id
+from core.event_store import EVENT_CACHE_TTL, LOCAL_TZ
+
+# Session warm start.
+# The first question of a session ("what's next?") would otherwise pay for the OAuth token
+# refresh, the discovery build and a full events.list before the LLM sees anything. When a
+# session starts, a background thread authorizes and loads the calendar list and the next
+# PREFETCH_DAYS of events into the user's event store, where list_events,
+# find_available_slots and the briefing find them. While the session is in use the window
+# is listed again just before the store's TTL runs out, so it stays warm; after
+# PREFETCH_KEEP_WARM idle seconds the thread stops until the session is touched again.
+
+# 0 turns the warm start off
+PREFETCH_DAYS = int(os.environ.get("PREFETCH_DAYS", 7))
+# "primary", or "all" for every visible calendar
+PREFETCH_CALENDARS = os.environ.get("PREFETCH_CALENDARS", "primary")
+# Seconds between refreshes of the window; 0 loads it once
+PREFETCH_REFRESH = float(os.environ.get("PREFETCH_REFRESH", EVENT_CACHE_TTL * 0.8))
+# Stop refreshing after this many seconds without a touch()
+PREFETCH_KEEP_WARM = float(os.environ.get("PREFETCH_KEEP_WARM", 600))
+
+
+def window(days: int, now: Optional[datetime.datetime] = None) -> Dict[str, str]:
+    """From the start of today (local time) to `days` days later, as list_events arguments."""
+    now = now or datetime.datetime.now(LOCAL_TZ)
+    start = datetime.datetime.combine(now.astimezone(LOCAL_TZ).date(), datetime.time(), tzinfo=LOCAL_TZ)
+    return {"time_min": start.isoformat(), "time_max": (start + datetime.timedelta(days=days)).isoformat()}
+
+
+class Prefetcher:
+    """
+    Keeps one user's upcoming calendar window loaded in their event store.
+    Args:
+        days: Days ahead of the start of today to load
+        calendars: "primary" or "all"
+        refresh: Seconds between reloads while in use; 0 loads once
+        keep_warm: Idle seconds after which reloading stops
+    """
+
+    def __init__(self, days: int = PREFETCH_DAYS, calendars: str = PREFETCH_CALENDARS,
+                 refresh: float = PREFETCH_REFRESH, keep_warm: float = PREFETCH_KEEP_WARM, clock=time.monotonic):
+        self.days = days
+        self.calendars = calendars
+        self.refresh = refresh
+        self.keep_warm = keep_warm
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.stopped = threading.Event()
+        self.worker: Optional[threading.Thread] = None
+        self.touched = clock()
+        self.loads = 0
+        self.error: Optional[str] = None
+
+    def touch(self) -> "Prefetcher":
+        """Mark the session as in use, (re)starting the background thread in the caller's context."""
+        with self.lock:
+            self.touched = self.clock()
+            if self.worker is None:
+                self.stopped.clear()
+                self.worker = threading.Thread(target=contextvars.copy_context().run, args=(self._run,),
+                                               name="calendar-prefetch", daemon=True)
+                self.worker.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the first load has finished (or failed); False on timeout."""
+        return self.ready.wait(timeout)
+
+    def stop(self):
+        self.stopped.set()
+
+    def load(self, refresh: bool = False) -> List[Dict]:
+        """
+        Authorize and load the calendar list and the window into the event store.
+        Args:
+            refresh: List again even if the store still holds a fresh copy
+        """
+        # Imported here: core.tools pulls in the Calendar client and the LangChain tool machinery
+        from core import tools
+
+        service = tools.get_calendar_service()
+        if not service:
+            raise RuntimeError("Authentication failed")
+        calendars = tools._calendar_list(service, calendar_client.BULK, refresh)
+        ids = ['primary']
+        if self.calendars == tools.ALL_CALENDARS:
+            ids = [c['id'] for c in calendars if not c.get('hidden')]
+        span = window(self.days)
+        events = []
+        for calendar_id in ids:
+            events += tools._calendar_events(service, calendar_id, span["time_min"], span["time_max"],
+                                             calendar_client.BULK, refresh)
+        metering.record("calendar_prefetches")
+        self.loads += 1
+        return events
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                self.load(refresh=self.loads > 0)
+                self.error = None
+            except Exception as e:
+                self.error = str(e)
+                print(f"Calendar prefetch failed: {e}")
+            finally:
+                self.ready.set()
+            # Decided under the lock so a touch() racing with the exit starts a new thread
+            with self.lock:
+                if self.refresh <= 0 or self.clock() - self.touched > self.keep_warm:
+                    self.worker = None
+                    return
+            self.stopped.wait(self.refresh)
+        with self.lock:
+            self.worker = None
+
+
+_prefetchers: Dict[Optional[str], Prefetcher] = {}
+_prefetchers_lock = threading.Lock()
+
+
+def warm_start(**options) -> Optional[Prefetcher]:
+    """
+    Start (or keep) warming the current user's upcoming calendar window; returns immediately.
+    Call it at session start and on later interactions to keep the window fresh.
+    Args:
+        options: Prefetcher arguments for a user seen for the first time
+    """
+    if options.get("days", PREFETCH_DAYS) <= 0:
+        return None
+    user_id = current_user_id()
+    with _prefetchers_lock:
+        prefetcher = _prefetchers.get(user_id)
+        if prefetcher is None:
+            prefetcher = _prefetchers[user_id] = Prefetcher(**options)
+    return prefetcher.touch()
@@ -0,0 +1,97 @@
+import os
+from typing import Callable, Dict, Optional
+
+# Registry of chat model backends.
+# Each factory imports its LangChain integration only when it is selected, so
+# starting the app never pays for provider packages that are not in use.
+PROVIDERS: Dict[str, Callable] = {}
+
+DEFAULT_PROVIDER = "deepseek"
+
+
+def register_provider(name: str):
+    """Register a chat model factory under `name`."""
+    def decorator(factory: Callable) -> Callable:
+        PROVIDERS[name] = factory
+        return factory
+    return decorator
+
+
+# --- DeepSeek V3.2 Configuration (via Hugging Face router) ---
+# Using ChatOpenAI wrapper with the router endpoint
+@register_provider("deepseek")
+def _deepseek(**overrides):
+    from langchain_openai import ChatOpenAI
+    from core.http_pool import get_client
+
+    config = dict(
+        model="deepseek-ai/DeepSeek-V3.2",
+        openai_api_key=os.getenv("HUGGINGFACEHUB_API_TOKEN"),
+        openai_api_base="https://router.huggingface.co/v1",
+        max_tokens=1024,
+        temperature=0.2,
+        # Shared keep-alive pool (core/http_pool.py)
+        http_client=get_client("llm"),
+    )
+    config.update(overrides)
+    return ChatOpenAI(**config)
+
+
+# --- Google Gemini Configuration ---
+@register_provider("gemini")
+def _gemini(**overrides):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    config = dict(
+        model="gemini-2.0-flash",
+        google_api_key=os.environ.get("GEMINI_API_KEY"),
+        temperature=0,
+    )
+    config.update(overrides)
+    return ChatGoogleGenerativeAI(**config)
+
+
+# --- Hugging Face Inference Endpoint Configuration ---
+@register_provider("huggingface")
+def _huggingface(**overrides):
+    from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
+
+    config = dict(
+        repo_id="deepseek-ai/DeepSeek-V3.2",
+        huggingfacehub_api_token=os.getenv("HUGGINGFACEHUB_API_TOKEN"),
+        max_new_tokens=1024,
+        temperature=0.2,
+    )
+    config.update(overrides)
+    return ChatHuggingFace(llm=HuggingFaceEndpoint(**config))
+
+
+# --- Any OpenAI-compatible endpoint (vLLM, llama.cpp server, Ollama, a local stand-in) ---
+@register_provider("openai")
+def _openai(**overrides):
+    from langchain_openai import ChatOpenAI
+    from core.http_pool import get_client
+
+    config = dict(
+        model=os.getenv("OPENAI_MODEL", "default"),
+        openai_api_key=os.getenv("OPENAI_API_KEY", "not-needed"),
+        openai_api_base=os.getenv("OPENAI_API_BASE", "http://localhost:8080/v1"),
+        max_tokens=1024,
+        temperature=0.2,
+        http_client=get_client("llm"),
+    )
+    config.update(overrides)
+    return ChatOpenAI(**config)
+
+
+def get_llm(provider: Optional[str] = None, **overrides):
+    """
+    Build the chat model for `provider` (defaults to the LLM_PROVIDER env var).
+    Args:
+        provider: Registered provider name, e.g. 'deepseek' or 'gemini'
+        overrides: Keyword arguments forwarded to the LangChain model class
+    """
+    name = provider or os.getenv("LLM_PROVIDER", DEFAULT_PROVIDER)
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{name}'. Available: {', '.join(sorted(PROVIDERS))}")
+    return PROVIDERS[name](**overrides)
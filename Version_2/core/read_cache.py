@@ -0,0 +1,105 @@
+import copy
+import threading
+import contextlib
+from concurrent.futures import Future
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from core import metering
+
+# Request-scoped single-flight cache for Calendar reads.
+# Within one agent turn the LLM often lists a range and then checks availability or
+# finds slots over the same range, and each tool re-fetches the same data. While a
+# `read_scope()` is active, identical GET requests (same URI, i.e. same calendar, range
+# and parameters) are collapsed: concurrent callers share one in-flight request and later
+# callers reuse its result. Any write in the scope drops everything cached so far.
+
+READ_METHODS = {"GET"}
+
+
+def request_key(request) -> Optional[Tuple[str, str]]:
+    """Cache key for a read request, or None if the request is not a cacheable read."""
+    method = getattr(request, "method", None)
+    uri = getattr(request, "uri", None)
+    if method not in READ_METHODS or not uri:
+        return None
+    # Parameter order depends on the call site; sort it so equivalent requests match
+    parts = urlsplit(uri)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return method, urlunsplit(parts._replace(query=query))
+
+
+class ReadScope:
+    """Single-flight memo of reads for one turn."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries: Dict[Tuple[str, str], Future] = {}
+        self.saved = 0
+
+    def read(self, key: Tuple[str, str], fetch: Callable):
+        with self.lock:
+            future = self.entries.get(key)
+            owner = future is None
+            if owner:
+                future = self.entries[key] = Future()
+            else:
+                self.saved += 1
+        if not owner:
+            metering.record("calendar_reads_deduplicated")
+            # Callers mutate results (e.g. update_event edits the fetched event), so hand out copies
+            return copy.deepcopy(future.result())
+
+        try:
+            result = fetch()
+        except BaseException as e:
+            with self.lock:
+                # Do not cache failures; the next caller retries
+                if self.entries.get(key) is future:
+                    del self.entries[key]
+            future.set_exception(e)
+            raise
+        future.set_result(result)
+        return copy.deepcopy(result)
+
+    def invalidate(self):
+        """Forget every cached read (called around writes)."""
+        with self.lock:
+            self.entries.clear()
+
+
+_scope: ContextVar[Optional[ReadScope]] = ContextVar("calendar_read_scope", default=None)
+
+
+@contextlib.contextmanager
+def read_scope():
+    """Deduplicate identical Calendar reads made inside the block (one agent turn)."""
+    scope = ReadScope()
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+
+
+def execute(request, run: Callable, cacheable: bool = True):
+    """
+    Run `run()` for `request`, sharing results of identical reads in the current scope.
+    Args:
+        request: The Calendar API request about to be executed
+        run: Callable that actually executes it
+        cacheable: False for reads whose results should not be held (e.g. export pages)
+    """
+    scope = _scope.get()
+    if scope is None:
+        return run()
+    key = request_key(request)
+    if key is not None:
+        return scope.read(key, run) if cacheable else run()
+    # A write (or batch) may change anything we have read
+    scope.invalidate()
+    try:
+        return run()
+    finally:
+        scope.invalidate()
@@ -0,0 +1,236 @@
+import itertools
+import datetime
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from dateutil import rrule
+
+from core.event_store import event_time, parse_time
+
+# Recurring events as series instead of expanded instances.
+# Calendar listings are fetched with singleEvents=True (the event store and conflict checks
+# need every instance), which turns a weekly standup into 52 separate items. `collapse`
+# folds the instances of each series in a listing back into one entry carrying the master's
+# RRULE, the number of occurrences in the window and only the occurrences that deviate from
+# the rule. The rule is expanded locally with dateutil, for the displayed window only.
+# The remaining helpers rewrite a master's recurrence to move a whole series or to split it
+# for "this and following" edits.
+
+RULE_PROPERTIES = ("RRULE", "EXRULE")
+DATE_PROPERTIES = ("RDATE", "EXDATE")
+UTC = datetime.timezone.utc
+WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+
+
+def _zone(value: Dict) -> Optional[datetime.tzinfo]:
+    name = value.get('timeZone')
+    if not name:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def is_all_day(event: Dict) -> bool:
+    return 'date' in event['start']
+
+
+def series_start(master: Dict) -> datetime.datetime:
+    """First occurrence, in the event's own time zone so the rule keeps its wall-clock time across DST."""
+    start = event_time(master['start'])
+    zone = _zone(master['start'])
+    return start.astimezone(zone) if zone else start
+
+
+def duration(event: Dict) -> datetime.timedelta:
+    return event_time(event['end']) - event_time(event['start'])
+
+
+def _split(line: str) -> Tuple[str, Dict[str, str], str]:
+    """('RRULE', {param: value}, value) for one recurrence line."""
+    head, value = line.split(":", 1)
+    name, *params = head.split(";")
+    return name.upper(), dict(p.split("=", 1) for p in params if "=" in p), value
+
+
+def rule_parts(value: str) -> Dict[str, str]:
+    """'FREQ=WEEKLY;BYDAY=MO' -> {'FREQ': 'WEEKLY', 'BYDAY': 'MO'}, in order."""
+    return dict(part.split("=", 1) for part in value.split(";") if "=" in part)
+
+
+def join_rule(parts: Dict[str, str]) -> str:
+    return "RRULE:" + ";".join(f"{k}={v}" for k, v in parts.items())
+
+
+def _until_utc(value: str, zone: datetime.tzinfo) -> str:
+    """UNTIL as a UTC timestamp, which dateutil requires when the start is timezone-aware."""
+    if value.endswith("Z"):
+        return value
+    if "T" in value:
+        local = datetime.datetime.strptime(value, "%Y%m%dT%H%M%S").replace(tzinfo=zone)
+    else:
+        # A date-only UNTIL includes the whole day
+        local = datetime.datetime.combine(datetime.datetime.strptime(value, "%Y%m%d").date(),
+                                          datetime.time(23, 59, 59), tzinfo=zone)
+    return local.astimezone(UTC).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _dates(params: Dict[str, str], value: str, zone: datetime.tzinfo) -> List[datetime.datetime]:
+    if 'TZID' in params:
+        with_zone = _zone({'timeZone': params['TZID']})
+        zone = with_zone or zone
+    dates = []
+    for item in value.split(","):
+        if item.endswith("Z"):
+            dates.append(datetime.datetime.strptime(item, "%Y%m%dT%H%M%SZ").replace(tzinfo=UTC))
+        elif "T" in item:
+            dates.append(datetime.datetime.strptime(item, "%Y%m%dT%H%M%S").replace(tzinfo=zone))
+        else:
+            dates.append(datetime.datetime.combine(datetime.datetime.strptime(item, "%Y%m%d").date(),
+                                                   datetime.time(), tzinfo=zone))
+    return dates
+
+
+def rule_set(master: Dict) -> rrule.rruleset:
+    """The master's RRULE/EXRULE/RDATE/EXDATE lines as a dateutil rule set starting at its first occurrence."""
+    start = series_start(master)
+    rules = rrule.rruleset()
+    rules.rdate(start)
+    for line in master.get('recurrence', []):
+        name, params, value = _split(line)
+        if name in RULE_PROPERTIES:
+            parts = rule_parts(value)
+            if 'UNTIL' in parts:
+                parts['UNTIL'] = _until_utc(parts['UNTIL'], start.tzinfo)
+            rule = rrule.rrulestr(";".join(f"{k}={v}" for k, v in parts.items()), dtstart=start)
+            (rules.rrule if name == "RRULE" else rules.exrule)(rule)
+        elif name in DATE_PROPERTIES:
+            for date in _dates(params, value, start.tzinfo):
+                (rules.rdate if name == "RDATE" else rules.exdate)(date)
+    return rules
+
+
+def occurrences(master: Dict, time_min: str, time_max: str) -> List[datetime.datetime]:
+    """Start times of the series' occurrences overlapping [time_min, time_max)."""
+    length = duration(master)
+    lo, hi = parse_time(time_min), parse_time(time_max)
+    return [o for o in rule_set(master).between(lo - length, hi, inc=True) if o < hi and o + length > lo]
+
+
+def _summarize(master: Dict, instances: List[Dict], time_min: str, time_max: str) -> Dict:
+    """One listing entry for a series: the rule, a count, and only the occurrences that differ from it."""
+    length = duration(master)
+    expected = {o.timestamp() for o in occurrences(master, time_min, time_max)}
+    seen, changed = set(), []
+    for instance in instances:
+        original = event_time(instance.get('originalStartTime') or instance['start'])
+        seen.add(original.timestamp())
+        if (event_time(instance['start']) != original or duration(instance) != length
+                or instance.get('summary') != master.get('summary')):
+            changed.append({'id': instance['id'], 'summary': instance.get('summary'),
+                            'originalStartTime': instance.get('originalStartTime'),
+                            'start': instance['start'], 'end': instance['end']})
+    first = instances[0]
+    entry = {
+        'id': master['id'],
+        'summary': master.get('summary'),
+        'recurrence': master.get('recurrence', []),
+        'start': first['start'],    # first occurrence in the window
+        'end': first['end'],
+        'occurrences': len(instances),
+    }
+    for key in ('location', 'calendarId', 'calendarSummary'):
+        if key in first:
+            entry[key] = first[key]
+    if changed:
+        entry['modifiedOccurrences'] = changed
+    cancelled = sorted(expected - seen)
+    if cancelled:
+        zone = series_start(master).tzinfo
+        entry['cancelledOccurrences'] = [datetime.datetime.fromtimestamp(t, zone).isoformat() for t in cancelled]
+    return entry
+
+
+def collapse(events: List[Dict], masters: Dict[Tuple[str, str], Dict], time_min: str, time_max: str) -> List[Dict]:
+    """
+    Replace the instances of each recurring series in a listing by one series entry.
+    Args:
+        events: Time-ordered instances, as returned with singleEvents=True
+        masters: {(calendar ID, series ID): recurring event} for the series to fold
+        time_min: Start of the listed window (ISO)
+        time_max: End of the listed window (ISO)
+    """
+    groups: Dict[Tuple[str, str], List[Dict]] = {}
+    for event in events:
+        key = (event.get('calendarId', 'primary'), event.get('recurringEventId'))
+        if key in masters:
+            groups.setdefault(key, []).append(event)
+    folded, done = [], set()
+    for event in events:
+        key = (event.get('calendarId', 'primary'), event.get('recurringEventId'))
+        if key not in groups or len(groups[key]) < 2:
+            folded.append(event)
+        elif key not in done:
+            done.add(key)
+            folded.append(_summarize(masters[key], groups[key], time_min, time_max))
+    return folded
+
+
+def series_to_fold(events: List[Dict]) -> List[Tuple[str, str]]:
+    """(calendar ID, series ID) of every series with more than one instance in a listing."""
+    counts = {}
+    for event in events:
+        if event.get('recurringEventId'):
+            key = (event.get('calendarId', 'primary'), event['recurringEventId'])
+            counts[key] = counts.get(key, 0) + 1
+    return [key for key, count in counts.items() if count > 1]
+
+
+def shift_weekdays(recurrence: List[str], days: int) -> List[str]:
+    """Move BYDAY weekdays by `days`, so a series moved from Monday to Tuesday keeps matching its rule."""
+    if not days % 7:
+        return list(recurrence)
+    shifted = []
+    for line in recurrence:
+        name, _, value = _split(line)
+        parts = rule_parts(value)
+        if name == "RRULE" and 'BYDAY' in parts:
+            days_out = []
+            for day in parts['BYDAY'].split(","):
+                prefix, weekday = day[:-2], day[-2:]
+                days_out.append(prefix + WEEKDAYS[(WEEKDAYS.index(weekday) + days) % 7])
+            parts['BYDAY'] = ",".join(days_out)
+            line = join_rule(parts)
+        shifted.append(line)
+    return shifted
+
+
+def split(master: Dict, at: datetime.datetime) -> Tuple[List[str], List[str]]:
+    """
+    Recurrence lines for cutting a series at occurrence `at`: (up to but excluding `at`, from `at` on).
+    A COUNT limit is divided between the two halves.
+    """
+    all_day = is_all_day(master)
+    before_count = None
+    head, tail = [], []
+    for line in master.get('recurrence', []):
+        name, _, value = _split(line)
+        if name != "RRULE":
+            head.append(line)
+            tail.append(line)
+            continue
+        parts = rule_parts(value)
+        ending = dict(parts)
+        ending.pop('COUNT', None)
+        if all_day:
+            ending['UNTIL'] = (at.date() - datetime.timedelta(days=1)).strftime("%Y%m%d")
+        else:
+            ending['UNTIL'] = (at - datetime.timedelta(seconds=1)).astimezone(UTC).strftime("%Y%m%dT%H%M%SZ")
+        head.append(join_rule(ending))
+        if 'COUNT' in parts:
+            if before_count is None:
+                before_count = sum(1 for _ in itertools.takewhile(lambda o: o < at, rule_set(master)))
+            parts['COUNT'] = str(max(1, int(parts['COUNT']) - before_count))
+        tail.append(join_rule(parts))
+    return head, tail
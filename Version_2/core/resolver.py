@@ -0,0 +1,112 @@
+import re
+import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+from core.event_store import LOCAL_TZ, event_start, parse_time
+
+# Resolve "my coffee break tomorrow" to a concrete event without an LLM round-trip.
+# Candidates come from a trigram index over event titles (tolerant to typos, spacing and
+# word order), then are ranked by title similarity, how well they match an optional time
+# hint, and recency (upcoming events first, nearest first). A single clear winner can be
+# acted on directly; close runners-up are returned for the LLM to disambiguate.
+
+STOPWORDS = {"a", "an", "the", "my", "our", "with", "event", "meeting", "call", "appointment"}
+MIN_TITLE_SCORE = 0.5      # below this an event is not considered a match at all
+AMBIGUITY_MARGIN = 0.1     # runner-up within this much of the best makes the match ambiguous
+MAX_CANDIDATES = 5
+
+
+def _tokens(text: str) -> List[str]:
+    words = re.findall(r"[a-z0-9]+", (text or "").casefold())
+    content = [w for w in words if w not in STOPWORDS]
+    return content or words
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f" {' '.join(_tokens(text))} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def title_score(query: Set[str], title: Set[str]) -> float:
+    """How much of the query appears in the title, tempered by overall similarity (Dice)."""
+    if not query or not title:
+        return 0.0
+    shared = len(query & title)
+    return 0.7 * shared / len(query) + 0.3 * 2 * shared / (len(query) + len(title))
+
+
+class TitleIndex:
+    """Trigram inverted index over event titles."""
+
+    def __init__(self, events: Iterable[Dict]):
+        self.events = list(events)
+        self.grams = [trigrams(e.get("summary", "")) for e in self.events]
+        self.postings: Dict[str, Set[int]] = {}
+        for i, grams in enumerate(self.grams):
+            for gram in grams:
+                self.postings.setdefault(gram, set()).add(i)
+
+    def search(self, query: str) -> List[tuple]:
+        """(title score, event) for every event sharing a trigram with the query."""
+        wanted = trigrams(query)
+        hits = set().union(*(self.postings.get(g, ()) for g in wanted)) if wanted else set()
+        return [(title_score(wanted, self.grams[i]), self.events[i]) for i in hits]
+
+
+class Candidate(NamedTuple):
+    score: float
+    event: Dict
+
+    def to_dict(self) -> Dict:
+        return {"id": self.event.get("id"), "summary": self.event.get("summary"), "start": self.event.get("start"),
+                "end": self.event.get("end"), "score": round(self.score, 3)}
+
+
+def hint_window(date_hint: Optional[str], now: datetime.datetime, days_ahead: int) -> tuple:
+    """(time_min, time_max) ISO strings to search: the hinted local day, or around now."""
+    if date_hint:
+        day = parse_time(date_hint).astimezone(LOCAL_TZ).date() if "T" in date_hint \
+            else datetime.date.fromisoformat(date_hint)
+        start = datetime.datetime.combine(day, datetime.time(), tzinfo=LOCAL_TZ)
+        return start.isoformat(), (start + datetime.timedelta(days=1)).isoformat()
+    return (now - datetime.timedelta(days=1)).isoformat(), (now + datetime.timedelta(days=days_ahead)).isoformat()
+
+
+def _time_score(event: Dict, date_hint: str) -> float:
+    start = event_start(event)
+    if "T" not in date_hint:
+        return 1.0 if start.astimezone(LOCAL_TZ).date().isoformat() == date_hint else 0.0
+    hours_off = abs((start - parse_time(date_hint)).total_seconds()) / 3600
+    return 1.0 if hours_off < 1 / 60 else max(0.0, 0.5 * (1 - hours_off / 24))
+
+
+def _recency_score(event: Dict, now: datetime.datetime) -> float:
+    days = (event_start(event) - now).total_seconds() / 86400
+    return 1 / (1 + days / 7) if days >= 0 else 0.3 / (1 - days)
+
+
+def rank(description: str, events: Iterable[Dict], now: datetime.datetime,
+         date_hint: Optional[str] = None) -> List[Candidate]:
+    """
+    Events matching a description, best first.
+    Args:
+        description: How the user referred to the event, e.g. "coffee break"
+        events: Events to search
+        now: Reference time for recency
+        date_hint: Optional date (YYYY-MM-DD) or ISO time the event currently has
+    """
+    ranked = []
+    for title, event in TitleIndex(events).search(description):
+        if title < MIN_TITLE_SCORE:
+            continue
+        if date_hint:
+            score = 0.6 * title + 0.25 * _time_score(event, date_hint) + 0.15 * _recency_score(event, now)
+        else:
+            score = 0.8 * title + 0.2 * _recency_score(event, now)
+        ranked.append(Candidate(score, event))
+    ranked.sort(key=lambda c: c.score, reverse=True)
+    return ranked
+
+
+def is_ambiguous(ranked: List[Candidate]) -> bool:
+    return len(ranked) > 1 and ranked[1].score >= ranked[0].score - AMBIGUITY_MARGIN
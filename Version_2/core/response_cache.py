@@ -0,0 +1,261 @@
+import os
+import re
+import time
+import hashlib
+import datetime
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from core import event_store, metering
+from core.credentials import current_user_id
+from core.event_store import LOCAL_TZ, parse_time
+from core.intent import normalize_query, wants_write
+
+# Response cache for repeated read-only questions.
+# "What's my day look like?" asked again while nothing changed gets the earlier answer
+# without an LLM call. Entries are keyed by the normalized question, the system prompt
+# (which carries the persona), the local date and the previous exchange of the conversation.
+# Each entry also records the calendars and time ranges its turn read, with a fingerprint of
+# them (event IDs and ETags plus a counter of this process's writes); a lookup only hits while
+# that fingerprint is unchanged. Anything that looks like a write, or a follow-up that depends
+# on earlier turns, bypasses the cache; a turn that ends up calling a write tool is not stored.
+
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", 300))   # 0 disables the cache
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", 256))
+FINGERPRINT_DAYS = int(os.environ.get("RESPONSE_CACHE_WINDOW_DAYS", 7))
+
+CONTEXT_DEPENDENT = re.compile(r"\b(it|that|those|them|same|again|instead|yes|no|ok|okay|sure)\b")
+WRITE_TOOLS = {"create_event", "update_event", "delete_event", "update_series", "delete_series", "reschedule_by_description",
+               "cancel_by_description", "import_ics", "export_ics", "send_email_notification"}
+
+
+def is_cacheable(query: str) -> bool:
+    """False for write intents and for follow-ups whose meaning depends on earlier turns."""
+    return bool(query) and not (wants_write(query) or CONTEXT_DEPENDENT.search(query))
+
+
+# Writes made by this process, per user; part of the fingerprint so they invalidate at once
+_changes: Dict[Optional[str], int] = {}
+_changes_lock = threading.Lock()
+
+
+def _on_change(owner, calendar_id, start, end):
+    with _changes_lock:
+        _changes[owner] = _changes.get(owner, 0) + 1
+
+
+event_store.add_listener(_on_change)
+
+
+def change_count() -> int:
+    """Writes this process has made for the current user."""
+    with _changes_lock:
+        return _changes.get(current_user_id(), 0)
+
+
+# (calendar IDs, time_min, time_max) a turn listed
+Scope = Tuple[Tuple[str, ...], str, str]
+
+
+def _default_scope() -> Scope:
+    start = datetime.datetime.combine(datetime.datetime.now(LOCAL_TZ).date(), datetime.time(), tzinfo=LOCAL_TZ)
+    return ("primary",), start.isoformat(), (start + datetime.timedelta(days=FINGERPRINT_DAYS)).isoformat()
+
+
+def _tool_calls(messages: List[BaseMessage]):
+    """(name, args) of every tool call in the messages, including the steps of a make_plan call."""
+    for m in messages:
+        if not isinstance(m, AIMessage):
+            continue
+        for call in m.tool_calls:
+            args = call.get("args") or {}
+            if call["name"] == "make_plan":
+                for step in args.get("steps") or []:
+                    if isinstance(step, dict):
+                        yield step.get("tool"), step.get("args") or {}
+            else:
+                yield call["name"], args
+
+
+def _scope(name: str, args: Dict) -> Scope:
+    calendars = tuple(args.get("calendar_ids") or ["primary"])
+    if name in ("list_events", "schedule_analytics"):
+        return calendars, args["time_min"], args["time_max"]
+    if name == "check_availability":
+        return calendars, args["start_time"], args["end_time"]
+    if name == "find_available_slots":
+        date = args["date_str"]
+        return (calendars, f"{date}T{int(args.get('start_hour', 9)):02d}:00:00+05:30",
+                f"{date}T{int(args.get('end_hour', 18)):02d}:00:00+05:30")
+    if name == "find_conflicts":
+        slots = args["slots"]
+        return (calendars, min((s["start"] for s in slots), key=parse_time),
+                max((s["end"] for s in slots), key=parse_time))
+    # Event details, the calendar list, the action log: no range to go by
+    return _default_scope()
+
+
+def read_scopes(messages: List[BaseMessage]) -> List[Scope]:
+    """Calendar ranges the tool calls in `messages` read; the default window where a call's range is unknown."""
+    scopes = set()
+    for name, args in _tool_calls(messages):
+        if name in WRITE_TOOLS:
+            continue
+        try:
+            scope = _scope(name, args)
+            for value in scope[1:]:
+                parse_time(value)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            scope = _default_scope()
+        scopes.add((tuple(str(c) for c in scope[0]), scope[1], scope[2]))
+    return sorted(scopes)
+
+
+def calendar_fingerprint(scopes: List[Scope], changes: Optional[int] = None) -> Optional[str]:
+    """
+    Digest of the events in the given ranges, or None if one cannot be read.
+    Args:
+        scopes: (calendar IDs, time_min, time_max) to list
+        changes: This process's write count to include; defaults to the current one
+    """
+    # Imported here: core.tools imports the agent-facing tools, which do not need this module
+    from core.tools import list_events
+
+    digest = hashlib.sha256(str(change_count() if changes is None else changes).encode())
+    for calendars, time_min, time_max in scopes:
+        events = list_events.invoke({"time_min": time_min, "time_max": time_max, "calendar_ids": list(calendars),
+                                     "expand_recurring": True})
+        if events and "error" in events[0]:
+            return None
+        digest.update(f"#{','.join(calendars)}/{time_min}/{time_max}".encode())
+        for event in sorted(events, key=lambda e: (e.get("calendarId", ""), e.get("id", ""))):
+            digest.update(f"|{event.get('calendarId')}:{event.get('id')}:"
+                          f"{event.get('etag') or event.get('updated')}".encode())
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    Final replies by turn key, with a TTL and LRU eviction.
+    Args:
+        ttl: Seconds an answer is reused; 0 disables the cache
+        max_entries: Entries kept before the least recently used is evicted
+    """
+
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL, max_entries: int = RESPONSE_CACHE_SIZE,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.lock = threading.Lock()
+        # key -> (reply, stored at, seconds the original turn took, ranges read, their fingerprint)
+        self.entries: "OrderedDict[str, Tuple[str, float, float, List[Scope], str]]" = OrderedDict()
+        self.hits = self.misses = self.bypassed = 0
+        self.seconds_saved = 0.0
+
+    def get(self, key: str) -> Optional[Tuple[str, float, List[Scope], str]]:
+        """(reply, seconds the original turn took, ranges read, their fingerprint) if fresh."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or self.clock() - entry[1] >= self.ttl:
+                self.entries.pop(key, None)
+                return None
+            self.entries.move_to_end(key)
+            return entry[0], entry[2], entry[3], entry[4]
+
+    def put(self, key: str, reply: str, seconds: float, scopes: List[Scope], fingerprint: str):
+        with self.lock:
+            self.entries[key] = (reply, self.clock(), seconds, scopes, fingerprint)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, key: str):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def stats(self) -> Dict[str, float]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "bypassed": self.bypassed,
+                    "hit_rate": self.hits / lookups if lookups else 0.0, "seconds_saved": self.seconds_saved,
+                    "entries": len(self.entries)}
+
+    def _count(self, outcome: str, seconds_saved: float = 0.0):
+        with self.lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            self.seconds_saved += seconds_saved
+
+
+cache = ResponseCache()
+
+
+def previous_exchange(messages: List[BaseMessage]) -> str:
+    """Text of the user message and replies before the last message; empty on a first turn."""
+    earlier = messages[1:-1]
+    asked = [i for i, m in enumerate(earlier) if isinstance(m, HumanMessage)]
+    if not asked:
+        return ""
+    return "\n".join(f"{m.type}: {m.content}" for m in earlier[asked[-1]:]
+                     if isinstance(m, (HumanMessage, AIMessage)) and isinstance(m.content, str) and m.content)
+
+
+def turn_key(messages: List[BaseMessage]) -> Optional[str]:
+    """Cache key for answering the last message, or None if the turn must run."""
+    if not isinstance(messages[-1], HumanMessage) or not isinstance(messages[-1].content, str):
+        return None
+    query = normalize_query(messages[-1].content)
+    if not is_cacheable(query):
+        return None
+    # "When am I free on the 8th?" means something else after a different question
+    material = "\n".join((str(current_user_id()), datetime.datetime.now(LOCAL_TZ).date().isoformat(),
+                          hashlib.sha256(str(messages[0].content).encode()).hexdigest(),
+                          hashlib.sha256(previous_exchange(messages).encode()).hexdigest(), query))
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def _wrote(messages: List[BaseMessage]) -> bool:
+    return any(name in WRITE_TOOLS for name, _ in _tool_calls(messages))
+
+
+def respond(messages: List[BaseMessage], run: Callable[[], List[BaseMessage]]) -> BaseMessage:
+    """
+    Answer the last message from the cache, or via `run()` (the turn's resulting messages).
+    Args:
+        messages: Conversation sent to the agent, system prompt first
+        run: Runs the agent turn and returns the full resulting message list
+    """
+    if cache.ttl <= 0:
+        return run()[-1]
+    started = time.perf_counter()
+    key = turn_key(messages)
+    if key is None:
+        cache._count("bypassed")
+        return run()[-1]
+    cached = cache.get(key)
+    if cached is not None:
+        reply, seconds, scopes, fingerprint = cached
+        if calendar_fingerprint(scopes) == fingerprint:
+            saved = max(0.0, seconds - (time.perf_counter() - started))
+            cache._count("hits", saved)
+            metering.record("response_cache_hits")
+            metering.record("response_cache_seconds_saved", saved)
+            return AIMessage(content=reply)
+        cache.discard(key)
+    cache._count("misses")
+    metering.record("response_cache_misses")
+    # Taken before the turn, so a write made meanwhile leaves the stored fingerprint stale
+    changes = change_count()
+    result = run()
+    seconds = time.perf_counter() - started
+    reply, new = result[-1], result[len(messages):]
+    if isinstance(reply.content, str) and reply.content and not _wrote(new):
+        # Inside the turn's read scope, so the listings are the ones the turn itself saw
+        scopes = read_scopes(new)
+        fingerprint = calendar_fingerprint(scopes, changes)
+        if fingerprint is not None:
+            cache.put(key, reply.content, seconds, scopes, fingerprint)
+    return reply
@@ -0,0 +1,275 @@
+import os
+import re
+import time
+import threading
+from collections import deque
+from contextvars import copy_context
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from core import metering, tracing
+from core.providers import DEFAULT_PROVIDER, get_llm
+from core.intent import normalize_query, wants_write
+
+# Latency-aware model routing.
+# Each `chatbot` step is classified as "fast" (confirmations, lookups, summarizing tool
+# results) or "reasoning" (writes, multi-step requests, recovering from tool errors) and
+# sent to that tier's routes. The tier follows the intent of the user message that started
+# the turn, so a write request stays on the reasoning tier after its first tool results. Every route keeps a rolling window of latencies and errors:
+# routes with a high recent error rate are tried last, a failed call fails over to the next
+# route at once, and a call still running after the hedge deadline is raced against the
+# next route. Routes are configured as `provider[:model][@base_url]`, e.g.
+#   LLM_ROUTES_FAST=openai:qwen2.5-7b@http://localhost:9001/v1
+#   LLM_ROUTES_REASONING=deepseek,gemini
+
+FAST, REASONING = "fast", "reasoning"
+ROUTER_WINDOW = int(os.environ.get("ROUTER_WINDOW", 50))                 # calls remembered per route
+ROUTER_MAX_ERROR_RATE = float(os.environ.get("ROUTER_MAX_ERROR_RATE", 0.5))
+ROUTER_COOLDOWN = float(os.environ.get("ROUTER_COOLDOWN", 30))           # seconds an unhealthy route is demoted
+ROUTER_HEDGE_AFTER = os.environ.get("ROUTER_HEDGE_AFTER")                # seconds; unset = adaptive (1.5 x p95)
+ROUTER_HEDGE_DEFAULT = 8.0                                               # until a route has latency samples
+ROUTER_HEDGE_MIN = 0.05
+
+COMPLEX_WORDS = 25
+MULTI_STEP = re.compile(r"\b(and then|then|after that|also|as well as|every|each|all my)\b|;")
+CONFIRMATION = re.compile(r"(yes|yeah|yep|no|nope|ok|okay|sure|thanks|thank you|great|perfect|sounds good|do it|go ahead)( thanks| please)*")
+MAX_FAST_STEPS = 3
+
+
+def _text(message: BaseMessage) -> str:
+    return message.content if isinstance(message.content, str) else ""
+
+
+def intent_tier(messages: Sequence[BaseMessage]) -> str:
+    """Tier the user's request needs, from the human message that started the current turn."""
+    humans = [m for m in messages if isinstance(m, HumanMessage)]
+    if not humans:
+        return REASONING
+    query = normalize_query(_text(humans[-1]))
+    if CONFIRMATION.fullmatch(query):
+        # "yes, go ahead" carries out whatever the previous request was about
+        return intent_tier(messages[:messages.index(humans[-1])]) if len(humans) > 1 else FAST
+    if len(query.split()) > COMPLEX_WORDS or MULTI_STEP.search(query) or wants_write(query):
+        return REASONING
+    return FAST
+
+
+def classify(messages: Sequence[BaseMessage]) -> str:
+    """Tier for the next model step of a conversation."""
+    if intent_tier(messages) == REASONING:
+        return REASONING
+    if not isinstance(messages[-1], ToolMessage):
+        return FAST
+    steps, results = 0, []
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            break
+        steps += isinstance(message, AIMessage)
+        if isinstance(message, ToolMessage) and not steps:
+            results.append(str(message.content))
+    # Errors and ambiguous matches need judgement; long tool chains are complex requests
+    if steps >= MAX_FAST_STEPS or any('"error"' in r or "'error'" in r or "candidates" in r for r in results):
+        return REASONING
+    return FAST
+
+
+class RouteStats:
+    """Rolling latency and error record of one route."""
+
+    def __init__(self, window: int = ROUTER_WINDOW, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.calls: deque = deque(maxlen=window)   # (seconds, ok)
+        self.last_failure: Optional[float] = None
+
+    def record(self, seconds: float, ok: bool):
+        with self.lock:
+            self.calls.append((seconds, ok))
+            if not ok:
+                self.last_failure = self.clock()
+
+    def error_rate(self) -> float:
+        with self.lock:
+            return sum(not ok for _, ok in self.calls) / len(self.calls) if self.calls else 0.0
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Latency percentile of successful calls, None before the first one."""
+        with self.lock:
+            ordered = sorted(s for s, ok in self.calls if ok)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def healthy(self) -> bool:
+        with self.lock:
+            recent_failure = self.last_failure is not None and self.clock() - self.last_failure < ROUTER_COOLDOWN
+            enough = len(self.calls) >= 4
+        return not (recent_failure and enough and self.error_rate() >= ROUTER_MAX_ERROR_RATE)
+
+    def to_dict(self) -> Dict:
+        with self.lock:
+            calls = len(self.calls)
+        return {"calls": calls, "error_rate": self.error_rate(), "p50": self.percentile(50),
+                "p95": self.percentile(95), "healthy": self.healthy()}
+
+
+class Route:
+    """
+    One chat model endpoint.
+    Args:
+        name: Label used in stats and traces
+        factory: Builds the LangChain chat model on first use
+    """
+
+    def __init__(self, name: str, factory: Callable[[], object]):
+        self.name = name
+        self.factory = factory
+        self.stats = RouteStats()
+        self.lock = threading.Lock()
+        self._llm = None
+
+    @property
+    def llm(self):
+        with self.lock:
+            if self._llm is None:
+                self._llm = self.factory()
+            return self._llm
+
+
+def parse_route(spec: str) -> Route:
+    """Route from `provider[:model][@base_url]`; a base URL applies to OpenAI-compatible providers."""
+    spec = spec.strip()
+    head, _, base_url = spec.partition("@")
+    provider, _, model = head.partition(":")
+    overrides = {}
+    if model:
+        overrides["repo_id" if provider == "huggingface" else "model"] = model
+    if base_url:
+        overrides["openai_api_base"] = base_url
+    return Route(spec, lambda: get_llm(provider, **overrides))
+
+
+# Shared by all routers; a hedged call that lost the race finishes here in the background
+_pool = ThreadPoolExecutor(max_workers=int(os.environ.get("ROUTER_WORKERS", 16)), thread_name_prefix="llm-route")
+
+
+class ModelRouter:
+    """
+    Drop-in for a chat model in the agent graph: `bind_tools()` and `invoke()`.
+    Args:
+        tiers: Routes per tier ("fast", "reasoning"), in order of preference
+        hedge_after: Seconds before a slow call is hedged; None adapts to each route's p95
+        classifier: Picks the tier for a list of messages
+    """
+
+    def __init__(self, tiers: Dict[str, List[Route]], hedge_after: Optional[float] = None,
+                 classifier: Callable[[Sequence[BaseMessage]], str] = classify, tools=None, tool_kwargs=None):
+        self.tiers = {tier: routes for tier, routes in tiers.items() if routes}
+        self.hedge_after = hedge_after
+        self.classifier = classifier
+        self.tools = tools
+        self.tool_kwargs = tool_kwargs or {}
+        self.bound: Dict[str, object] = {}
+        self.lock = threading.Lock()
+
+    def bind_tools(self, tools, **kwargs) -> "ModelRouter":
+        return ModelRouter(self.tiers, self.hedge_after, self.classifier, tools, kwargs)
+
+    def routes(self) -> List[Route]:
+        seen = {}
+        for routes in self.tiers.values():
+            for route in routes:
+                seen.setdefault(route.name, route)
+        return list(seen.values())
+
+    def stats(self) -> Dict[str, Dict]:
+        return {route.name: route.stats.to_dict() for route in self.routes()}
+
+    def order(self, tier: str) -> List[Route]:
+        """Routes to try: the tier's, then the other tiers' as a last resort; healthy and faster first."""
+        preferred = self.tiers.get(tier) or next(iter(self.tiers.values()))
+        rest = [r for r in self.routes() if r not in preferred]
+        def key(route):
+            return (not route.stats.healthy(), route.stats.percentile(50) or 0.0)
+        return sorted(preferred, key=key) + sorted(rest, key=key)
+
+    def _model(self, route: Route):
+        if self.tools is None:
+            return route.llm
+        with self.lock:
+            if route.name not in self.bound:
+                self.bound[route.name] = route.llm.bind_tools(self.tools, **self.tool_kwargs)
+            return self.bound[route.name]
+
+    def _deadline(self, route: Route) -> float:
+        if self.hedge_after is not None:
+            return self.hedge_after
+        if ROUTER_HEDGE_AFTER:
+            return float(ROUTER_HEDGE_AFTER)
+        p95 = route.stats.percentile(95)
+        return ROUTER_HEDGE_DEFAULT if p95 is None else max(ROUTER_HEDGE_MIN, 1.5 * p95)
+
+    def _call(self, route: Route, messages, **kwargs):
+        started = time.perf_counter()
+        with tracing.span("llm", route=route.name):
+            try:
+                response = self._model(route).invoke(messages, **kwargs)
+            except Exception:
+                route.stats.record(time.perf_counter() - started, False)
+                raise
+        route.stats.record(time.perf_counter() - started, True)
+        return response
+
+    def invoke(self, messages, **kwargs):
+        tier = self.classifier(messages)
+        remaining = self.order(tier)
+        pending = {}
+        errors = []
+
+        def launch():
+            route = remaining.pop(0)
+            pending[_pool.submit(copy_context().run, self._call, route, messages, **kwargs)] = route
+            return route
+
+        with tracing.span("router", tier=tier) as span:
+            started = launch()
+            while pending:
+                timeout = self._deadline(started) if remaining else None
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    # Still waiting at the deadline: race the next route
+                    metering.record("llm_hedges")
+                    started = launch()
+                    continue
+                for future in done:
+                    route = pending.pop(future)
+                    try:
+                        response = future.result()
+                    except Exception as e:
+                        errors.append(f"{route.name}: {e}")
+                        if remaining and not pending:
+                            metering.record("llm_failovers")
+                            started = launch()
+                        continue
+                    span.set(route=route.name)
+                    return response
+        raise RuntimeError("All model routes failed: " + "; ".join(errors))
+
+
+def from_env() -> Optional[ModelRouter]:
+    """Router from LLM_ROUTES_FAST / LLM_ROUTES_REASONING, or None when neither is set."""
+    routes: Dict[str, Route] = {}
+    def parse(name):
+        specs = [s.strip() for s in os.environ.get(name, "").split(",") if s.strip()]
+        # A route listed in both tiers shares one client and one set of stats
+        return [routes.setdefault(spec, parse_route(spec)) for spec in specs]
+    fast, reasoning = parse("LLM_ROUTES_FAST"), parse("LLM_ROUTES_REASONING")
+    if not fast and not reasoning:
+        return None
+    if not reasoning:
+        # Only a fast tier configured: complex steps keep using the default provider
+        provider = os.getenv("LLM_PROVIDER", DEFAULT_PROVIDER)
+        reasoning = [Route(provider, lambda: get_llm(provider))]
+    return ModelRouter({FAST: fast, REASONING: reasoning})
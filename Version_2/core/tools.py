@@ -1,28 +1,67 @@
 import os
 import json
+import heapq
 import datetime
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List, Dict
 from langchain_core.tools import tool
 from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from core.tracing import traced
+from core import calendar_client, ics, idempotency, metering, outbox, recurrence, resolver, tracing
+from core.event_store import event_start as _event_start, event_time as _event_time, get_store, parse_time
+from core.credentials import current_credentials, current_user_id
 
 # Directory for logs (sharing with Version 1.0 for consistency if needed, but keeping it local to Version 2 if desired)
 LOG_DIR = os.path.join(os.path.dirname(__file__), "..", "event_logs")
 os.makedirs(LOG_DIR, exist_ok=True)
 
+# .ics files for import/export; in the multi-user service each user gets a subfolder
+ICS_DIR = os.environ.get("ICS_DIR", os.path.join(os.path.dirname(__file__), "..", "data", "ics"))
+
+# Days ahead searched when resolving an event description without a date hint
+RESOLVER_WINDOW_DAYS = int(os.environ.get("RESOLVER_WINDOW_DAYS", 30))
+
+# Pass calendar_ids=["all"] to a listing tool to include every visible calendar
+ALL_CALENDARS = "all"
+# Calendars fetched in parallel when a tool spans several of them
+FANOUT_WORKERS = int(os.environ.get("CALENDAR_FANOUT_WORKERS", 8))
+
+# Built services per set of credentials: the token refresh and discovery build run once, not on every tool call.
+# The access token is refreshed by the authorized transport when it expires.
+_services: Dict[tuple, object] = {}
+_services_lock = threading.Lock()
+
 def get_calendar_service():
-    """Builds the Google Calendar service using OAuth 2.0 Credentials."""
-    client_id = os.environ.get("GOOGLE_CLIENT_ID")
-    client_secret = os.environ.get("GOOGLE_CLIENT_SECRET")
-    refresh_token = os.environ.get("GOOGLE_REFRESH_TOKEN")
+    """Builds (once per set of credentials) the Google Calendar service using OAuth 2.0 Credentials."""
+    user_credentials = current_credentials()
 
-    if not all([client_id, client_secret, refresh_token]):
+    if not user_credentials:
         print("Error: Missing Google OAuth 2.0 credentials in environment variables.")
         return None
 
+    key = tuple(user_credentials)
+    with _services_lock:
+        service = _services.get(key)
+    if service is None:
+        # Built outside the lock so one user's slow token refresh does not hold up the others
+        service = _build_service(*user_credentials)
+        if service is not None:
+            with _services_lock:
+                service = _services.setdefault(key, service)
+    return service
+
+def _build_service(client_id: str, client_secret: str, refresh_token: str):
+    """Refreshes an access token and builds the discovery client; None on failure."""
     try:
+        # Imported lazily: the discovery client is slow to import and only needed once a tool runs
+        import httplib2
+        import google_auth_httplib2
+        from googleapiclient.discovery import build
+        from googleapiclient.http import HttpRequest
+
         creds = Credentials(
             None,
             refresh_token=refresh_token,
@@ -36,16 +75,114 @@ def get_calendar_service():
         if not creds.valid:
             creds.refresh(Request())
 
-        service = build('calendar', 'v3', credentials=creds)
+        # httplib2 connections are not thread-safe; give every request its own so calendars can be fetched in parallel
+        def build_request(http, *args, **kwargs):
+            return HttpRequest(google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http()), *args, **kwargs)
+
+        service = build('calendar', 'v3', requestBuilder=build_request,
+                        http=google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http()))
         return service
     except Exception as e:
         print(f"Error creating Google Calendar service: {e}")
         return None
 
+def _execute(request, lane: int = calendar_client.INTERACTIVE):
+    """Run a Calendar API request through the rate-limited, retrying executor."""
+    return calendar_client.execute(request, lane)
+
+def _log_dir() -> str:
+    """Log folder for the current user; the shared folder in single-user mode."""
+    user_id = current_user_id()
+    if not user_id:
+        return LOG_DIR
+    path = os.path.join(LOG_DIR, "users", user_id)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _calendar_list(service, lane: int = calendar_client.INTERACTIVE, refresh: bool = False) -> List[Dict]:
+    """The user's calendar list, from the store while fresh."""
+    store = get_store()
+    calendars = None if refresh else store.calendar_list()
+    if calendars is None:
+        calendars = _execute(service.calendarList().list(), lane).get('items', [])
+        store.put_calendar_list(calendars)
+    return calendars
+
+def _resolve_calendars(service, calendar_ids: Optional[List[str]]) -> Dict[str, str]:
+    """Map of calendar ID to display name for the requested set; defaults to the primary calendar."""
+    if not calendar_ids:
+        return {'primary': 'primary'}
+    if ALL_CALENDARS not in calendar_ids:
+        return {calendar_id: calendar_id for calendar_id in calendar_ids}
+    calendars = _calendar_list(service)
+    return {c['id']: c.get('summaryOverride') or c.get('summary', c['id']) for c in calendars if not c.get('hidden')}
+
+def _calendar_events(service, calendar_id: str, time_min: str, time_max: str,
+                     lane: int = calendar_client.INTERACTIVE, refresh: bool = False) -> List[Dict]:
+    """
+    Every event of one calendar in the range, in start order (the API returns each page sorted).
+    With refresh=True the range is listed again even if the store still covers it.
+    """
+    store = get_store()
+    if not refresh and store.covers(calendar_id, time_min, time_max):
+        return store.overlapping(calendar_id, time_min, time_max)
+    events, page_token = [], None
+    while True:
+        result = _execute(service.events().list(
+            calendarId=calendar_id,
+            timeMin=time_min,
+            timeMax=time_max,
+            singleEvents=True,
+            orderBy='startTime',
+            pageToken=page_token
+        ), lane)
+        events.extend(result.get('items', []))
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            store.load(calendar_id, time_min, time_max, events)
+            return events
+
+def _fetch_events(service, calendars: Dict[str, str], time_min: str, time_max: str) -> List[Dict]:
+    """
+    Events from several calendars, fetched concurrently and merged into one time-ordered list.
+    Each event is tagged with `calendarId` and `calendarSummary`. Calendars that fail are
+    reported as leading {"error": ..., "calendarId": ...} entries.
+    """
+    def fetch(calendar_id):
+        try:
+            return [dict(event, calendarId=calendar_id, calendarSummary=calendars[calendar_id])
+                    for event in _calendar_events(service, calendar_id, time_min, time_max)]
+        except Exception as e:
+            return e
+
+    if len(calendars) == 1:
+        results = [fetch(calendar_id) for calendar_id in calendars]
+    else:
+        # Copy the context into each worker so metering, tracing and the read cache follow the call
+        with ThreadPoolExecutor(max_workers=max(1, min(FANOUT_WORKERS, len(calendars)))) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, fetch, calendar_id) for calendar_id in calendars]
+            results = [future.result() for future in futures]
+
+    errors = [{"error": str(r), "calendarId": calendar_id} for calendar_id, r in zip(calendars, results)
+              if isinstance(r, Exception)]
+    # Each calendar is already sorted, so a k-way merge keeps the order without re-sorting
+    merged = heapq.merge(*(r for r in results if not isinstance(r, Exception)), key=_event_start)
+    return errors + list(merged)
+
+def _ics_path(file_path: str) -> str:
+    """Where an .ics file lives; service users are confined to their own folder under ICS_DIR."""
+    user_id = current_user_id()
+    if not user_id:
+        path = os.path.expanduser(file_path)
+        return path if os.path.isabs(path) else os.path.join(ICS_DIR, path)
+    folder = os.path.join(ICS_DIR, "users", user_id)
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, os.path.basename(file_path))
+
 def log_action(action: str, details: str, target_date: Optional[str] = None):
     """Log calendar actions to a daily file."""
     log_date = target_date if target_date else datetime.datetime.now().strftime("%Y-%m-%d")
-    log_file = os.path.join(LOG_DIR, f"event_log_{log_date}.txt")
+    log_file = os.path.join(_log_dir(), f"event_log_{log_date}.txt")
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     log_entry = f"[{timestamp}] {action.upper()}: {details}\n"
     
@@ -53,19 +190,21 @@ def log_action(action: str, details: str, target_date: Optional[str] = None):
         f.write(log_entry)
 
 @tool
+@traced("tool.get_daily_schedule")
 def get_daily_schedule(date_str: str) -> str:
     """
     Get the schedule/logs for a specific date from the event_logs folder.
     Args:
         date_str: Date in YYYY-MM-DD format.
     """
-    filename = os.path.join(LOG_DIR, f"event_log_{date_str}.txt")
+    filename = os.path.join(_log_dir(), f"event_log_{date_str}.txt")
     if os.path.exists(filename):
         with open(filename, "r") as f:
             return f.read()
     return f"No events recorded for {date_str}."
 
 @tool
+@traced("tool.list_calendars")
 def list_calendars() -> List[Dict]:
     """Lists all calendars available in the user's account."""
     service = get_calendar_service()
@@ -73,36 +212,68 @@ def list_calendars() -> List[Dict]:
         return [{"error": "Authentication failed"}]
     
     try:
-        calendar_list = service.calendarList().list().execute()
-        return calendar_list.get('items', [])
+        return [dict(c) for c in _calendar_list(service)]
     except Exception as e:
         return [{"error": str(e)}]
 
+def _series_masters(service, events: List[Dict]) -> Dict:
+    """The recurring events behind the series in a listing, from the store or one batched API round-trip."""
+    store, masters, missing = get_store(), {}, []
+    for calendar_id, series_id in recurrence.series_to_fold(events):
+        master = store.master(calendar_id, series_id)
+        if master is None:
+            missing.append((calendar_id, series_id))
+        else:
+            masters[(calendar_id, series_id)] = master
+    if not missing:
+        return masters
+
+    def fetched(request_id, response, exception):
+        # A series whose master cannot be read is left expanded
+        if exception is None:
+            calendar_id, series_id = missing[int(request_id)]
+            store.put_master(calendar_id, response)
+            masters[(calendar_id, series_id)] = response
+
+    for first in range(0, len(missing), ics.BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=fetched)
+        for i in range(first, min(first + ics.BATCH_SIZE, len(missing))):
+            calendar_id, series_id = missing[i]
+            batch.add(service.events().get(calendarId=calendar_id, eventId=series_id), request_id=str(i))
+        try:
+            _execute(batch)
+        except Exception:
+            pass
+    return masters
+
 @tool
-def list_events(time_min: str, time_max: str) -> List[Dict]:
+@traced("tool.list_events")
+def list_events(time_min: str, time_max: str, calendar_ids: Optional[List[str]] = None,
+                expand_recurring: bool = False) -> List[Dict]:
     """
-    List calendar events for a given date range.
+    List calendar events for a given date range, in start order across the chosen calendars.
+    A recurring event appears once, with its 'recurrence' rule, the number of 'occurrences' in the
+    range and any modified or cancelled occurrences; its 'id' is the series ID.
     Args:
         time_min: Start time in ISO format (e.g., 2023-10-25T10:00:00Z)
         time_max: End time in ISO format
+        calendar_ids: Calendar IDs from list_calendars, or ["all"] for every visible calendar; defaults to primary
+        expand_recurring: List every occurrence of recurring events separately instead
     """
     service = get_calendar_service()
     if not service:
         return [{"error": "Authentication failed"}]
 
     try:
-        events_result = service.events().list(
-            calendarId='primary', 
-            timeMin=time_min, 
-            timeMax=time_max,
-            singleEvents=True, 
-            orderBy='startTime'
-        ).execute()
-        return events_result.get('items', [])
+        events = _fetch_events(service, _resolve_calendars(service, calendar_ids), time_min, time_max)
+        if expand_recurring:
+            return events
+        return recurrence.collapse(events, _series_masters(service, events), time_min, time_max)
     except Exception as e:
         return [{"error": str(e)}]
 
 @tool
+@traced("tool.get_event_details")
 def get_event_details(event_id: str) -> Dict:
     """Retrieves full details of a specific event by its ID."""
     service = get_calendar_service()
@@ -110,41 +281,99 @@ def get_event_details(event_id: str) -> Dict:
         return {"error": "Authentication failed"}
     
     try:
-        return service.events().get(calendarId='primary', eventId=event_id).execute()
+        return _execute(service.events().get(calendarId='primary', eventId=event_id))
     except Exception as e:
         return {"error": str(e)}
 
 @tool
+@traced("tool.create_event")
 def create_event(summary: str, start_time: str, end_time: str, description: Optional[str] = None) -> Dict:
     """
-    Schedule a new event on the calendar.
+    Schedule a new event on the calendar. Repeating the same request returns the existing event.
     Args:
         summary: Title of the meeting
         start_time: Start time in ISO format
         end_time: End time in ISO format
         description: Optional description of the event
     """
-    target_date = start_time.split("T")[0]
-    log_action("create", f"Summary: {summary}, Start: {start_time}, End: {end_time}", target_date=target_date)
-    
     service = get_calendar_service()
     if not service:
         return {"error": "Authentication failed"}
 
-    event = {
-        'summary': summary,
-        'description': description,
-        'start': {'dateTime': start_time},
-        'end': {'dateTime': end_time},
-    }
+    try:
+        # The same title and local times map to the same key, whether written naive, with "Z" or with +05:30
+        key = idempotency.request_key('primary', summary, start_time, end_time)
+        start, end = idempotency.normalize_time(start_time), idempotency.normalize_time(end_time)
+    except ValueError as e:
+        return {"error": f"Invalid time: {e}"}
+
+    def write():
+        existing = idempotency.find_existing(get_store(), 'primary', key, summary, start, end)
+        if existing:
+            return existing, False
+        event = {
+            'id': idempotency.event_id(key),
+            'summary': summary,
+            'description': description,
+            'start': {'dateTime': start},
+            'end': {'dateTime': end},
+            'extendedProperties': {'private': {idempotency.KEY_PROPERTY: key}},
+        }
+        try:
+            return _execute(service.events().insert(calendarId='primary', body=event)), True
+        except Exception as e:
+            if calendar_client.error_status(e) != 409:
+                raise
+        # An earlier attempt already created it (409 on the client-supplied ID)
+        existing = _execute(service.events().get(calendarId='primary', eventId=event['id']))
+        if existing.get('status') != 'cancelled':
+            return existing, False
+        # Deleted events keep their ID, so recreating one needs a fresh ID
+        del event['id']
+        return _execute(service.events().insert(calendarId='primary', body=event)), True
 
     try:
-        event = service.events().insert(calendarId='primary', body=event).execute()
-        return event
+        (event, created), fresh = idempotency.recent_writes.run_once(key, write)
     except Exception as e:
         return {"error": str(e)}
 
+    if not (fresh and created):
+        if fresh:
+            # Found in the store or rejected by the API as a duplicate ID (in-process repeats are counted by run_once)
+            metering.record("duplicate_writes_avoided")
+        return dict(event, note="This event already exists; no duplicate was created.")
+    get_store().put('primary', event)
+    log_action("create", f"Summary: {summary}, Start: {start_time}, End: {end_time}", target_date=start_time.split("T")[0])
+    return event
+
+def _update_event(service, event_id: str, summary: Optional[str] = None, start_time: Optional[str] = None,
+                  end_time: Optional[str] = None) -> Dict:
+    """Apply changes to an event, keep the store current and log it; raises on API errors."""
+    event = _execute(service.events().get(calendarId='primary', eventId=event_id))
+
+    if summary: event['summary'] = summary
+    if start_time: event['start'] = {'dateTime': start_time}
+    if end_time: event['end'] = {'dateTime': end_time}
+
+    updated_event = _execute(service.events().update(calendarId='primary', eventId=event_id, body=event))
+    get_store().put('primary', updated_event)
+
+    # Log update
+    start = updated_event.get('start', {}).get('dateTime') or updated_event.get('start', {}).get('date')
+    target_date = start.split("T")[0] if start else None
+    log_action("update", f"ID: {event_id}, Summary: {summary}", target_date=target_date)
+    return updated_event
+
+def _delete_event(service, event_id: str):
+    """Delete an event, keep the store current and log it; raises on API errors."""
+    _execute(service.events().delete(calendarId='primary', eventId=event_id))
+    get_store().discard('primary', event_id)
+    # Creating the same event again must write it, not return the deleted one
+    idempotency.recent_writes.forget_event(event_id)
+    log_action("delete", f"ID: {event_id}")
+
 @tool
+@traced("tool.update_event")
 def update_event(event_id: str, summary: Optional[str] = None, start_time: Optional[str] = None, end_time: Optional[str] = None) -> Dict:
     """
     Update an existing event.
@@ -159,24 +388,12 @@ def update_event(event_id: str, summary: Optional[str] = None, start_time: Optio
         return {"error": "Authentication failed"}
     
     try:
-        event = service.events().get(calendarId='primary', eventId=event_id).execute()
-        
-        if summary: event['summary'] = summary
-        if start_time: event['start'] = {'dateTime': start_time}
-        if end_time: event['end'] = {'dateTime': end_time}
-        
-        updated_event = service.events().update(calendarId='primary', eventId=event_id, body=event).execute()
-        
-        # Log update
-        start = updated_event.get('start', {}).get('dateTime') or updated_event.get('start', {}).get('date')
-        target_date = start.split("T")[0] if start else None
-        log_action("update", f"ID: {event_id}, Summary: {summary}", target_date=target_date)
-        
-        return updated_event
+        return _update_event(service, event_id, summary, start_time, end_time)
     except Exception as e:
         return {"error": str(e)}
 
 @tool
+@traced("tool.delete_event")
 def delete_event(event_id: str) -> str:
     """Deletes an event from the calendar."""
     service = get_calendar_service()
@@ -184,21 +401,225 @@ def delete_event(event_id: str) -> str:
         return "Authentication failed"
     
     try:
-        service.events().delete(calendarId='primary', eventId=event_id).execute()
-        log_action("delete", f"ID: {event_id}")
+        _delete_event(service, event_id)
         return f"Event {event_id} deleted successfully."
     except Exception as e:
         return f"Error deleting event: {str(e)}"
 
+def _series(service, event_id: str):
+    """(recurring event, the occurrence event_id names or None) for a series or instance ID."""
+    event = _execute(service.events().get(calendarId='primary', eventId=event_id))
+    if event.get('recurrence'):
+        return event, None
+    if not event.get('recurringEventId'):
+        raise ValueError(f"Event {event_id} is not part of a recurring series; use update_event/delete_event.")
+    return _execute(service.events().get(calendarId='primary', eventId=event['recurringEventId'])), event
+
+def _shifted(value: Dict, delta: datetime.timedelta) -> Dict:
+    """An event's start or end moved by `delta`, keeping its offset and time zone."""
+    if 'date' in value:
+        return {'date': (datetime.date.fromisoformat(value['date']) + datetime.timedelta(days=delta.days)).isoformat()}
+    moved = dict(value, dateTime=(datetime.datetime.fromisoformat(value['dateTime'].replace("Z", "+00:00")) + delta).isoformat())
+    return moved
+
+def _series_changes(master: Dict, anchor: Dict, summary: Optional[str], start_time: Optional[str],
+                    end_time: Optional[str]) -> Dict:
+    """
+    The master with the same change applied to every occurrence.
+    `anchor` is the start of the occurrence the user gave new times for; the series moves by the same amount.
+    """
+    body = {k: v for k, v in master.items() if k not in ('etag', 'updated', 'htmlLink')}
+    if summary:
+        body['summary'] = summary
+    if start_time or end_time:
+        anchor_start = _event_time(anchor)
+        length = recurrence.duration(master)
+        delta = parse_time(start_time) - anchor_start if start_time else datetime.timedelta()
+        if end_time:
+            length = parse_time(end_time) - (anchor_start + delta)
+        old_start = recurrence.series_start(master)
+        body['start'] = _shifted(master['start'], delta)
+        body['end'] = _shifted(body['start'], length) if 'dateTime' in master['start'] else \
+            _shifted(master['end'], delta)
+        new_start = recurrence.series_start(body)
+        # Moving to another weekday has to move the rule's BYDAY along with it
+        body['recurrence'] = recurrence.shift_weekdays(master.get('recurrence', []),
+                                                       (new_start.date() - old_start.date()).days)
+    return body
+
+def _after_series_write(description: str, event: Dict):
+    """Instances in the store are stale after a series changes; drop the primary calendar's copy."""
+    get_store().forget('primary')
+    log_action("update", description, target_date=event['start'].get('dateTime', event['start'].get('date', ''))[:10])
+
+@tool
+@traced("tool.update_series")
+def update_series(event_id: str, summary: Optional[str] = None, start_time: Optional[str] = None,
+                  end_time: Optional[str] = None, scope: str = "all") -> Dict:
+    """
+    Change every occurrence of a recurring event at once (e.g. "move all my standups to 10:30").
+    Args:
+        event_id: Series ID from list_events, or the ID of one occurrence
+        summary: New title
+        start_time: New start time of the given occurrence (or of the first one, for a series ID); the others move by the same amount
+        end_time: New end time of that occurrence
+        scope: "all" for the whole series, or "following" for the given occurrence and every later one
+    """
+    if scope not in ("all", "following"):
+        return {"error": "scope must be 'all' or 'following'"}
+    service = get_calendar_service()
+    if not service:
+        return {"error": "Authentication failed"}
+
+    try:
+        master, instance = _series(service, event_id)
+        anchor = (instance.get('originalStartTime') or instance['start']) if instance else master['start']
+        if scope == "all" or instance is None or _event_time(anchor) <= recurrence.series_start(master):
+            body = _series_changes(master, anchor, summary, start_time, end_time)
+            updated = _execute(service.events().update(calendarId='primary', eventId=master['id'], body=body))
+            _after_series_write(f"Series ID: {master['id']}, Summary: {summary}, Start: {start_time}", updated)
+            return {"series": updated}
+
+        # "This and following": end the series before this occurrence and start a new one here
+        head, tail = recurrence.split(master, _event_time(anchor))
+        ended = _execute(service.events().update(calendarId='primary', eventId=master['id'],
+                                                 body=dict(master, recurrence=head)))
+        following = {k: v for k, v in master.items()
+                     if k not in ('id', 'etag', 'iCalUID', 'htmlLink', 'created', 'updated', 'sequence')}
+        length = recurrence.duration(master)
+        following['start'] = dict(master['start'], **anchor)
+        following['end'] = _shifted(following['start'], length) if 'dateTime' in anchor else \
+            {'date': (datetime.date.fromisoformat(anchor['date']) + datetime.timedelta(days=length.days)).isoformat()}
+        following['recurrence'] = tail
+        following = _series_changes(following, anchor, summary, start_time, end_time)
+        created = _execute(service.events().insert(calendarId='primary', body=following))
+        _after_series_write(f"Series ID: {master['id']} split at {anchor}, new series ID: {created['id']}, "
+                            f"Summary: {summary}, Start: {start_time}", created)
+        return {"previous": {"id": ended['id'], "recurrence": ended.get('recurrence')}, "series": created}
+    except Exception as e:
+        return {"error": str(e)}
+
 @tool
-def check_availability(start_time: str, end_time: str) -> bool:
+@traced("tool.delete_series")
+def delete_series(event_id: str, scope: str = "all") -> Dict:
+    """
+    Delete every occurrence of a recurring event, or one occurrence and all later ones.
+    Args:
+        event_id: Series ID from list_events, or the ID of one occurrence
+        scope: "all" for the whole series, or "following" for the given occurrence and every later one
+    """
+    if scope not in ("all", "following"):
+        return {"error": "scope must be 'all' or 'following'"}
+    service = get_calendar_service()
+    if not service:
+        return {"error": "Authentication failed"}
+
+    try:
+        master, instance = _series(service, event_id)
+        anchor = (instance.get('originalStartTime') or instance['start']) if instance else master['start']
+        if scope == "all" or instance is None or _event_time(anchor) <= recurrence.series_start(master):
+            _execute(service.events().delete(calendarId='primary', eventId=master['id']))
+            get_store().forget('primary')
+            idempotency.recent_writes.forget_event(master['id'])
+            log_action("delete", f"Series ID: {master['id']}, Summary: {master.get('summary')}")
+            return {"deleted": master['id']}
+        head, _ = recurrence.split(master, _event_time(anchor))
+        ended = _execute(service.events().update(calendarId='primary', eventId=master['id'],
+                                                 body=dict(master, recurrence=head)))
+        get_store().forget('primary')
+        log_action("delete", f"Series ID: {master['id']} from {anchor}, Summary: {master.get('summary')}")
+        return {"ended": {"id": ended['id'], "recurrence": ended.get('recurrence')}}
+    except Exception as e:
+        return {"error": str(e)}
+
+def _resolve(service, description: str, date_hint: Optional[str]) -> Dict:
+    """
+    Find the event a description refers to among the cached (or freshly listed) primary events.
+    Returns {"event": ...} for a clear match, otherwise {"candidates": [...], "message": ...}.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    time_min, time_max = resolver.hint_window(date_hint, now, RESOLVER_WINDOW_DAYS)
+    events = _fetch_events(service, {'primary': 'primary'}, time_min, time_max)
+    if events and "error" in events[0]:
+        raise RuntimeError(events[0]["error"])
+    ranked = resolver.rank(description, events, now, date_hint)
+    if not ranked:
+        return {"candidates": [], "message": f"No event matching '{description}' between {time_min} and {time_max}."}
+    if resolver.is_ambiguous(ranked):
+        return {"candidates": [c.to_dict() for c in ranked[:resolver.MAX_CANDIDATES]],
+                "message": "Several events match; ask the user which one, then use its id."}
+    return {"event": ranked[0].event}
+
+@tool
+@traced("tool.reschedule_by_description")
+def reschedule_by_description(description: str, new_start_time: str, new_end_time: Optional[str] = None,
+                              date_hint: Optional[str] = None) -> Dict:
+    """
+    Move an event identified by how the user describes it (e.g. "coffee break") in one step.
+    Returns the updated event, or candidates to choose from when the description is ambiguous.
+    Args:
+        description: Title or description of the event as the user said it
+        new_start_time: New start time in ISO format
+        new_end_time: New end time in ISO format; defaults to keeping the event's duration
+        date_hint: Current date (YYYY-MM-DD) or start time of the event, if the user mentioned it
+    """
+    service = get_calendar_service()
+    if not service:
+        return {"error": "Authentication failed"}
+
+    try:
+        match = _resolve(service, description, date_hint)
+        if "event" not in match:
+            return match
+        event = match["event"]
+        # Explicit offsets so the API accepts both ends; a naive time is local, as the agent means it
+        start = parse_time(new_start_time)
+        if new_end_time:
+            end = parse_time(new_end_time)
+        elif 'dateTime' in event['start']:
+            end = start + (_event_time(event['end']) - _event_start(event))
+        else:
+            return {"error": "This is an all-day event; give both a new start and end time."}
+        return _update_event(service, event['id'], start_time=start.isoformat(), end_time=end.isoformat())
+    except Exception as e:
+        return {"error": str(e)}
+
+@tool
+@traced("tool.cancel_by_description")
+def cancel_by_description(description: str, date_hint: Optional[str] = None) -> Dict:
+    """
+    Delete an event identified by how the user describes it (e.g. "dentist appointment") in one step.
+    Returns what was deleted, or candidates to choose from when the description is ambiguous.
+    Args:
+        description: Title or description of the event as the user said it
+        date_hint: Date (YYYY-MM-DD) or start time of the event, if the user mentioned it
+    """
+    service = get_calendar_service()
+    if not service:
+        return {"error": "Authentication failed"}
+
+    try:
+        match = _resolve(service, description, date_hint)
+        if "event" not in match:
+            return match
+        event = match["event"]
+        _delete_event(service, event['id'])
+        return {"deleted": {"id": event['id'], "summary": event.get('summary'), "start": event['start']}}
+    except Exception as e:
+        return {"error": str(e)}
+
+@tool
+@traced("tool.check_availability")
+def check_availability(start_time: str, end_time: str, calendar_ids: Optional[List[str]] = None) -> bool:
     """
     Check if a specific time slot is free (no overlaps).
     Args:
         start_time: Start time in ISO format
         end_time: End time in ISO format
+        calendar_ids: Calendars that must all be free, or ["all"]; defaults to primary
     """
-    events = list_events.invoke({"time_min": start_time, "time_max": end_time})
+    events = list_events.invoke({"time_min": start_time, "time_max": end_time, "calendar_ids": calendar_ids,
+                                 "expand_recurring": True})
     if isinstance(events, list) and len(events) > 0:
         if "error" in events[0]:
             return False
@@ -206,31 +627,71 @@ def check_availability(start_time: str, end_time: str) -> bool:
     return True # Free
 
 @tool
-def find_available_slots(date_str: str, start_hour: int = 9, end_hour: int = 18) -> List[Dict]:
+@traced("tool.find_conflicts")
+def find_conflicts(slots: List[Dict[str, str]], calendar_ids: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Check many proposed times at once (e.g. before bulk rescheduling) and report what each would clash with.
+    Args:
+        slots: Proposed times as [{"start": ISO start, "end": ISO end}, ...]
+        calendar_ids: Calendars to check, or ["all"]; defaults to primary
+    """
+    if not slots:
+        return []
+    service = get_calendar_service()
+    if not service:
+        return [{"error": "Authentication failed"}]
+
+    try:
+        calendars = _resolve_calendars(service, calendar_ids)
+        # One listing over the span of all slots loads the event store; each slot is then an index lookup
+        time_min = min((slot['start'] for slot in slots), key=parse_time)
+        time_max = max((slot['end'] for slot in slots), key=parse_time)
+        fetched = _fetch_events(service, calendars, time_min, time_max)
+        errors = [entry for entry in fetched if "error" in entry]
+        if errors:
+            return errors
+
+        results = [{"start": slot['start'], "end": slot['end'], "conflicts": []} for slot in slots]
+        store = get_store()
+        for calendar_id in calendars:
+            hits = store.conflicts(calendar_id, [(slot['start'], slot['end']) for slot in slots])
+            for result, events in zip(results, hits):
+                result["conflicts"] += [{"id": e['id'], "summary": e.get('summary'), "start": e['start'],
+                                         "end": e['end'], "calendarId": calendar_id} for e in events]
+        for result in results:
+            result["free"] = not result["conflicts"]
+        return results
+    except Exception as e:
+        return [{"error": str(e)}]
+
+@tool
+@traced("tool.find_available_slots")
+def find_available_slots(date_str: str, start_hour: int = 9, end_hour: int = 18,
+                         calendar_ids: Optional[List[str]] = None) -> List[Dict]:
     """
     Finds free time slots on a given date during working hours.
     Args:
         date_str: Date in YYYY-MM-DD format
         start_hour: Start of the working day (e.g., 9 for 9 AM)
         end_hour: End of the working day (e.g., 18 for 6 PM)
+        calendar_ids: Calendars whose events block time, or ["all"]; defaults to primary
     """
     time_min = f"{date_str}T{start_hour:02d}:00:00+05:30"
     time_max = f"{date_str}T{end_hour:02d}:00:00+05:30"
     
-    events = list_events.invoke({"time_min": time_min, "time_max": time_max})
-    if isinstance(events, dict) and "error" in events:
-        return []
+    events = list_events.invoke({"time_min": time_min, "time_max": time_max, "calendar_ids": calendar_ids,
+                                 "expand_recurring": True})
+    if events and "error" in events[0]:
+        return events
 
-    # Sort events by start time
-    sorted_events = sorted(events, key=lambda x: x['start'].get('dateTime', x['start'].get('date')))
-    
+    # list_events already returns events in start order
     available_slots = []
     current_time = datetime.datetime.fromisoformat(time_min.replace("Z", "+00:00"))
     end_time = datetime.datetime.fromisoformat(time_max.replace("Z", "+00:00"))
 
-    for event in sorted_events:
-        event_start = datetime.datetime.fromisoformat(event['start'].get('dateTime', event['start'].get('date')).replace("Z", "+00:00"))
-        event_end = datetime.datetime.fromisoformat(event['end'].get('dateTime', event['end'].get('date')).replace("Z", "+00:00"))
+    for event in events:
+        event_start = _event_start(event)
+        event_end = _event_time(event['end'])
         
         if event_start > current_time:
             available_slots.append({
@@ -250,30 +711,118 @@ def find_available_slots(date_str: str, start_hour: int = 9, end_hour: int = 18)
     return available_slots
 
 @tool
-def send_email_notification(recipient_email: str, subject: str, body: str) -> str:
-    """Send an email notification via Gmail SMTP."""
-    import smtplib
-    from email.mime.text import MIMEText
-    from email.mime.multipart import MIMEMultipart
+@traced("tool.schedule_analytics")
+def schedule_analytics(time_min: str, time_max: str, group_by: str = "week", calendar_ids: Optional[List[str]] = None,
+                       work_start_hour: int = 9, work_end_hour: int = 18, heatmap: bool = False) -> Dict:
+    """
+    Meeting-load statistics for a date range as a compact table: events, meeting hours, busy hours,
+    fragmentation and longest focus block per period, plus totals and the busiest day.
+    Use for questions like "hours of meetings per week this quarter" or "which day is my busiest?".
+    Args:
+        time_min: Start of the range in ISO format
+        time_max: End of the range in ISO format
+        group_by: 'day', 'week', 'weekday', 'month' or 'calendar'
+        calendar_ids: Calendar IDs, or ["all"]; defaults to primary
+        work_start_hour: Start of the working day, for fragmentation and focus time
+        work_end_hour: End of the working day
+        heatmap: Also return average busy minutes per weekday and working hour
+    """
+    # Imported here: numpy is only needed once someone asks for analytics
+    from core import analytics
 
-    email_address = os.environ.get("EMAIL_ADDRESS")
-    email_password = os.environ.get("EMAIL_PASSWORD")
+    service = get_calendar_service()
+    if not service:
+        return {"error": "Authentication failed"}
+
+    try:
+        events = _fetch_events(service, _resolve_calendars(service, calendar_ids), time_min, time_max)
+        errors = [e for e in events if "error" in e]
+        result = analytics.summarize(events, time_min, time_max, group_by, work_start_hour, work_end_hour, heatmap)
+        if errors:
+            result["errors"] = errors
+        return result
+    except Exception as e:
+        return {"error": str(e)}
+
+@tool
+@traced("tool.import_ics")
+def import_ics(file_path: str, calendar_id: str = 'primary') -> Dict:
+    """
+    Import all events from an iCalendar (.ics) file, e.g. to migrate or restore a calendar.
+    Safe to repeat: events already imported are updated, not duplicated.
+    Args:
+        file_path: Path or name of the .ics file
+        calendar_id: Calendar to import into
+    """
+    service = get_calendar_service()
+    if not service:
+        return {"error": "Authentication failed"}
+
+    path = _ics_path(file_path)
+    imported = 0
+
+    def progress(stats):
+        # Live on /metrics while a large file is still streaming in; running totals on the span
+        nonlocal imported
+        metering.record("ics_events_imported", stats["imported"] - imported)
+        imported = stats["imported"]
+        span.set(**{name: value for name, value in stats.items() if name != "errors"})
+
+    try:
+        with tracing.span("ics.import", calendar_id=calendar_id) as span, \
+                open(path, encoding="utf-8", errors="replace") as fp:
+            stats = ics.import_events(service, fp, calendar_id, progress=progress)
+        # Cached windows no longer reflect the calendar
+        get_store().forget(calendar_id)
+        log_action("import", f"File: {os.path.basename(path)}, Imported: {stats['imported']}, Failed: {stats['failed']}")
+        return stats
+    except Exception as e:
+        return {"error": str(e)}
+
+@tool
+@traced("tool.export_ics")
+def export_ics(file_path: str, calendar_id: str = 'primary', time_min: Optional[str] = None,
+               time_max: Optional[str] = None) -> Dict:
+    """
+    Export a calendar to an iCalendar (.ics) file, e.g. for a backup.
+    Args:
+        file_path: Path or name of the .ics file to write
+        calendar_id: Calendar to export
+        time_min: Optional start of the range in ISO format
+        time_max: Optional end of the range in ISO format
+    """
+    service = get_calendar_service()
+    if not service:
+        return {"error": "Authentication failed"}
 
-    if not email_address or not email_password:
+    path = _ics_path(file_path)
+    exported = 0
+
+    def progress(count):
+        nonlocal exported
+        metering.record("ics_events_exported", count - exported)
+        exported = count
+        span.set(events=count)
+
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with tracing.span("ics.export", calendar_id=calendar_id) as span, \
+                open(path, "w", encoding="utf-8", newline="") as fp:
+            count = ics.export_events(service, fp, calendar_id, time_min, time_max, progress=progress)
+        return {"file": path, "events": count}
+    except Exception as e:
+        return {"error": str(e)}
+
+@tool
+@traced("tool.send_email_notification")
+def send_email_notification(recipient_email: str, subject: str, body: str) -> str:
+    """Send an email notification. The message is queued and delivered in the background."""
+    box = outbox.get_outbox()
+    if box is None:
         return "Error: Email credentials not configured."
 
     try:
-        msg = MIMEMultipart()
-        msg['From'] = email_address
-        msg['To'] = recipient_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
-
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
-            server.starttls()
-            server.login(email_address, email_password)
-            server.send_message(msg)
-        
-        return f"Email sent successfully to {recipient_email}"
+        message_id = box.enqueue(recipient_email, subject, body)
+        return f"Email to {recipient_email} queued for delivery (outbox id {message_id})"
     except Exception as e:
-        return f"Error sending email: {str(e)}"
+        return f"Error queueing email: {str(e)}"
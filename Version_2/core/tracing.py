@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import uuid
+import functools
+import threading
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+# Lightweight latency tracing.
+# Spans nest through a context variable, so a tool running inside the "tools" node inside
+# "process_input" is recorded as their child. When a root span closes, the whole trace is
+# appended to a JSONL file (one span per line). With tracing disabled, `span()` returns a
+# shared no-op object and `traced` calls straight through.
+TRACE_DIR = os.path.join(os.path.dirname(__file__), "..", "traces")
+TRACE_FILE = os.environ.get("AGENT_TRACE_FILE", os.path.join(TRACE_DIR, "agent_traces.jsonl"))
+
+_enabled = os.environ.get("AGENT_TRACE", "").lower() in ("1", "true", "yes")
+_current: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_write_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(enabled: bool):
+    """Turn tracing on or off at runtime (AGENT_TRACE=1 sets the initial value)."""
+    global _enabled
+    _enabled = enabled
+
+
+class Span:
+    """One timed operation; use as a context manager."""
+
+    __slots__ = ("name", "attrs", "span_id", "parent", "trace", "start", "duration", "_t0", "_token")
+
+    def __init__(self, name: str, attrs: Dict):
+        self.name = name
+        self.attrs = attrs
+        self.span_id = uuid.uuid4().hex[:16]
+
+    def set(self, **attrs):
+        """Attach attributes to the span (e.g. token counts, result sizes)."""
+        self.attrs.update(attrs)
+
+    def spans(self) -> List[Dict]:
+        """Finished spans of this span's trace, ordered by start time."""
+        return sorted(self.trace["spans"], key=lambda s: s["start"])
+
+    def __enter__(self):
+        self.parent = _current.get()
+        # Root spans own the list every descendant appends itself to
+        self.trace = self.parent.trace if self.parent else {"id": uuid.uuid4().hex, "spans": []}
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._t0
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = f"{exc_type.__name__}: {exc}"
+        self.trace["spans"].append(self.to_dict())
+        if self.parent is None:
+            _export(self.trace["spans"])
+        return False
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace["id"],
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attrs": self.attrs,
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def spans(self) -> List[Dict]:
+        return []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, **attrs):
+    """
+    Time a block of code as a span nested under the current one.
+    Args:
+        name: Span name, e.g. 'chatbot' or 'tool.list_events'
+        attrs: Extra attributes recorded with the span
+    """
+    if not _enabled:
+        return _NOOP
+    return Span(name, attrs)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator form of `span`; the wrapped function keeps its signature and docstring."""
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with Span(span_name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _export(spans: List[Dict]):
+    # Children close first; order by start time for readers
+    spans = sorted(spans, key=lambda s: s["start"])
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(TRACE_FILE)), exist_ok=True)
+        with _write_lock, open(TRACE_FILE, "a") as f:
+            for s in spans:
+                f.write(json.dumps(s, default=str) + "\n")
+    except OSError as e:
+        print(f"Error writing trace: {e}")
+
@@ -0,0 +1,178 @@
+import io
+import os
+import re
+import base64
+import shutil
+import threading
+import subprocess
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+import httpx
+from gtts import __version__ as GTTS_VERSION, gTTS
+from gtts.tts import gTTSError
+
+from core import http_pool, tracing
+
+# gTTS opens a new requests.Session (and TLS connection) for every request it makes and
+# has no way to pass one in. PooledgTTS sends the same prepared requests through the
+# shared "tts" client from core/http_pool.py instead, and parses the reply like gTTS does.
+# That relies on gTTS internals (_prepare_requests and the reply format), so it is only used
+# with the release it was written against (pinned in requirements.txt); any other release
+# goes through gTTS's own write_to_fp.
+#
+# gTTS also sends a long text as one request per 100 characters, one after another, and the
+# app then sped up the whole file with ffmpeg. synthesize() splits the text at sentence and
+# clause boundaries instead, synthesizes and speeds up the chunks on a bounded worker pool,
+# and yields them in order as they are ready, so the first sentence can play while the rest
+# is still being rendered. MP3 frames concatenate, so the chunks joined are one stream.
+
+_AUDIO = re.compile(r'jQ1olc","\[\\"(.*)\\"]')
+POOLED_GTTS = GTTS_VERSION.startswith("2.5.") and callable(getattr(gTTS, "_prepare_requests", None))
+
+# Playback speed applied with ffmpeg's atempo filter; 1 leaves the audio as synthesized
+TTS_TEMPO = float(os.environ.get("TTS_TEMPO", 1.75))
+# Chunks synthesized at once, across all sessions
+TTS_WORKERS = int(os.environ.get("TTS_WORKERS", 4))
+# Longest chunk; gTTS sends at most 100 characters per request, so each chunk is one request
+TTS_CHUNK_CHARS = int(os.environ.get("TTS_CHUNK_CHARS", gTTS.GOOGLE_TTS_MAX_CHARS))
+# gTTS returns 32 kbit/s MP3 and the speed-up re-encodes at the same rate
+MP3_BITRATE = 32000
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+|\n+')
+_CLAUSE_END = re.compile(r'(?<=[,;:])\s+')
+
+
+class PooledgTTS(gTTS):
+    """gTTS over the process-wide keep-alive connection pool."""
+
+    def stream(self):
+        client = http_pool.get_client("tts")
+        for request in self._prepare_requests():
+            try:
+                response = client.post(request.url, content=request.body, headers=dict(request.headers))
+            except httpx.HTTPError:
+                raise gTTSError(tts=self)
+            if response.is_error:
+                raise gTTSError(f"{response.status_code} ({response.reason_phrase}) from TTS API")
+            found = False
+            for line in response.iter_lines():
+                if "jQ1olc" not in line:
+                    continue
+                audio = _AUDIO.search(line)
+                if not audio:
+                    raise gTTSError("No audio stream in response from TTS API")
+                found = True
+                yield base64.b64decode(audio.group(1).encode("ascii"))
+            if not found:
+                # The reply format changed; fail loudly rather than return silence
+                raise gTTSError("No audio stream in response from TTS API")
+
+
+def speak(text: str, lang: str = "en") -> bytes:
+    """MP3 bytes for text, over the connection pool when the installed gTTS allows it."""
+    if POOLED_GTTS:
+        return b"".join(PooledgTTS(text=text, lang=lang).stream())
+    fp = io.BytesIO()
+    gTTS(text=text, lang=lang).write_to_fp(fp)
+    return fp.getvalue()
+
+
+def _pieces(text: str, max_chars: int) -> List[str]:
+    """Sentences of `text`, with any longer than max_chars cut at clauses, then at words."""
+    pieces = []
+    for sentence in _SENTENCE_END.split(text):
+        parts = [sentence] if len(sentence) <= max_chars else _CLAUSE_END.split(sentence)
+        for part in parts:
+            while len(part) > max_chars:
+                cut = part.rfind(" ", 0, max_chars + 1)
+                cut = cut if cut > 0 else max_chars
+                pieces.append(part[:cut])
+                part = part[cut:].lstrip()
+            pieces.append(part)
+    return [p.strip() for p in pieces if p.strip()]
+
+
+def split_text(text: str, max_chars: int = TTS_CHUNK_CHARS) -> List[str]:
+    """
+    Cut text into chunks of at most max_chars at sentence (or clause) boundaries.
+    Args:
+        text: Text to speak
+        max_chars: Longest chunk
+    """
+    chunks = []
+    for piece in _pieces(text, max_chars):
+        if chunks and len(chunks[-1]) + 1 + len(piece) <= max_chars:
+            chunks[-1] += " " + piece
+        else:
+            chunks.append(piece)
+    return chunks
+
+
+def speed_up(audio: bytes, tempo: float = TTS_TEMPO) -> bytes:
+    """MP3 audio played `tempo` times faster, re-encoded by ffmpeg without headers so chunks concatenate."""
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-f", "mp3", "-i", "pipe:0",
+         "-filter:a", f"atempo={tempo}", "-b:a", str(MP3_BITRATE), "-write_xing", "0", "-id3v2_version", "0",
+         "-vn", "-f", "mp3", "pipe:1"],
+        input=audio, capture_output=True, check=True)
+    return result.stdout
+
+
+def mp3_seconds(audio: bytes) -> float:
+    """Playing time of MP3 audio from synthesize()."""
+    return len(audio) * 8 / MP3_BITRATE
+
+
+def synthesize_chunk(text: str, lang: str = "en", tempo: float = TTS_TEMPO) -> Tuple[bytes, Optional[str]]:
+    """
+    One chunk as MP3 bytes, sped up when ffmpeg is available.
+    Returns (audio, warning or None); the warning says the chunk is at normal speed.
+    """
+    with tracing.span("tts.chunk", chars=len(text)):
+        audio = speak(text, lang)
+    if tempo == 1 or not audio:
+        return audio, None
+    if not shutil.which("ffmpeg"):
+        return audio, "Audio speedup unavailable (running normal speed): ffmpeg not found"
+    try:
+        with tracing.span("tts.speedup", chars=len(text)):
+            return speed_up(audio, tempo), None
+    except Exception as e:
+        # Fall back to normal speed if ffmpeg fails
+        return audio, f"Audio speedup unavailable (running normal speed). Error: {e}"
+
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(1, TTS_WORKERS), thread_name_prefix="tts")
+        return _pool
+
+
+def synthesize(text: str, lang: str = "en", tempo: float = TTS_TEMPO) -> Iterator[Tuple[bytes, Optional[str]]]:
+    """
+    Speak text chunk by chunk: (audio, warning) per chunk, in order, each as soon as it and
+    the chunks before it are ready. Joined, the audio is one MP3 stream.
+    Args:
+        text: Text to speak
+        lang: gTTS language code
+        tempo: Playback speed (see TTS_TEMPO)
+    """
+    pool = _get_pool()
+    # Copy the context into each worker so tracing follows the call
+    futures = [pool.submit(contextvars.copy_context().run, synthesize_chunk, chunk, lang, tempo)
+               for chunk in split_text(text)]
+    try:
+        for future in futures:
+            yield future.result()
+    finally:
+        # The caller stopped early (or a chunk failed): drop what has not started yet
+        for future in futures:
+            future.cancel()
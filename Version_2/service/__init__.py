@@ -0,0 +1 @@
+# Making service a package
@@ -0,0 +1,36 @@
+from typing import Dict
+
+import httpx
+
+
+class AgentServiceClient:
+    """
+    Thin synchronous client for service/server.py, used by the Streamlit UI.
+    Args:
+        base_url: Service root, e.g. http://localhost:8000
+        token: The user's bearer token, issued when the user was registered (POST /v1/users)
+    """
+
+    def __init__(self, base_url: str, token: str, timeout: float = 120.0):
+        self._http = httpx.Client(base_url=base_url.rstrip("/"), headers={"Authorization": f"Bearer {token}"},
+                                  timeout=timeout)
+
+    def create_session(self, persona: str) -> str:
+        response = self._http.post("/v1/sessions", json={"persona": persona})
+        response.raise_for_status()
+        return response.json()["session_id"]
+
+    def send_message(self, session_id: str, text: str) -> Dict:
+        """Run one turn remotely; returns {"reply": ..., "usage": {...}}."""
+        response = self._http.post(f"/v1/sessions/{session_id}/messages", json={"text": text})
+        response.raise_for_status()
+        return response.json()
+
+    def set_credentials(self, client_id: str, client_secret: str, refresh_token: str):
+        response = self._http.put("/v1/users/me/credentials", json={
+            "client_id": client_id, "client_secret": client_secret, "refresh_token": refresh_token,
+        })
+        response.raise_for_status()
+
+    def close(self):
+        self._http.close()
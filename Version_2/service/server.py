@@ -0,0 +1,249 @@
+"""
+HTTP/WebSocket backend for the scheduling agent.
+
+Run from the Version_2 folder:
+
+    uvicorn service.server:app --host 0.0.0.0 --port 8000
+
+Users are registered with the admin token (SERVICE_ADMIN_TOKEN) and get a bearer token that
+every request carries. Behind an authenticating proxy, SERVICE_TRUSTED_PROXY=1 takes the user
+from the `X-User-Id` header the proxy sets instead; with neither, the service refuses to start.
+Conversations are stored in SQLite (see service/store.py), Google credentials are registered
+per user and bound to the turn's context, and turns run on a thread pool sized to the
+machine's cores (AGENT_WORKERS).
+"""
+import os
+import re
+import hmac
+import asyncio
+import contextlib
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from fastapi import Depends, FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+from langchain_core.messages import HumanMessage, SystemMessage
+from dotenv import load_dotenv
+
+from core import http_pool, metering, prefetch
+from core.agent import DEFAULT_PERSONALITY, PERSONALITY_PROMPTS, build_system_prompt, get_agent_executor, run_turn
+from core.credentials import CalendarCredentials, use_credentials
+from service.store import SessionStore
+
+load_dotenv()
+
+# User ids double as log folder names, so keep them to a safe alphabet
+USER_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class UserRequest(BaseModel):
+    user_id: str
+
+
+class SessionRequest(BaseModel):
+    persona: str = DEFAULT_PERSONALITY
+
+
+class MessageRequest(BaseModel):
+    text: str
+
+
+class CredentialsRequest(BaseModel):
+    client_id: str
+    client_secret: str
+    refresh_token: str
+
+
+class SessionConflict(Exception):
+    """Another turn for the same session is running or finished first."""
+
+
+def default_workers() -> int:
+    return int(os.environ.get("AGENT_WORKERS", 0)) or os.cpu_count() or 4
+
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    return token.strip() or None
+
+
+def create_app(store: Optional[SessionStore] = None, executor=None, workers: Optional[int] = None,
+               admin_token: Optional[str] = None, trusted_proxy: Optional[bool] = None,
+               env_credentials_user: Optional[str] = None) -> FastAPI:
+    """
+    Build the service.
+    Args:
+        store: Session store; defaults to the SQLite file from SESSION_DB
+        executor: Compiled agent graph; defaults to the configured provider's agent
+        workers: Size of the turn worker pool; defaults to AGENT_WORKERS or the CPU count
+        admin_token: Token that may register users; defaults to SERVICE_ADMIN_TOKEN
+        trusted_proxy: Take the user from X-User-Id (set by an authenticating proxy); defaults to SERVICE_TRUSTED_PROXY
+        env_credentials_user: The one user allowed the GOOGLE_* credentials; defaults to SERVICE_ENV_CREDENTIALS_USER
+    """
+    admin_token = admin_token or os.environ.get("SERVICE_ADMIN_TOKEN")
+    if trusted_proxy is None:
+        trusted_proxy = os.environ.get("SERVICE_TRUSTED_PROXY", "").lower() in ("1", "true", "yes")
+    if not admin_token and not trusted_proxy:
+        raise RuntimeError("Set SERVICE_ADMIN_TOKEN to issue user tokens, or SERVICE_TRUSTED_PROXY=1 "
+                           "behind a proxy that authenticates users and sets X-User-Id")
+    env_credentials_user = env_credentials_user or os.environ.get("SERVICE_ENV_CREDENTIALS_USER")
+    if os.environ.get("SERVICE_ALLOW_ENV_CREDENTIALS"):
+        print("SERVICE_ALLOW_ENV_CREDENTIALS is no longer read; name the user in SERVICE_ENV_CREDENTIALS_USER")
+    store = store or SessionStore()
+    pool = ThreadPoolExecutor(max_workers=workers or default_workers(), thread_name_prefix="agent-turn")
+
+    def may_use(credentials: Optional[CalendarCredentials], user_id: str) -> bool:
+        # The deployment's own Google account is one person's calendar, not a shared fallback
+        return credentials is not None or (env_credentials_user is not None and user_id == env_credentials_user)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Warm the shared model connection pool (core/http_pool.py) before the first turn
+        http_pool.preconnect({"llm": http_pool.SERVICES["llm"][1]})
+        yield
+        pool.shutdown(wait=False)
+
+    app = FastAPI(title="AI Scheduling Agent", lifespan=lifespan)
+
+    def authenticate(authorization: Optional[str], x_user_id: Optional[str]) -> Optional[str]:
+        """User for a request's headers, or None if it is not authenticated."""
+        token = bearer_token(authorization)
+        if token:
+            return store.user_for_token(token)
+        if trusted_proxy and x_user_id and USER_ID_PATTERN.match(x_user_id):
+            return x_user_id
+        return None
+
+    def current_user(authorization: Optional[str] = Header(None), x_user_id: Optional[str] = Header(None)) -> str:
+        user_id = authenticate(authorization, x_user_id)
+        if user_id is None:
+            raise HTTPException(401, "Missing or invalid bearer token", headers={"WWW-Authenticate": "Bearer"})
+        return user_id
+
+    def require_admin(authorization: Optional[str] = Header(None)):
+        token = bearer_token(authorization)
+        if not admin_token:
+            raise HTTPException(404, "Registration is disabled behind a trusted proxy")
+        if not token or not hmac.compare_digest(token, admin_token):
+            raise HTTPException(401, "Registering users needs the admin token", headers={"WWW-Authenticate": "Bearer"})
+
+    def load_owned_session(session_id: str, user_id: str):
+        session = store.load_session(session_id)
+        if session is None or session.user_id != user_id:
+            raise HTTPException(404, "Session not found")
+        return session
+
+    def process_turn(session_id: str, text: str) -> dict:
+        """Run one turn on a worker thread: load history, claim the session, bind the user's credentials, save."""
+        session = store.load_session(session_id)
+        credentials = store.get_credentials(session.user_id)
+        if not may_use(credentials, session.user_id):
+            raise PermissionError("Register Google credentials for this user first")
+        # Claimed before the agent runs, so a concurrent message is refused before it writes to the calendar
+        if not store.claim_session(session_id, session.version):
+            raise SessionConflict()
+        saved = False
+        try:
+            messages = session.messages + [HumanMessage(content=text)]
+            with use_credentials(credentials, user_id=session.user_id):
+                # Keeps the user's upcoming window warm; started outside the turn so its reads are not metered to it
+                prefetch.warm_start()
+                with metering.turn(session_id) as usage:
+                    reply = run_turn(messages, executor or get_agent_executor())
+            saved = store.save_messages(session_id, messages + [reply], session.version)
+        finally:
+            if not saved:
+                store.release_session(session_id, session.version)
+        if not saved:
+            # Only when this turn outlived its lease and another one saved meanwhile
+            raise SessionConflict()
+        return {"reply": reply.content, "usage": usage.to_dict()}
+
+    async def submit_turn(session_id: str, text: str) -> dict:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(pool, contextvars.copy_context().run, process_turn, session_id, text)
+        except PermissionError as e:
+            raise HTTPException(412, str(e))
+        except SessionConflict:
+            raise HTTPException(409, "Another message for this session is still being processed")
+
+    @app.get("/healthz")
+    def healthz():
+        return {"status": "ok", "workers": pool._max_workers}
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics():
+        return metering.render_prometheus()
+
+    @app.post("/v1/users", status_code=201, dependencies=[Depends(require_admin)])
+    def register_user(body: UserRequest):
+        if not USER_ID_PATTERN.match(body.user_id):
+            raise HTTPException(400, "user_id must be 1-64 letters, digits, '-' or '_'")
+        token = store.create_user(body.user_id)
+        if token is None:
+            raise HTTPException(409, "User already registered")
+        # The only time the token is shown; the store keeps its hash
+        return {"user_id": body.user_id, "token": token}
+
+    @app.post("/v1/users/me/token")
+    def rotate_token(user_id: str = Depends(current_user)):
+        if not store.user_exists(user_id):
+            raise HTTPException(404, "Users behind a trusted proxy have no token")
+        return {"user_id": user_id, "token": store.rotate_token(user_id)}
+
+    @app.put("/v1/users/me/credentials", status_code=204)
+    def put_credentials(body: CredentialsRequest, user_id: str = Depends(current_user)):
+        store.set_credentials(user_id, CalendarCredentials(body.client_id, body.client_secret, body.refresh_token))
+
+    @app.post("/v1/sessions")
+    def create_session(body: SessionRequest, user_id: str = Depends(current_user)):
+        if body.persona not in PERSONALITY_PROMPTS:
+            raise HTTPException(400, f"Unknown persona. Choose one of: {', '.join(PERSONALITY_PROMPTS)}")
+        session_id = store.create_session(user_id, body.persona, [SystemMessage(content=build_system_prompt(body.persona))])
+        # Load the user's upcoming week in the background so the first message starts warm
+        credentials = store.get_credentials(user_id)
+        if may_use(credentials, user_id):
+            with use_credentials(credentials, user_id=user_id):
+                prefetch.warm_start()
+        return {"session_id": session_id, "persona": body.persona}
+
+    @app.post("/v1/sessions/{session_id}/messages")
+    async def post_message(session_id: str, body: MessageRequest, user_id: str = Depends(current_user)):
+        load_owned_session(session_id, user_id)
+        return await submit_turn(session_id, body.text)
+
+    @app.websocket("/v1/sessions/{session_id}/ws")
+    async def session_socket(websocket: WebSocket, session_id: str):
+        user_id = authenticate(websocket.headers.get("authorization"), websocket.headers.get("x-user-id"))
+        if user_id is None:
+            await websocket.close(code=4401)
+            return
+        session = store.load_session(session_id)
+        if session is None or session.user_id != user_id:
+            await websocket.close(code=4404)
+            return
+        await websocket.accept()
+        try:
+            while True:
+                payload = await websocket.receive_json()
+                try:
+                    await websocket.send_json(await submit_turn(session_id, payload.get("text", "")))
+                except HTTPException as e:
+                    await websocket.send_json({"error": e.detail, "status": e.status_code})
+        except WebSocketDisconnect:
+            pass
+
+    return app
+
+
+def __getattr__(name):
+    # `uvicorn service.server:app` builds the default app on first access
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,221 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import secrets
+import sqlite3
+import contextlib
+from typing import List, NamedTuple, Optional
+
+from cryptography.fernet import Fernet, InvalidToken
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
+
+from core.credentials import CalendarCredentials
+
+# Session and credential storage for the backend service.
+# Conversations live in SQLite rather than process memory, so any worker (or another
+# service process sharing the file) can pick up the next turn of a session.
+# Users authenticate with a bearer token issued at registration; only its SHA-256 is stored.
+# Client secrets and refresh tokens are encrypted with a Fernet key from SERVICE_SECRET_KEY,
+# or from a key file (mode 0600) generated next to the database on first start.
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "sessions.db")
+DEFAULT_KEY_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "service.key")
+# A turn holds its session this long at most; a worker that died mid-turn frees it when it expires
+TURN_LEASE_SECONDS = float(os.environ.get("SESSION_TURN_LEASE", 600))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    persona TEXT NOT NULL,
+    messages TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    busy_until REAL
+);
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    token_hash TEXT NOT NULL UNIQUE,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_credentials (
+    user_id TEXT PRIMARY KEY,
+    client_id TEXT NOT NULL,
+    client_secret TEXT NOT NULL,
+    refresh_token TEXT NOT NULL
+);
+"""
+
+
+class Session(NamedTuple):
+    id: str
+    user_id: str
+    persona: str
+    messages: List[BaseMessage]
+    version: int
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def load_secret_key(path: Optional[str] = None) -> bytes:
+    """Fernet key from SERVICE_SECRET_KEY, else from the key file, which is created if missing."""
+    if os.environ.get("SERVICE_SECRET_KEY"):
+        return os.environ["SERVICE_SECRET_KEY"].encode()
+    path = path or os.environ.get("SERVICE_KEY_FILE", DEFAULT_KEY_PATH)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        with open(path, "rb") as f:
+            return f.read().strip()
+    key = Fernet.generate_key()
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+class SessionStore:
+    """
+    SQLite-backed sessions with optimistic versioning, plus users and their encrypted credentials.
+    Args:
+        path: Database file (defaults to SESSION_DB or Version_2/data/sessions.db)
+        secret_key: Fernet key for stored secrets (defaults to load_secret_key())
+    """
+
+    def __init__(self, path: Optional[str] = None, secret_key: Optional[bytes] = None):
+        self.path = path or os.environ.get("SESSION_DB", DEFAULT_DB_PATH)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._fernet = Fernet(secret_key or load_secret_key())
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            # Databases from before turn leases
+            if "busy_until" not in [row[1] for row in conn.execute("PRAGMA table_info(sessions)")]:
+                conn.execute("ALTER TABLE sessions ADD COLUMN busy_until REAL")
+        self._encrypt_plaintext_credentials()
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # A short-lived connection per call keeps the store safe to share across worker threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create_session(self, user_id: str, persona: str, messages: List[BaseMessage]) -> str:
+        session_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO sessions (id, user_id, persona, messages, version, updated_at) VALUES (?, ?, ?, ?, 0, ?)",
+                (session_id, user_id, persona, json.dumps(messages_to_dict(messages)), time.time()),
+            )
+        return session_id
+
+    def load_session(self, session_id: str) -> Optional[Session]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, user_id, persona, messages, version FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return Session(row[0], row[1], row[2], messages_from_dict(json.loads(row[3])), row[4])
+
+    def claim_session(self, session_id: str, version: int) -> bool:
+        """
+        Reserve the session for one turn before it runs; False if another turn holds it or saved since.
+        Args:
+            session_id: Session to reserve
+            version: Version the turn loaded
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE sessions SET busy_until = ? WHERE id = ? AND version = ? AND (busy_until IS NULL OR busy_until < ?)",
+                (now + TURN_LEASE_SECONDS, session_id, version, now),
+            )
+        return cursor.rowcount == 1
+
+    def release_session(self, session_id: str, version: int):
+        """Give up a claim without saving (the turn failed)."""
+        with self._connect() as conn:
+            conn.execute("UPDATE sessions SET busy_until = NULL WHERE id = ? AND version = ?", (session_id, version))
+
+    def save_messages(self, session_id: str, messages: List[BaseMessage], expected_version: int) -> bool:
+        """Store the new history and release the claim; False if another turn saved first (version moved on)."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE sessions SET messages = ?, version = version + 1, updated_at = ?, busy_until = NULL "
+                "WHERE id = ? AND version = ?",
+                (json.dumps(messages_to_dict(messages)), time.time(), session_id, expected_version),
+            )
+        return cursor.rowcount == 1
+
+    def create_user(self, user_id: str) -> Optional[str]:
+        """Register a user and return their bearer token; None if the ID is taken."""
+        token = secrets.token_urlsafe(32)
+        try:
+            with self._connect() as conn:
+                conn.execute("INSERT INTO users (user_id, token_hash, created_at) VALUES (?, ?, ?)",
+                             (user_id, hash_token(token), time.time()))
+        except sqlite3.IntegrityError:
+            return None
+        return token
+
+    def rotate_token(self, user_id: str) -> str:
+        """Replace a user's token; the old one stops working at once."""
+        token = secrets.token_urlsafe(32)
+        with self._connect() as conn:
+            conn.execute("UPDATE users SET token_hash = ? WHERE user_id = ?", (hash_token(token), user_id))
+        return token
+
+    def user_for_token(self, token: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT user_id FROM users WHERE token_hash = ?", (hash_token(token),)).fetchone()
+        return row[0] if row else None
+
+    def user_exists(self, user_id: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,)).fetchone() is not None
+
+    def _encrypt(self, value: str) -> str:
+        return self._fernet.encrypt(value.encode()).decode()
+
+    def _decrypt(self, value: str) -> str:
+        return self._fernet.decrypt(value.encode()).decode()
+
+    def _encrypt_plaintext_credentials(self):
+        # Rows written before secrets were encrypted
+        with self._connect() as conn:
+            rows = conn.execute("SELECT user_id, client_secret, refresh_token FROM user_credentials").fetchall()
+            for user_id, client_secret, refresh_token in rows:
+                try:
+                    self._decrypt(refresh_token)
+                except InvalidToken:
+                    conn.execute("UPDATE user_credentials SET client_secret = ?, refresh_token = ? WHERE user_id = ?",
+                                 (self._encrypt(client_secret), self._encrypt(refresh_token), user_id))
+
+    def set_credentials(self, user_id: str, credentials: CalendarCredentials):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO user_credentials (user_id, client_id, client_secret, refresh_token) VALUES (?, ?, ?, ?)",
+                (user_id, credentials.client_id, self._encrypt(credentials.client_secret),
+                 self._encrypt(credentials.refresh_token)),
+            )
+
+    def get_credentials(self, user_id: str) -> Optional[CalendarCredentials]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT client_id, client_secret, refresh_token FROM user_credentials WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return CalendarCredentials(row[0], self._decrypt(row[1]), self._decrypt(row[2]))
+        except InvalidToken:
+            print(f"Stored credentials for {user_id} do not decrypt with the current SERVICE_SECRET_KEY")
+            return None
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# Tests run offline against the in-memory Calendar backend from benchmarks/fakes.py
+BENCHMARKS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+if BENCHMARKS_DIR not in sys.path:
+    sys.path.insert(0, BENCHMARKS_DIR)
+
+import common  # noqa: E402,F401  (puts Version_2 on sys.path)
+from fakes import FakeCalendarService  # noqa: E402
+
+
+@pytest.fixture
+def calendar():
+    """A FakeCalendarService behind every Calendar tool, with empty caches and logs kept out of the repo."""
+    from e2e_bench import offline_backend
+
+    service = FakeCalendarService()
+    with offline_backend(service):
+        yield service
@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+from core import analytics
+from core.tools import schedule_analytics
+
+WEEK = ("2030-01-07T00:00:00+05:30", "2030-01-13T23:59:59+05:30")     # Monday to Sunday
+
+
+def event(day, start, end, **extra):
+    return {"summary": f"{day} {start}", "start": {"dateTime": f"{day}T{start}:00+05:30"},
+            "end": {"dateTime": f"{day}T{end}:00+05:30"}, **extra}
+
+
+def week_of_events():
+    me = {"email": "me@example.com", "self": True}
+    return [
+        event("2030-01-07", "09:00", "10:00", attendees=[me, {"email": "a@example.com"}]),
+        event("2030-01-07", "09:30", "10:30"),                  # overlaps the first
+        event("2030-01-07", "12:00", "12:30"),
+        event("2030-01-08", "10:00", "10:30", calendarId="team"),
+        event("2030-01-08", "11:00", "11:30", calendarId="team"),
+        event("2030-01-09", "23:00", "01:00") | {"end": {"dateTime": "2030-01-10T01:00:00+05:30"}},
+        # Left out of the figures
+        {"summary": "Holiday", "start": {"date": "2030-01-10"}, "end": {"date": "2030-01-11"}},
+        event("2030-01-10", "14:00", "15:00", transparency="transparent"),
+        event("2030-01-10", "15:00", "16:00", attendees=[dict(me, responseStatus="declined")]),
+        event("2030-01-10", "16:00", "17:00", status="cancelled"),
+    ]
+
+
+def test_daily_table_counts_overlaps_once():
+    result = analytics.summarize(week_of_events(), *WEEK, group_by="day")
+    rows = {row[0]: dict(zip(analytics.COLUMNS, row)) for row in result["rows"]}
+    assert len(rows) == result["window"]["days"] == 7
+
+    monday = rows["2030-01-07"]
+    assert (monday["events"], monday["hours"], monday["busy_hours"]) == (3, 2.5, 2.0)
+    # Gaps 10:30-12:00 and 12:30-18:00: nothing under an hour
+    assert (monday["fragmentation"], monday["longest_focus_min"]) == (0.0, 330)
+    assert monday["avg_attendees"] == pytest.approx(2 / 3, abs=0.05)
+
+    tuesday = rows["2030-01-08"]
+    # 30 of the 480 free working minutes sit in the gap between the two meetings
+    assert (tuesday["fragmentation"], tuesday["longest_focus_min"]) == (0.06, 390)
+
+    # An event past midnight counts towards the day it starts, its busy time towards both
+    assert (rows["2030-01-09"]["events"], rows["2030-01-09"]["busy_hours"]) == (1, 1.0)
+    assert (rows["2030-01-10"]["events"], rows["2030-01-10"]["busy_hours"]) == (0, 1.0)
+    # No working hours at the weekend
+    assert (rows["2030-01-12"]["fragmentation"], rows["2030-01-12"]["longest_focus_min"]) == (None, 0)
+
+    assert result["totals"]["events"] == 6
+    assert (result["totals"]["hours"], result["totals"]["busy_hours"]) == (5.5, 5.0)
+    assert result["totals"]["busiest_day"] == {"date": "2030-01-07", "busy_hours": 2.0}
+    assert result["skipped"] == {"all_day": 1, "free_or_declined": 2}
+
+
+def test_grouping_by_weekday_and_calendar():
+    by_weekday = analytics.summarize(week_of_events(), *WEEK, group_by="weekday", heatmap=True)
+    assert [row[0] for row in by_weekday["rows"]] == analytics.WEEKDAY_NAMES
+    assert by_weekday["heatmap"]["Mon"][:2] == [60, 30]     # 09:00 and 10:00 on the 7th
+
+    by_calendar = analytics.summarize(week_of_events(), *WEEK, group_by="calendar")
+    assert [row[:3] for row in by_calendar["rows"]] == [["primary", 4, 4.5], ["team", 2, 1.0]]
+
+    with pytest.raises(ValueError):
+        analytics.summarize([], *WEEK, group_by="year")
+
+
+def test_busy_hours_match_a_plain_union():
+    rng = random.Random(7)
+    events, intervals = [], []
+    for _ in range(300):
+        day = 7 + rng.randrange(7)
+        start = rng.randrange(0, 23 * 60, 15)
+        end = min(start + rng.randrange(15, 180, 15), 24 * 60 - 1)
+        events.append(event(f"2030-01-{day:02d}", f"{start // 60:02d}:{start % 60:02d}", f"{end // 60:02d}:{end % 60:02d}"))
+        intervals.append(((day - 7) * 1440 + start, (day - 7) * 1440 + end))
+
+    covered, reach = 0, None
+    for start, end in sorted(intervals):
+        if reach is None or start > reach:
+            covered, reach = covered + end - start, end
+        elif end > reach:
+            covered, reach = covered + end - reach, end
+    assert analytics.summarize(events, *WEEK)["totals"]["busy_hours"] == round(covered / 60, 1)
+
+
+def test_tool_reads_recurring_instances(calendar):
+    calendar.add_event("Standup", "2030-01-07T09:00:00+05:30", "2030-01-07T09:30:00+05:30",
+                       recurrence=["RRULE:FREQ=DAILY;COUNT=10"])
+    result = schedule_analytics.invoke({"time_min": WEEK[0], "time_max": WEEK[1], "group_by": "week"})
+    assert result["rows"] == [["week of 2030-01-07", 7, 3.5, 3.5, 7, 0.0, 0.0, 510]]
+
+    too_long = schedule_analytics.invoke({"time_min": "2030-01-01T00:00:00+05:30", "time_max": "2040-01-01T00:00:00+05:30"})
+    assert "error" in too_long
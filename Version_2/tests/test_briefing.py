@@ -0,0 +1,52 @@
+from core import event_store
+from core.briefing import BriefingService
+from core.event_store import EventStore, event_bounds
+
+DAY = "2030-01-07"
+
+
+def event(event_id, start, end, etag='"1"'):
+    return {"id": event_id, "etag": etag, "summary": event_id,
+            "start": {"dateTime": f"{DAY}T{start}:00+05:30"}, "end": {"dateTime": f"{DAY}T{end}:00+05:30"}}
+
+
+def test_reload_reports_events_changed_outside_the_app():
+    store = EventStore(owner="someone")
+    seen = set()
+
+    def listener(owner, calendar_id, start, end):
+        if owner == "someone":
+            seen.add((start, end))
+
+    event_store.add_listener(listener)
+    try:
+        window = (f"{DAY}T00:00:00+05:30", f"{DAY}T23:59:59+05:30")
+        standup = event("standup", "09:00", "09:15")
+        store.load("primary", *window, [standup])
+        store.load("primary", *window, [standup])
+        assert seen == set()        # a first listing, then the same one again
+
+        moved = event("standup", "10:00", "10:15", etag='"2"')
+        lunch = event("lunch", "13:00", "14:00")
+        store.load("primary", *window, [moved, lunch])
+        assert seen == {event_bounds(standup), event_bounds(moved), event_bounds(lunch)}
+
+        seen.clear()
+        store.load("primary", *window, [lunch])
+        assert seen == {event_bounds(moved)}
+    finally:
+        event_store.remove_listener(listener)
+
+
+def test_briefing_is_rebuilt_after_its_ttl(calendar):
+    event_store.get_store().ttl = 0     # every listing goes to the API
+    now = [0.0]
+    service = BriefingService(ttl=60, clock=lambda: now[0])
+    calendar.add_event("Standup", f"{DAY}T09:00:00+05:30", f"{DAY}T09:15:00+05:30")
+    assert [e["summary"] for e in service.get(DAY)["events"]] == ["Standup"]
+
+    # Added on another device
+    calendar.add_event("Dentist", f"{DAY}T17:00:00+05:30", f"{DAY}T18:00:00+05:30")
+    assert [e["summary"] for e in service.get(DAY)["events"]] == ["Standup"]
+    now[0] = 60
+    assert [e["summary"] for e in service.get(DAY)["events"]] == ["Standup", "Dentist"]
@@ -0,0 +1,31 @@
+import functools
+from unittest import mock
+
+from core import ics, metering, tools
+
+DAY = "2030-01-07"
+
+
+def test_progress_is_metered_batch_by_batch(calendar, tmp_path):
+    for hour in range(9, 18):
+        calendar.add_event(f"Slot {hour}", f"{DAY}T{hour:02d}:00:00+05:30", f"{DAY}T{hour:02d}:30:00+05:30")
+    path = str(tmp_path / "backup.ics")
+    before = metering.totals()
+    assert tools.export_ics.invoke({"file_path": path})["events"] == 9
+
+    seen = []
+    record = metering.record
+
+    def spy(name, amount=1):
+        if name == "ics_events_imported":
+            seen.append(amount)
+        record(name, amount)
+
+    with mock.patch.object(ics, "import_events", functools.partial(ics.import_events, batch_size=4)), \
+            mock.patch.object(metering, "record", spy):
+        stats = tools.import_ics.invoke({"file_path": path, "calendar_id": "restored"})
+    assert stats["imported"] == 9
+    assert seen == [4, 4, 1]
+    after = metering.totals()
+    assert after["ics_events_exported"] - before["ics_events_exported"] == 9
+    assert after["ics_events_imported"] - before["ics_events_imported"] == 9
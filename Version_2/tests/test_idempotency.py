@@ -0,0 +1,60 @@
+from core import idempotency, metering, tools
+
+
+def create(summary="Lunch", start="2030-01-07T13:00:00+05:30", end="2030-01-07T14:00:00+05:30"):
+    return tools.create_event.invoke({"summary": summary, "start_time": start, "end_time": end})
+
+
+def test_repeat_returns_existing_event(calendar):
+    first = create()
+    second = create()
+    assert second["id"] == first["id"]
+    assert "note" in second
+    assert len(calendar.live_events()) == 1
+
+
+def test_delete_then_recreate_writes_a_new_event(calendar):
+    first = create()
+    assert "deleted successfully" in tools.delete_event.invoke({"event_id": first["id"]})
+
+    again = create()
+    assert "note" not in again
+    assert again["id"] != first["id"]      # the first ID stays taken by the cancelled event
+    assert [e["id"] for e in calendar.live_events()] == [again["id"]]
+
+
+def test_cancel_by_description_then_recreate(calendar):
+    create()
+    assert "deleted" in tools.cancel_by_description.invoke({"description": "lunch", "date_hint": "2030-01-07"})
+    again = create()
+    assert "note" not in again
+    assert len(calendar.live_events()) == 1
+
+
+def test_naive_times_are_local():
+    assert idempotency.normalize_time("2030-01-07T09:00:00") == "2030-01-07T03:30:00Z"
+    assert idempotency.request_key("primary", "Standup", "2030-01-07T09:00:00", "2030-01-07T09:15:00") == \
+        idempotency.request_key("primary", " standup ", "2030-01-07T09:00:00+05:30", "2030-01-07T04:45:00+01:00")
+
+
+def test_naive_and_z_pair_from_the_log_is_one_event(calendar):
+    naive = ("TOwnHall meeting", "2025-12-21T09:00:00", "2025-12-21T12:00:00")
+    with_z = ("TOwnHall meeting", "2025-12-21T09:00:00Z", "2025-12-21T12:00:00Z")
+    assert idempotency.request_key("primary", *naive) == idempotency.request_key("primary", *with_z)
+
+    first = create(*naive)
+    assert first["start"]["dateTime"] == "2025-12-21T03:30:00Z"    # 09:00 IST
+    assert "note" in create(*with_z)
+    # A fresh process: the API rejects the client-supplied ID
+    idempotency.recent_writes.entries.clear()
+    assert create(*with_z)["id"] == first["id"]
+    assert len(calendar.live_events()) == 1
+
+
+def test_duplicate_found_in_store_is_counted(calendar):
+    create()
+    before = metering.totals()["duplicate_writes_avoided"]
+    # A fresh process-local table, so the repeat is caught by the store (or the API) instead
+    idempotency.recent_writes.entries.clear()
+    assert "note" in create()
+    assert metering.totals()["duplicate_writes_avoided"] == before + 1
@@ -0,0 +1,21 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from core import metering
+
+
+def test_parallel_records_in_one_turn_are_all_counted():
+    before = metering.totals()["calendar_calls"]
+
+    def work():
+        for _ in range(5000):
+            metering.record("calendar_calls")
+
+    with metering.turn("parallel") as usage:
+        # Like parallel tool calls: each thread runs in a copy of the turn's context
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for future in [pool.submit(contextvars.copy_context().run, work) for _ in range(8)]:
+                future.result()
+    assert usage.counts["calendar_calls"] == 8 * 5000
+    assert metering.totals()["calendar_calls"] == before + 8 * 5000
+    assert metering.session_usage("parallel").counts["calendar_calls"] == 8 * 5000
@@ -0,0 +1,110 @@
+import time
+import smtplib
+
+import pytest
+
+from core import outbox
+
+
+class FakeTransport:
+    """Stands in for SMTPTransport: records sends, and fails the ones `failures` names by recipient."""
+
+    def __init__(self, failures=None):
+        self.failures = failures or {}
+        self.sent = []
+        self.closed = 0
+        self.smtp = None
+
+    def send(self, sender, recipient, subject, body):
+        error = self.failures.get(recipient)
+        if error is not None:
+            raise error
+        self.sent.append((recipient, subject, body))
+
+    def close(self):
+        self.closed += 1
+
+
+@pytest.fixture
+def make_outbox(tmp_path):
+    def make(transport, **options):
+        return outbox.Outbox(transport, "me@example.com", path=str(tmp_path / "outbox.db"), **options)
+    return make
+
+
+def test_enqueue_returns_before_delivery_and_drain_sends_each_message(make_outbox):
+    transport = FakeTransport()
+    box = make_outbox(transport)
+    box.enqueue("a@example.com", "Standup moved", "Now at 10:00.")
+    box.enqueue("a@example.com", "Lunch booked", "13:00.")
+    assert transport.sent == [] and box.counts() == {"pending": 2}
+
+    assert box.drain() == 2
+    assert [s[1] for s in transport.sent] == ["Standup moved", "Lunch booked"]
+    assert box.counts() == {"sent": 2}
+    assert box.drain() == 0
+
+
+def test_failures_are_retried_with_backoff_or_dead_lettered(make_outbox):
+    transport = FakeTransport({
+        "flaky@example.com": smtplib.SMTPServerDisconnected("connection closed"),
+        "gone@example.com": smtplib.SMTPRecipientsRefused({"gone@example.com": (550, b"no such user")}),
+    })
+    box = make_outbox(transport, retry_base=60, max_attempts=2)
+    flaky = box.enqueue("flaky@example.com", "Retried", "...")
+    box.enqueue("gone@example.com", "Bounced", "...")
+    started = time.time()
+
+    assert box.drain() == 0
+    assert box.counts() == {"pending": 1, "dead": 1}
+    # A dropped session is not reused; a refused recipient says nothing about the session
+    assert transport.closed == 1
+    assert box.next_due() >= started + 60
+    assert [d["recipient"] for d in box.dead_letters()] == ["gone@example.com"]
+
+    # Out of attempts on the second failure
+    box.retry_dead(flaky)       # only dead letters are requeued, so this is a no-op
+    with box._connect() as conn:
+        conn.execute("UPDATE outbox SET next_attempt_at = 0 WHERE id = ?", (flaky,))
+    box.drain()
+    assert box.counts() == {"dead": 2}
+
+    del transport.failures["flaky@example.com"]
+    box.retry_dead(flaky)
+    assert box.drain() == 1
+    assert box.counts() == {"sent": 1, "dead": 1}
+
+
+def test_digest_mode_merges_messages_to_one_recipient(make_outbox):
+    transport = FakeTransport()
+    box = make_outbox(transport, digest_window=0.05)
+    box.enqueue("a@example.com", "Standup moved", "Now at 10:00.")
+    box.enqueue("b@example.com", "Review booked", "15:00.")
+    box.enqueue("a@example.com", "Lunch booked", "13:00.")
+    assert box.drain() == 0         # still inside the window
+
+    time.sleep(0.06)
+    assert box.drain() == 2
+    merged = {recipient: (subject, body) for recipient, subject, body in transport.sent}
+    assert merged["a@example.com"][0] == "2 notifications: Standup moved; Lunch booked"
+    assert "--- Lunch booked ---\n13:00." in merged["a@example.com"][1]
+    assert merged["b@example.com"] == ("Review booked", "15:00.")
+    assert box.counts() == {"sent": 3}
+
+
+def test_messages_left_sending_by_a_stopped_process_are_requeued(make_outbox):
+    box = make_outbox(FakeTransport())
+    box.enqueue("a@example.com", "Standup moved", "...")
+    assert len(box.claim()) == 1
+    assert box.counts() == {"sending": 1}
+
+    restarted = make_outbox(FakeTransport())
+    assert restarted.counts() == {"pending": 1}
+    assert restarted.drain() == 1
+
+
+def test_permanent_failures():
+    assert outbox.permanent(smtplib.SMTPDataError(554, b"rejected"))
+    assert not outbox.permanent(smtplib.SMTPDataError(451, b"try later"))
+    assert not outbox.permanent(smtplib.SMTPAuthenticationError(535, b"bad credentials"))
+    assert not outbox.permanent(smtplib.SMTPRecipientsRefused({"a": (550, b""), "b": (450, b"")}))
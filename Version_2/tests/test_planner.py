@@ -0,0 +1,48 @@
+from fakes import ScriptedChatModel, tool_call
+from langchain_core.messages import HumanMessage
+
+from core import planner
+
+DAY = "2030-01-07"
+
+
+def test_non_iso_reference_fails_the_step_and_skips_dependants(calendar):
+    calendar.add_event("Flight", f"{DAY}T06:00:00+05:30", f"{DAY}T08:00:00+05:30")
+    outcome = planner.execute_plan([
+        {"id": "s1", "tool": "list_events",
+         "args": {"time_min": f"{DAY}T00:00:00+05:30", "time_max": f"{DAY}T23:59:59+05:30"}},
+        # A title is not a time: add_minutes cannot apply
+        {"id": "s2", "tool": "create_event",
+         "args": {"summary": "Cab", "start_time": {"$ref": "s1.0.summary", "add_minutes": 30},
+                  "end_time": {"$ref": "s1.0.end.dateTime", "add_minutes": 60}}},
+        {"id": "s3", "tool": "update_event", "args": {"event_id": {"$ref": "s2.id"}, "summary": "Taxi"}},
+    ])
+    assert outcome["s1"]["status"] == "ok"
+    assert outcome["s2"]["status"] == "invalid"
+    assert outcome["s3"]["status"] == "skipped"
+    assert [e["summary"] for e in calendar.live_events()] == ["Flight"]
+
+
+def run(script):
+    agent = planner.build_plan_agent(ScriptedChatModel(script=script))
+    return agent.invoke({"messages": [HumanMessage(content="Book a cab 30 minutes after my flight lands.")]})
+
+
+def test_invalid_reference_falls_back_to_the_tool_loop(calendar):
+    calendar.add_event("Flight", f"{DAY}T06:00:00+05:30", f"{DAY}T08:00:00+05:30")
+    steps = [
+        {"id": "s1", "tool": "list_events",
+         "args": {"time_min": f"{DAY}T00:00:00+05:30", "time_max": f"{DAY}T23:59:59+05:30"}},
+        {"id": "s2", "tool": "create_event",
+         "args": {"summary": "Cab", "start_time": {"$ref": "s1.0.summary", "add_minutes": 30},
+                  "end_time": {"$ref": "s1.0.summary", "add_minutes": 60}}},
+    ]
+    result = run([[tool_call("make_plan", steps=steps)], "Answered by the tool loop."])
+    assert result["messages"][-1].content == "Answered by the tool loop."
+
+
+def test_malformed_plan_falls_back_to_the_tool_loop(calendar):
+    # Steps without ids or tools do not parse as PlanStep
+    for steps in ([{"tool": "list_events"}], ["list_events"], [{"id": "s1", "tool": "list_events", "args": "today"}]):
+        result = run([[tool_call("make_plan", steps=steps)], "Answered by the tool loop."])
+        assert result["messages"][-1].content == "Answered by the tool loop."
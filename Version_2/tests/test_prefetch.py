@@ -0,0 +1,67 @@
+import datetime
+
+import pytest
+
+from core import prefetch, tools
+from core.credentials import use_credentials
+from core.event_store import LOCAL_TZ
+
+
+@pytest.fixture(autouse=True)
+def prefetchers(monkeypatch):
+    monkeypatch.setattr(prefetch, "_prefetchers", {})
+    yield prefetch._prefetchers
+    for prefetcher in prefetch._prefetchers.values():
+        prefetcher.stop()
+
+
+def test_warm_start_loads_the_window_the_first_question_reads(calendar):
+    today = datetime.datetime.now(LOCAL_TZ).date()
+    start = datetime.datetime.combine(today, datetime.time(15), tzinfo=LOCAL_TZ)
+    calendar.add_event("Review", start.isoformat(), (start + datetime.timedelta(hours=1)).isoformat())
+
+    prefetcher = prefetch.warm_start(refresh=0)
+    assert prefetcher.wait(10) and prefetcher.error is None
+    listed = calendar.calls.get("events.list", 0)
+    assert listed >= 1
+
+    span = prefetch.window(1)
+    events = tools.list_events.invoke(span)
+    assert [e["summary"] for e in events] == ["Review"]
+    assert calendar.calls.get("events.list", 0) == listed       # served from the store
+
+
+def test_one_prefetcher_per_user(calendar):
+    with use_credentials(None, user_id="alice"):
+        alice = prefetch.warm_start(refresh=0)
+        assert prefetch.warm_start() is alice
+    with use_credentials(None, user_id="bob"):
+        assert prefetch.warm_start(refresh=0) is not alice
+    assert prefetch.warm_start(days=0) is None
+
+
+def test_refreshes_while_touched_and_stops_when_idle(calendar):
+    now = [0.0]
+    prefetcher = prefetch.Prefetcher(refresh=0.01, keep_warm=60, clock=lambda: now[0]).touch()
+    assert prefetcher.wait(10)
+    worker = prefetcher.worker
+    while prefetcher.loads < 3:
+        worker.join(0.01)
+
+    now[0] = 61
+    worker.join(10)
+    assert not worker.is_alive() and prefetcher.worker is None
+
+    # Touching the session again starts a new thread
+    loads = prefetcher.loads
+    worker = prefetcher.touch().worker
+    now[0] = 200
+    worker.join(10)
+    assert not worker.is_alive() and prefetcher.loads > loads
+
+
+def test_failures_are_recorded_without_blocking_the_session(calendar, monkeypatch):
+    monkeypatch.setattr(tools, "get_calendar_service", lambda: None)
+    prefetcher = prefetch.Prefetcher(refresh=0).touch()
+    assert prefetcher.wait(10)
+    assert prefetcher.error == "Authentication failed" and prefetcher.loads == 0
@@ -0,0 +1,55 @@
+from core import tools
+from core.event_store import parse_time
+
+MONDAY = "2030-01-07"
+MONTH = {"time_min": f"{MONDAY}T00:00:00+05:30", "time_max": "2030-02-04T00:00:00+05:30"}
+
+
+def seed(calendar):
+    standup = calendar.add_event("Standup", f"{MONDAY}T09:30:00+05:30", f"{MONDAY}T09:45:00+05:30",
+                                 recurrence=["RRULE:FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR;COUNT=60"])
+    sync = calendar.add_event("Team sync", "2030-01-09T15:00:00+05:30", "2030-01-09T16:00:00+05:30",
+                              recurrence=["RRULE:FREQ=WEEKLY;COUNT=12"])
+    calendar.add_event("Customer call", "2030-01-08T14:00:00+05:30", "2030-01-08T15:00:00+05:30")
+    return standup, sync
+
+
+def test_listing_collapses_series_and_fetches_masters_in_one_batch(calendar):
+    standup, sync = seed(calendar)
+    listing = tools.list_events.invoke(MONTH)
+    assert [e["summary"] for e in listing] == ["Standup", "Customer call", "Team sync"]
+    series = {e["id"]: e for e in listing if e.get("recurrence")}
+    assert series[standup["id"]]["occurrences"] == 20
+    assert series[sync["id"]]["occurrences"] == 4
+    assert calendar.calls["batch"] == 1 and calendar.calls["events.get"] == 2
+
+    # Masters are kept in the event store with the listing
+    assert len(tools.list_events.invoke(MONTH)) == 3
+    assert calendar.calls["batch"] == 1 and calendar.calls["events.list"] == 1
+
+
+def test_expanded_listing_has_every_occurrence(calendar):
+    seed(calendar)
+    listing = tools.list_events.invoke(dict(MONTH, expand_recurring=True))
+    assert len(listing) == 20 + 4 + 1
+
+
+def test_update_series_reads_naive_times_as_local(calendar):
+    standup, _ = seed(calendar)
+    # "Move all my standups to 10:30"
+    result = tools.update_series.invoke({"event_id": standup["id"], "start_time": f"{MONDAY}T10:30:00",
+                                         "end_time": f"{MONDAY}T10:45:00"})
+    assert "error" not in result
+    starts = {parse_time(e["start"]["dateTime"]).isoformat()
+              for e in tools.list_events.invoke(dict(MONTH, expand_recurring=True)) if e["summary"] == "Standup"}
+    assert len(starts) == 20
+    assert all(start.endswith("T10:30:00+05:30") for start in starts)
+
+
+def test_delete_following_ends_the_series(calendar):
+    _, sync = seed(calendar)
+    third = next(e for e in tools.list_events.invoke(dict(MONTH, expand_recurring=True))
+                 if e["summary"] == "Team sync" and e["start"]["dateTime"].startswith("2030-01-23"))
+    assert "ended" in tools.delete_series.invoke({"event_id": third["id"], "scope": "following"})
+    left = [e for e in tools.list_events.invoke(dict(MONTH, expand_recurring=True)) if e["summary"] == "Team sync"]
+    assert [e["start"]["dateTime"][:10] for e in left] == ["2030-01-09", "2030-01-16"]
@@ -0,0 +1,34 @@
+from core import tools
+from core.event_store import parse_time
+
+DAY = "2030-01-07"
+
+
+def reschedule(**args):
+    return tools.reschedule_by_description.invoke(dict(args, date_hint=DAY))
+
+
+def test_reschedule_reads_naive_times_as_local(calendar):
+    calendar.add_event("Coffee break", f"{DAY}T11:00:00+05:30", f"{DAY}T11:15:00+05:30")
+    moved = reschedule(description="coffee break", new_start_time=f"{DAY}T16:00:00")
+    assert "error" not in moved
+    # 4 PM IST, keeping the 15 minutes
+    assert parse_time(moved["start"]["dateTime"]) == parse_time(f"{DAY}T16:00:00+05:30")
+    assert parse_time(moved["end"]["dateTime"]) == parse_time(f"{DAY}T16:15:00+05:30")
+
+
+def test_ambiguous_description_returns_candidates_without_writing(calendar):
+    calendar.add_event("Team sync", f"{DAY}T10:00:00+05:30", f"{DAY}T10:30:00+05:30")
+    calendar.add_event("Team sync", f"{DAY}T15:00:00+05:30", f"{DAY}T15:30:00+05:30")
+    result = reschedule(description="team sync", new_start_time=f"{DAY}T17:00:00")
+    assert len(result["candidates"]) == 2
+    assert "events.update" not in calendar.calls
+
+
+def test_fuzzy_title_match(calendar):
+    calendar.add_event("Dentist appointment", f"{DAY}T17:00:00+05:30", f"{DAY}T18:00:00+05:30")
+    calendar.add_event("Standup", f"{DAY}T09:00:00+05:30", f"{DAY}T09:15:00+05:30")
+    moved = reschedule(description="dentist appt", new_start_time=f"{DAY}T18:00:00+05:30",
+                       new_end_time=f"{DAY}T19:00:00+05:30")
+    assert moved["summary"] == "Dentist appointment"
+    assert parse_time(moved["start"]["dateTime"]) == parse_time(f"{DAY}T18:00:00+05:30")
@@ -0,0 +1,57 @@
+from fakes import tool_call
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from core import event_store, response_cache
+
+SYSTEM = SystemMessage(content="You are a calendar assistant.")
+DAY = "2030-01-07"
+
+
+def listing(day=DAY, **args):
+    return AIMessage(content="", tool_calls=[
+        tool_call("list_events", time_min=f"{day}T00:00:00+05:30", time_max=f"{day}T23:59:59+05:30", **args)])
+
+
+def ask(messages, reply, reads):
+    """(answer, whether the turn ran) for a turn whose tool calls were `reads`."""
+    ran = []
+
+    def run():
+        ran.append(True)
+        return messages + reads + [AIMessage(content=reply)]
+
+    return response_cache.respond(messages, run).content, bool(ran)
+
+
+def test_follow_ups_after_different_questions_do_not_share_an_answer(calendar):
+    first = [SYSTEM, HumanMessage(content=f"What's on {DAY}?"), AIMessage(content="A standup at 10."),
+             HumanMessage(content="When am I free?")]
+    second = [SYSTEM, HumanMessage(content="What's on 2030-01-08?"), AIMessage(content="Nothing."),
+              HumanMessage(content="When am I free?")]
+    assert response_cache.turn_key(first) != response_cache.turn_key(second)
+    assert response_cache.turn_key(first) != response_cache.turn_key([SYSTEM, first[-1]])
+
+    assert ask(first, "After 10:15.", [listing()]) == ("After 10:15.", True)
+    assert ask(second, "All day.", [listing("2030-01-08")]) == ("All day.", True)
+    # The same exchange again is answered from the cache
+    assert ask(first, "unused", [listing()]) == ("After 10:15.", False)
+
+
+def test_change_in_the_range_read_invalidates_the_answer(calendar):
+    messages = [SYSTEM, HumanMessage(content=f"What's on the team calendar on {DAY}?")]
+    reads = [listing(calendar_ids=["team"])]
+    assert ask(messages, "Nothing yet.", reads) == ("Nothing yet.", True)
+    assert ask(messages, "unused", reads) == ("Nothing yet.", False)
+
+    # Changed outside the app, on a calendar and day the default window never covered
+    calendar.add_event("Offsite", f"{DAY}T10:00:00+05:30", f"{DAY}T12:00:00+05:30", calendar_id="team")
+    event_store._stores.clear()     # as if the store's listing had expired
+    assert ask(messages, "An offsite at 10.", reads) == ("An offsite at 10.", True)
+
+
+def test_plan_steps_count_as_reads_and_writes():
+    plan = AIMessage(content="", tool_calls=[tool_call("make_plan", steps=[
+        {"id": "s1", "tool": "find_available_slots", "args": {"date_str": DAY}},
+        {"id": "s2", "tool": "create_event", "args": {"summary": "Focus", "start_time": {"$ref": "s1.0.start"}}}])])
+    assert response_cache._wrote([plan])
+    assert response_cache.read_scopes([plan]) == [(("primary",), f"{DAY}T09:00:00+05:30", f"{DAY}T18:00:00+05:30")]
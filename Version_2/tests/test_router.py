@@ -0,0 +1,33 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from core.router import FAST, REASONING, classify
+
+
+def turn(prompt, *steps):
+    """System prompt, the user's message, then (tool name, result) steps."""
+    messages = [SystemMessage(content="system"), HumanMessage(content=prompt)]
+    for i, (name, result) in enumerate(steps):
+        messages.append(AIMessage(content="", tool_calls=[{"name": name, "args": {}, "id": f"c{i}"}]))
+        messages.append(ToolMessage(content=result, tool_call_id=f"c{i}"))
+    return messages
+
+
+def test_write_request_stays_on_reasoning_after_tool_results():
+    messages = turn("Book lunch with Sam tomorrow at 1pm", ("check_availability", "true"))
+    assert classify(messages) == REASONING
+
+
+def test_lookup_summary_is_fast():
+    assert classify(turn("What's on my calendar today?")) == FAST
+    assert classify(turn("What's on my calendar today?", ("list_events", "[]"))) == FAST
+
+
+def test_lookup_with_tool_error_needs_reasoning():
+    assert classify(turn("What's on my calendar today?", ("list_events", '[{"error": "quota"}]'))) == REASONING
+
+
+def test_confirmation_takes_the_tier_of_the_confirmed_request():
+    messages = turn("Move my standup to 11") + [AIMessage(content="Move it to 11:00-11:15?"), HumanMessage(content="yes")]
+    assert classify(messages) == REASONING
+    messages = turn("Any meetings today?") + [AIMessage(content="Two. Want details?"), HumanMessage(content="sure")]
+    assert classify(messages) == FAST
@@ -0,0 +1,128 @@
+import sqlite3
+
+import pytest
+from cryptography.fernet import Fernet
+from fakes import ScriptedChatModel, tool_call
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from core.agent import build_agent
+from core.credentials import CalendarCredentials
+from service.server import create_app
+from service.store import SessionStore
+
+ADMIN = {"Authorization": "Bearer admin-secret"}
+CREDENTIALS = {"client_id": "id", "client_secret": "client-secret-value", "refresh_token": "refresh-token-value"}
+
+
+def book(summary="Focus"):
+    return [[tool_call("create_event", summary=summary, start_time="2030-01-07T10:00:00+05:30",
+                       end_time="2030-01-07T11:00:00+05:30")], "Booked."]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SessionStore(str(tmp_path / "sessions.db"), secret_key=Fernet.generate_key())
+
+
+def service(store, script=("Hello.",), **options):
+    app = create_app(store=store, executor=build_agent(llm=ScriptedChatModel(script=list(script))), workers=2,
+                     admin_token="admin-secret", **options)
+    return TestClient(app)
+
+
+def register(client, user_id):
+    response = client.post("/v1/users", json={"user_id": user_id}, headers=ADMIN)
+    assert response.status_code == 201
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+def test_requests_need_a_registered_token(store, calendar):
+    client = service(store)
+    assert client.post("/v1/sessions", json={}).status_code == 401
+    # The header an authenticating proxy would set is not trusted without one
+    assert client.post("/v1/sessions", json={}, headers={"X-User-Id": "alice"}).status_code == 401
+    assert client.post("/v1/users", json={"user_id": "mallory"}).status_code == 401
+
+    alice, bob = register(client, "alice"), register(client, "bob")
+    assert client.post("/v1/users", json={"user_id": "alice"}, headers=ADMIN).status_code == 409
+    assert client.post("/v1/sessions", json={}, headers={"Authorization": "Bearer guessed"}).status_code == 401
+
+    session_id = client.post("/v1/sessions", json={}, headers=alice).json()["session_id"]
+    assert client.post(f"/v1/sessions/{session_id}/messages", json={"text": "hi"}, headers=bob).status_code == 404
+
+    rotated = client.post("/v1/users/me/token", headers=alice).json()["token"]
+    assert client.post("/v1/sessions", json={}, headers=alice).status_code == 401
+    assert client.post("/v1/sessions", json={}, headers={"Authorization": f"Bearer {rotated}"}).status_code == 200
+
+
+def test_refuses_to_start_without_authentication(store):
+    with pytest.raises(RuntimeError):
+        create_app(store=store, executor=object(), trusted_proxy=False)
+
+
+def test_credentials_are_encrypted_at_rest(tmp_path, calendar):
+    key = Fernet.generate_key()
+    path = str(tmp_path / "sessions.db")
+    client = service(SessionStore(path, secret_key=key))
+    alice = register(client, "alice")
+    assert client.put("/v1/users/me/credentials", json=CREDENTIALS, headers=alice).status_code == 204
+
+    with sqlite3.connect(path) as conn:
+        row = conn.execute("SELECT client_secret, refresh_token FROM user_credentials").fetchone()
+        # A row from before encryption is encrypted when the store opens
+        conn.execute("INSERT INTO user_credentials VALUES ('bob', 'id', 'old-secret', 'old-refresh')")
+    assert "client-secret-value" not in row[0] and "refresh-token-value" not in row[1]
+
+    reopened = SessionStore(path, secret_key=key)
+    assert reopened.get_credentials("alice") == CalendarCredentials(**CREDENTIALS)
+    assert reopened.get_credentials("bob") == CalendarCredentials("id", "old-secret", "old-refresh")
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT refresh_token FROM user_credentials WHERE user_id = 'bob'").fetchone()[0] != "old-refresh"
+
+
+def test_env_credentials_are_for_the_named_user_only(store, calendar):
+    client = service(store, env_credentials_user="alice")
+    for user_id, status in (("alice", 200), ("bob", 412)):
+        headers = register(client, user_id)
+        session_id = client.post("/v1/sessions", json={}, headers=headers).json()["session_id"]
+        response = client.post(f"/v1/sessions/{session_id}/messages", json={"text": "hi"}, headers=headers)
+        assert response.status_code == status
+
+
+def test_busy_session_is_refused_before_the_turn_writes(store, calendar):
+    client = service(store, script=book())
+    alice = register(client, "alice")
+    client.put("/v1/users/me/credentials", json=CREDENTIALS, headers=alice)
+    session_id = client.post("/v1/sessions", json={}, headers=alice).json()["session_id"]
+
+    # Another worker is running a turn for this session
+    assert store.claim_session(session_id, 0)
+    response = client.post(f"/v1/sessions/{session_id}/messages", json={"text": "Book focus time"}, headers=alice)
+    assert response.status_code == 409
+    assert calendar.live_events() == [] and "events.insert" not in calendar.calls
+
+    store.release_session(session_id, 0)
+    response = client.post(f"/v1/sessions/{session_id}/messages", json={"text": "Book focus time"}, headers=alice)
+    assert response.json()["reply"] == "Booked."
+    assert [e["summary"] for e in calendar.live_events()] == ["Focus"]
+    assert store.load_session(session_id).version == 1
+    # The claim went with the save
+    assert store.claim_session(session_id, 1)
+
+
+def test_websocket_needs_the_session_owners_token(store, calendar):
+    client = service(store)
+    alice, bob = register(client, "alice"), register(client, "bob")
+    client.put("/v1/users/me/credentials", json=CREDENTIALS, headers=alice)
+    session_id = client.post("/v1/sessions", json={}, headers=alice).json()["session_id"]
+
+    for headers, code in (({}, 4401), ({"X-User-Id": "alice"}, 4401), (bob, 4404)):
+        with pytest.raises(WebSocketDisconnect) as closed:
+            with client.websocket_connect(f"/v1/sessions/{session_id}/ws", headers=headers) as ws:
+                ws.receive_json()
+        assert closed.value.code == code
+
+    with client.websocket_connect(f"/v1/sessions/{session_id}/ws", headers=alice) as ws:
+        ws.send_json({"text": "hi"})
+        assert ws.receive_json()["reply"] == "Hello."
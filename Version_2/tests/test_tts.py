@@ -0,0 +1,26 @@
+from unittest import mock
+
+import httpx
+import pytest
+from gtts.tts import gTTSError
+
+from core import http_pool, tts
+
+
+def test_chunks_stay_within_one_request_and_keep_the_text():
+    text = "You have a standup at 10. " * 12 + "Lunch is at 1, in the cafeteria on the second floor, with the design team."
+    chunks = tts.split_text(text)
+    assert all(len(chunk) <= tts.TTS_CHUNK_CHARS for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_other_gtts_releases_use_write_to_fp():
+    with mock.patch.object(tts, "POOLED_GTTS", False), \
+            mock.patch.object(tts.gTTS, "write_to_fp", lambda self, fp: fp.write(b"mp3")):
+        assert tts.speak("Hello") == b"mp3"
+
+
+def test_reply_without_audio_is_an_error():
+    client = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(200, text=")]}'\n[]")))
+    with mock.patch.object(http_pool, "get_client", lambda name: client), pytest.raises(gTTSError):
+        next(tts.PooledgTTS(text="Hello", lang="en").stream())
@@ -1,31 +1,65 @@
 import streamlit as st
 import os
 import sys
+import time
+import uuid
+import wave
 import tempfile
 import datetime
-from gtts import gTTS
+import contextlib
 from langchain_core.messages import HumanMessage, AIMessage
-from huggingface_hub import InferenceClient
 from dotenv import load_dotenv
 
 # Add root directory to path to find 'core'
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from core.agent import agent_executor, SYSTEM_PROMPT as BASE_SYSTEM_PROMPT
+from core.agent import get_agent_executor, run_turn, PERSONALITY_PROMPTS, build_system_prompt as compose_system_prompt
 from core.tools import get_daily_schedule
+from core import http_pool, metering, prefetch, tracing
+from core.briefing import BriefingService
 
-# Define Personality Prompts
-PERSONALITY_PROMPTS = {
-    "Professional Executive": """
-    Tone: Formal, concise, and efficient.
-    Style: Use business terminology. Focus on productivity and clear outcomes.
-    Example: "I have scheduled the meeting. Is there anything else?"
-    """,
-    "Chill Bestie": """
-    Tone: Casual, friendly, and enthusiastic. Use emojis! 🌟
-    Style: Talk like a helpful friend. Be supportive and relaxed.
-    Example: "Got it! Meeting is booked! 🎉 Anything else you need, bestie?"
+@st.cache_resource(show_spinner=False)
+def load_agent():
+    """Compile the agent graph once per server process (plan or tool loop, per AGENT_MODE); reruns reuse it."""
+    return get_agent_executor()
+
+@st.cache_resource(show_spinner=False)
+def service_client(token):
+    """Client for the backend service when AGENT_SERVICE_URL is set; None runs the agent in-process."""
+    url = os.environ.get("AGENT_SERVICE_URL")
+    if not url:
+        return None
+    from service.client import AgentServiceClient
+    return AgentServiceClient(url, token)
+
+@st.cache_resource(show_spinner=False)
+def briefing_service():
     """
-}
+    Background daily briefing for the in-process agent (None in thin-client mode).
+    With BRIEFING_AUDIO=1 the spoken versions are rendered ahead of time too.
+    """
+    if os.environ.get("AGENT_SERVICE_URL"):
+        return None
+    synthesizer = None
+    if os.environ.get("BRIEFING_AUDIO", "").lower() in ("1", "true", "yes"):
+        synthesizer = lambda text: synthesize_speech(text)[0]
+    return BriefingService(synthesizer=synthesizer).start()
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_endpoint():
+    """Expose usage counters at http://<host>:$METRICS_PORT/metrics for Prometheus."""
+    port = os.environ.get("METRICS_PORT")
+    return metering.start_metrics_server(int(port)) if port else None
+
+@st.cache_resource(show_spinner=False)
+def start_http_pool():
+    """Shared keep-alive connections for the LLM, Whisper and TTS, opened in the background at startup."""
+    http_pool.install_hf_client()
+    return http_pool.preconnect()
+
+@st.cache_resource(show_spinner=False)
+def whisper_client():
+    from huggingface_hub import InferenceClient
+    return InferenceClient(api_key=os.environ.get("HUGGINGFACEHUB_API_TOKEN"))
 
 load_dotenv()
 
@@ -37,80 +71,105 @@ st.set_page_config(page_title="AI Scheduling Agent", page_icon=logo_path)
 st.image(logo_path, width=80)
 st.title("Voice-Enabled AI Scheduling Agent")
 
+# Number of chat messages rendered per history page
+HISTORY_PAGE_SIZE = 20
+
+@st.cache_data(show_spinner=False)
+def build_system_prompt(personality: str) -> str:
+    """System prompt for a persona; computed once per persona instead of on every rerun."""
+    return compose_system_prompt(personality)
+
+from langchain_core.messages import SystemMessage
+
+start_metrics_endpoint()
+start_http_pool()
+# Load the upcoming week of the calendar in the background (core/prefetch.py); each rerun keeps it warm
+if not os.environ.get("AGENT_SERVICE_URL"):
+    prefetch.warm_start()
+
 # Initialize chat history
 if "messages" not in st.session_state:
-    st.session_state.messages = []
+    st.session_state.session_id = uuid.uuid4().hex
+    st.session_state.last_personality = list(PERSONALITY_PROMPTS.keys())[0]
+    st.session_state.messages = [SystemMessage(content=build_system_prompt(st.session_state.last_personality))]
+    st.session_state.history_pages = 1
 
 # Sidebar for controls
-with st.sidebar:
+# Runs as a fragment: interacting with the sidebar does not rerun the chat panel unless it has to.
+@st.fragment
+def sidebar_panel():
     st.header("Settings")
-    
+
     # 1. Personality Switcher
     selected_personality = st.selectbox(
         "Choose Agent Persona:",
         list(PERSONALITY_PROMPTS.keys()),
-        index=0
+        index=list(PERSONALITY_PROMPTS.keys()).index(st.session_state.last_personality)
     )
-    
-    # Update system prompt based on selection
-    current_system_prompt = BASE_SYSTEM_PROMPT + "\n\n" + PERSONALITY_PROMPTS[selected_personality]
-    
+
+    # Update the System Prompt if personality changes
+    if st.session_state.last_personality != selected_personality:
+        st.session_state.last_personality = selected_personality
+        # Clear chat to apply new persona cleanly
+        st.session_state.messages = [SystemMessage(content=build_system_prompt(selected_personality))]
+        st.session_state.history_pages = 1
+        st.session_state['remote_session'] = None
+        st.rerun()
+
     # 2. Smart Daily Briefing Button
     if st.button("Brief Me (Smart Summary)"):
-        st.session_state['trigger_briefing'] = True
-    
+        if briefing_service():
+            # Precomputed in the background (core/briefing.py)
+            st.session_state['briefing_request'] = "summary"
+        else:
+            today_str = datetime.datetime.now().strftime("%Y-%m-%d")
+            # Briefing can be a summary of upcoming events
+            st.session_state['manual_prompt'] = f"Please give me a smart summary of my day for {today_str}."
+        st.rerun()
+
     # 3. Today's Schedule Button
     if st.button("Today's Agenda"):
-        st.session_state['trigger_today_schedule'] = True
-
-# Handle Briefing Trigger
-if st.session_state.get('trigger_briefing', False):
-    st.session_state['trigger_briefing'] = False
-    today_str = datetime.datetime.now().strftime("%Y-%m-%d")
-    # Briefing can be a summary of upcoming events
-    prompt = f"Please give me a smart summary of my day for {today_str}."
-    # We will let the process_input handle it or call it directly
-    st.session_state['manual_prompt'] = prompt
-
-# Handle Today's Schedule Trigger
-if st.session_state.get('trigger_today_schedule', False):
-    st.session_state['trigger_today_schedule'] = False
-    today_str = datetime.datetime.now().strftime("%Y-%m-%d")
-    with st.spinner("Fetching today's schedule..."):
-        schedule = get_daily_schedule.invoke({"date_str": today_str})
-        prompt = f"Here is my activity log for today ({today_str}):\n{schedule}\n\nPlease give me a concise briefing of what I've done or what's scheduled."
-        st.session_state['manual_prompt'] = prompt
-
-# Update the System Prompt if personality changes
-if "last_personality" not in st.session_state:
-    st.session_state.last_personality = selected_personality
-
-if st.session_state.last_personality != selected_personality:
-    st.session_state.last_personality = selected_personality
-    st.session_state.messages = [] # Clear chat to apply new persona cleanly
-    st.rerun()
+        if briefing_service():
+            st.session_state['briefing_request'] = "agenda"
+        else:
+            today_str = datetime.datetime.now().strftime("%Y-%m-%d")
+            with st.spinner("Fetching today's schedule..."):
+                schedule = get_daily_schedule.invoke({"date_str": today_str})
+            st.session_state['manual_prompt'] = f"Here is my activity log for today ({today_str}):\n{schedule}\n\nPlease give me a concise briefing of what I've done or what's scheduled."
+        st.rerun()
 
-from langchain_core.messages import SystemMessage
-if not st.session_state.messages:
-    # Initialize with the selected system prompt
-    st.session_state.messages.append(SystemMessage(content=current_system_prompt))
-else:
-    # If messages exist, ensure the first message is the correct SystemMessage
-    if isinstance(st.session_state.messages[0], SystemMessage):
-        if st.session_state.messages[0].content != current_system_prompt:
-             st.session_state.messages[0] = SystemMessage(content=current_system_prompt)
-
-
-# Display chat messages from history on app rerun
-for message in st.session_state.messages:
-    if isinstance(message, HumanMessage):
-        with st.chat_message("user"):
-            st.markdown(message.content)
-    elif isinstance(message, AIMessage):
-        with st.chat_message("assistant"):
-            st.markdown(message.content)
+    # 4. Latency waterfall (only offered when AGENT_TRACE=1)
+    if tracing.is_enabled():
+        show_trace = st.toggle("Show latency waterfall", value=st.session_state.get('show_trace', False))
+        if show_trace != st.session_state.get('show_trace', False):
+            st.session_state['show_trace'] = show_trace
+            st.rerun()
+
+with st.sidebar:
+    sidebar_panel()
+
+def show_earlier_messages():
+    st.session_state.history_pages += 1
+
+def render_history():
+    """Render the most recent pages of the conversation; older turns load on demand."""
+    chat = [m for m in st.session_state.messages if isinstance(m, (HumanMessage, AIMessage))]
+    visible = HISTORY_PAGE_SIZE * st.session_state.history_pages
+    hidden = len(chat) - visible
+    if hidden > 0:
+        st.button(f"Show earlier messages ({hidden} hidden)", on_click=show_earlier_messages)
+        chat = chat[-visible:]
+
+    for message in chat:
+        if isinstance(message, HumanMessage):
+            with st.chat_message("user"):
+                st.markdown(message.content)
+        else:
+            with st.chat_message("assistant"):
+                st.markdown(message.content)
 
 # Function to handle user input (text or audio)
+@tracing.traced("process_input")
 def process_input(user_input):
     # Add user message to chat history
     st.session_state.messages.append(HumanMessage(content=user_input))
@@ -122,18 +181,16 @@ def process_input(user_input):
     # Call Agent
     with st.chat_message("assistant"):
         with st.spinner("Thinking..."):
-            # Prepare state with optimized context window
-            # Always keep the first message (likely System Prompt) and the last 10 messages
-            if len(st.session_state.messages) > 10:
-                short_history = [st.session_state.messages[0]] + st.session_state.messages[-10:]
-            else:
-                short_history = st.session_state.messages
-                
-            state = {"messages": short_history}
-            result = agent_executor.invoke(state)
-            
-            # Get last message
-            last_message = result["messages"][-1]
+            with tracing.span("agent"):
+                client = service_client(os.environ.get("AGENT_SERVICE_TOKEN", ""))
+                if client:
+                    # Thin-client mode: the service holds the conversation state
+                    if st.session_state.get('remote_session') is None:
+                        st.session_state['remote_session'] = client.create_session(st.session_state.last_personality)
+                    reply = client.send_message(st.session_state['remote_session'], user_input)
+                    last_message = AIMessage(content=reply["reply"])
+                else:
+                    last_message = run_turn(st.session_state.messages, load_agent())
             response_text = last_message.content
             
             st.markdown(response_text)
@@ -142,45 +199,119 @@ def process_input(user_input):
             st.session_state.messages.append(last_message)
             
             # TTS
-            try:
-                tts = gTTS(text=response_text, lang='en')
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as fp:
-                    tts.save(fp.name)
-                    original_audio_path = fp.name
-                
-                # Speed up audio using ffmpeg
-                output_audio_path = original_audio_path.replace(".mp3", "_fast.mp3")
-                # Speed up audio using ffmpeg (Optional)
-                try:
-                    import subprocess
-                    subprocess.run([
-                        "ffmpeg", "-i", original_audio_path, 
-                        "-filter:a", "atempo=1.75", 
-                        "-vn", output_audio_path, "-y"
-                    ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                    
-                    # Play faster audio
-                    st.audio(output_audio_path, format="audio/mp3", autoplay=True)
-                except (FileNotFoundError, Exception) as e:
-                    # Fallback to normal speed if ffmpeg is missing or fails
-                    st.warning(f"Audio speedup unavailable (running normal speed). Error: {e}")
-                    st.audio(original_audio_path, format="audio/mp3", autoplay=True)
-                
-                # Cleanup
-                # os.remove(original_audio_path) 
-
-            except Exception as e:
-                 st.error(f"TTS Error: {e}")
-
-
-# Audio Input
-audio_value = st.audio_input("Speak to the agent")
-
-if audio_value:
+            play_speech(response_text)
+
+
+def synthesize_speech(text):
+    """
+    Render text to one mp3, synthesized and sped up chunk by chunk in parallel (core/tts.py).
+    Returns (audio path, warning or None).
+    """
+    from core import tts
+    warning = None
+    with tracing.span("tts.synthesize", chars=len(text)), \
+            tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as fp:
+        for audio, problem in tts.synthesize(text):
+            fp.write(audio)
+            warning = warning or problem
+    return fp.name, warning
+
+def play_speech(text, audio_path=None):
+    """
+    Speak a reply, using pre-rendered audio when there is some.
+    Otherwise the first chunk starts playing as soon as it is synthesized. Once every chunk is
+    ready, the player is swapped for the whole reply at the point the listener has reached.
+    """
+    try:
+        if audio_path is not None:
+            st.audio(audio_path, format="audio/mp3", autoplay=True)
+            return
+        from core import tts
+        player = st.empty()
+        chunks, warning = [], None
+        with tracing.span("tts.synthesize", chars=len(text)):
+            for audio, problem in tts.synthesize(text):
+                warning = warning or problem
+                if not chunks:
+                    player.audio(audio, format="audio/mp3", autoplay=True)
+                    started = time.monotonic()
+                chunks.append(audio)
+        if len(chunks) > 1:
+            # Mid-way through the first chunk if it is still playing, else right after it;
+            # the script never waits for playback
+            heard = min(time.monotonic() - started, tts.mp3_seconds(chunks[0]))
+            player.audio(b"".join(chunks), format="audio/mp3", start_time=heard, autoplay=True)
+        if warning:
+            st.warning(warning)
+    except Exception as e:
+         st.error(f"TTS Error: {e}")
+
+def show_briefing(kind):
+    """Answer "Brief Me" / "Today's Agenda" from the precomputed briefing, without an LLM turn."""
+    label = "Brief me." if kind == "summary" else "What's on my agenda today?"
+    with tracing.span("briefing", kind=kind):
+        briefing = briefing_service().get()
+    text = briefing[kind]
+    st.session_state.messages += [HumanMessage(content=label), AIMessage(content=text)]
+    with st.chat_message("user"):
+        st.markdown(label)
+    with st.chat_message("assistant"):
+        st.markdown(text)
+        play_speech(text, briefing.get("audio", {}).get(kind))
+
+
+@contextlib.contextmanager
+def agent_turn(source):
+    """Meter and trace one user turn (STT + agent + TTS)."""
+    with metering.turn(st.session_state.session_id), tracing.span("turn", input=source) as turn:
+        yield
+    st.session_state['last_trace'] = turn.spans()
+
+def audio_seconds(path):
+    """Duration of a WAV recording, used for Whisper usage accounting."""
+    try:
+        with wave.open(path) as w:
+            return w.getnframes() / float(w.getframerate())
+    except (wave.Error, EOFError):
+        return 0.0
+
+# Chat panel
+# Runs as a fragment: a new voice or text turn reruns only this panel, not the sidebar.
+@st.fragment
+def chat_panel():
+    # Display chat messages from history on app rerun
+    render_history()
+
+    # Audio Input
+    audio_value = st.audio_input("Speak to the agent")
+
+    # The recorder keeps its value across reruns; only transcribe a recording once.
+    if audio_value and audio_value.file_id != st.session_state.get('last_audio_id'):
+        st.session_state['last_audio_id'] = audio_value.file_id
+        with agent_turn("voice"):
+            handle_audio(audio_value)
+
+    # Text Input (Fallback)
+    if prompt := st.chat_input("How can I help you..."):
+        with agent_turn("text"):
+            process_input(prompt)
+
+    # Briefing buttons answer from the precomputed briefing
+    if briefing_request := st.session_state.get('briefing_request'):
+        st.session_state['briefing_request'] = None
+        with agent_turn("button"):
+            show_briefing(briefing_request)
+
+    # Handle Manual Prompt (from buttons)
+    if manual_prompt := st.session_state.get('manual_prompt'):
+        st.session_state['manual_prompt'] = None
+        with agent_turn("button"):
+            process_input(manual_prompt)
+
+def handle_audio(audio_value):
     # Use Hugging Face Whisper for STT
-    from huggingface_hub import InferenceClient
-    client = InferenceClient(api_key=os.environ.get("HUGGINGFACEHUB_API_TOKEN"))
-    
+    client = whisper_client()
+
     with st.spinner("Transcribing with Whisper..."):
         try:
             # Streamlit audio_input provides a file-like object. 
@@ -188,31 +319,62 @@ if audio_value:
             with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_audio:
                 tmp_audio.write(audio_value.read())
                 tmp_audio_path = tmp_audio.name
-            
+
             # Use Whisper model with the file path
-            result = client.automatic_speech_recognition(
-                audio=tmp_audio_path,
-                model="openai/whisper-large-v3-turbo"
-            )
+            with tracing.span("stt", bytes=os.path.getsize(tmp_audio_path)):
+                result = client.automatic_speech_recognition(
+                    audio=tmp_audio_path,
+                    model="openai/whisper-large-v3-turbo"
+                )
+            metering.record("whisper_seconds", audio_seconds(tmp_audio_path))
             transcription = result.text
-            
+
             # Cleanup temp file
             os.remove(tmp_audio_path)
-            
+
             # Process the transcribed text
             if transcription.strip():
                 process_input(transcription)
             else:
                 st.warning("Could not transcribe any speech. Please try again.")
-            
+
         except Exception as e:
             st.error(f"Transcription Error (Whisper): {e}")
 
-# Text Input (Fallback)
-if prompt := st.chat_input("How can I help you..."):
-    process_input(prompt)
+@st.fragment(run_every="2s")
+def trace_panel():
+    """Waterfall of the spans recorded for the last turn."""
+    spans = st.session_state.get('last_trace')
+    st.subheader("Last turn latency")
+    if not spans:
+        st.caption("No traced turn yet.")
+        return
+
+    import pandas as pd
+    import altair as alt
+
+    origin = spans[0]["start"]
+    depth = {}
+    rows = []
+    for s in spans:
+        depth[s["span_id"]] = depth.get(s["parent_id"], -1) + 1
+        offset = (s["start"] - origin) * 1000
+        rows.append({
+            "span": "\u2003" * depth[s["span_id"]] + s["name"],
+            "start_ms": offset,
+            "end_ms": offset + s["duration_ms"],
+            "duration_ms": s["duration_ms"],
+        })
+    chart = alt.Chart(pd.DataFrame(rows)).mark_bar().encode(
+        x=alt.X("start_ms", title="ms"),
+        x2="end_ms",
+        y=alt.Y("span", sort=None, title=None),
+        tooltip=["span", "duration_ms"],
+    )
+    st.altair_chart(chart, width="stretch")
+
+chat_panel()
 
-# Handle Manual Prompt (from buttons)
-if manual_prompt := st.session_state.get('manual_prompt'):
-    st.session_state['manual_prompt'] = None
-    process_input(manual_prompt)
+if tracing.is_enabled() and st.session_state.get('show_trace'):
+    with st.sidebar:
+        trace_panel()